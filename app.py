@@ -1,12 +1,41 @@
+import logging
 import os
-from flask import Flask, request, jsonify, render_template
+import json
+import hashlib
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context, g
 from flask_cors import CORS
-from services.sheets import save_to_sheet, get_sheets_service, get_records_from_sheet
-from services.analyzer import analyze_text, load_models
+from services.log import configure_logging
+# 다른 서비스 모듈이 import되면서 남기는 로그(키워드 사전 로드 등)도 기록되도록 가장 먼저 로그를 설정합니다.
+configure_logging()
+from services.sheets import get_write_behind_stats
+from services.analyzer import analyze_text, get_inference_stats, analysis_cache, get_analysis_cache_stats
+from services.model_loader import model_loader, READY, FAILED
+from services.inference import QueueFullError
 from flask import Flask, render_template
 from services.login import add_login_route 
 from services.register import add_register_route
-from config import DIARY_SPREADSHEET_ID
+from services.sheets_client import get_client_stats
+from services.sheets_guard import get_guard_stats
+from services.metrics import metrics, render_prometheus
+from services.inference_client import get_inference_client_stats
+from services.async_http import get_async_io_stats
+from services.user_directory import user_directory
+from services.record_cache import record_cache
+from services.summary_worker import SummaryWorker
+from services.layout import compute_layout, parse_physics_params, layout_cache
+from services.spatial_index import spatial_index
+from services.search_index import search_index, parse_time_bound
+from services.import_jobs import ImportJobManager, add_import_routes
+from services.storage import get_storage, RECORD_FIELDS, encode_cursor, decode_cursor, project_record
+from services.record_columns import RECORDS_BINARY_MIMETYPE, encode_binary
+from services.settings import (
+    MODEL_WARMUP_WAIT_SECONDS, SUMMARY_QUEUE_DEPTH, RECORDS_MAX_PAGE_SIZE,
+    LAYOUT_DEFAULT_STEPS, LAYOUT_MAX_STEPS, LAYOUT_USE_CATEGORY,
+    IMPORT_DIR, IMPORT_WRITE_ROWS, IMPORT_MAX_ENTRIES, IMPORT_MODEL_WAIT_SECONDS,
+    SEARCH_DEFAULT_RESULTS, SEARCH_MAX_RESULTS
+)
+
+logger = logging.getLogger(__name__)
 
 # 현재 스크립트 파일의 절대 경로를 가져와 기본 디렉터리로 설정합니다.
 base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -17,46 +46,201 @@ app = Flask(__name__, static_folder=os.path.join(base_dir, 'static'), template_f
 add_login_route(app)
 #회원가입 라우트 추가
 add_register_route(app)
-CORS(app)
+# 모든 응답에 사용 중인 저장소 이름을 붙입니다. 클라이언트는 보관한 기록이 어느 저장소의 것인지 구분하는 데 사용합니다.
+STORAGE_HEADER = 'X-Storage-Backend'
+CORS(app, expose_headers=[STORAGE_HEADER])
+
+# 서버가 시작될 때 AI 모델을 백그라운드에서 로드하기 시작합니다.
+# 모델을 한 번만 로드해 애플리케이션 전체에서 사용하되, 로드가 끝나기 전에도 다른 라우트는 바로 응답합니다.
+model_loader.start()
 
-# 서버가 시작될 때 AI 모델을 미리 로드합니다.
-# 이렇게 하면 모델을 한 번만 로드하고 애플리케이션 전체에서 사용할 수 있습니다.
-emotion_classifier, summarizer = load_models()
-if emotion_classifier is None or summarizer is None:
-    print("경고: AI 모델 로드에 실패했습니다. 분석 기능이 올바르게 작동하지 않을 수 있습니다.")
+# 키워드가 없는 일기의 요약은 요청 처리와 별도로 백그라운드에서 생성합니다.
+summary_worker = SummaryWorker(lambda: model_loader.wait_for('summarizer', 60), SUMMARY_QUEUE_DEPTH, analysis_cache)
 
-# 스프레드시트 ID는 app.py 또는 환경 변수에 정의되어야 합니다.
-SPREADSHEET_ID = DIARY_SPREADSHEET_ID
+# 사용자/기록 저장소 (STORAGE_BACKEND 설정: Google Sheets 또는 로컬 SQLite)
+storage = get_storage()
 
-# Google Sheets에서 사용자의 user_id를 조회하는 함수
+# 저장소에서 사용자의 user_id를 조회하는 함수
+@metrics.timed('user_lookup')
 def get_user_id_from_sheet(email):
     """
-    주어진 이메일에 해당하는 user_id를 Google Sheets에서 조회합니다.
+    주어진 이메일에 해당하는 user_id를 조회합니다.
+    Google Sheets 저장소는 'users' 시트를 사용자 디렉터리 캐시에 올려두고 메모리에서 찾습니다.
     """
-    service = get_sheets_service()
-    if not service:
-        return None
-
     try:
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range='users!A:C' # Assuming email is in column A and user_id is in column C
-        ).execute()
-        values = result.get('values', [])
-        
-        if not values:
-            return None
-
-        # Find the row with the matching email and return the corresponding user_id
-        for row in values:
-            if len(row) > 2 and row[0] == email:
-                return row[2] # user_id is in the third column (index 2)
-        
+        return storage.get_user_id(email)
     except Exception as e:
-        print(f"ERROR: Failed to retrieve user ID from sheet: {e}")
+        logger.error("Failed to retrieve user ID from sheet: %s", e)
         return None
+
+def parse_records_query(args):
+    """
+    기록 목록 요청의 limit, cursor, fields 쿼리 파라미터를 해석합니다.
+    Returns:
+        tuple: (limit 또는 None, 커서 다음부터 읽을 위치 또는 None, 필드 목록 또는 None)
+    Raises:
+        ValueError: 값이 올바르지 않은 경우. 메시지를 그대로 400 응답에 사용합니다.
+    """
+    limit = args.get('limit', type=int)
+    if limit is not None and not 1 <= limit <= RECORDS_MAX_PAGE_SIZE:
+        raise ValueError(f"limit은 1에서 {RECORDS_MAX_PAGE_SIZE} 사이여야 합니다.")
+    cursor = args.get('cursor')
+    after = decode_cursor(cursor) if cursor else None
+    fields = args.get('fields')
+    if fields:
+        fields = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = [name for name in fields if name not in RECORD_FIELDS]
+        if unknown:
+            raise ValueError(f"알 수 없는 필드입니다: {', '.join(unknown)}")
+    else:
+        fields = None
+    return limit, after, fields
+
+def parse_search_query(args):
+    """
+    /search 요청의 검색어와 필터 쿼리 파라미터를 해석합니다.
+    Returns:
+        dict: search_index.search()에 넘길 query, emotions, categories, start, end, limit
+    Raises:
+        ValueError: 값이 올바르지 않은 경우. 메시지를 그대로 400 응답에 사용합니다.
+    """
+    limit = args.get('limit', SEARCH_DEFAULT_RESULTS, type=int)
+    if not 1 <= limit <= SEARCH_MAX_RESULTS:
+        raise ValueError(f"limit은 1에서 {SEARCH_MAX_RESULTS} 사이여야 합니다.")
+
+    def labels(name):
+        value = args.get(name)
+        return [label.strip() for label in value.split(',') if label.strip()] if value else None
+
+    start, end = args.get('start'), args.get('end')
+    return {
+        "query": args.get('q', ''),
+        "emotions": labels('emotion'),
+        "categories": labels('category'),
+        "start": parse_time_bound(start, upper=False) if start else None,
+        "end": parse_time_bound(end, upper=True) if end else None,
+        "limit": limit,
+    }
+
+def records_response_format(args, accept):
+    """
+    기록 목록의 응답 형식을 정합니다. format 쿼리 파라미터가 있으면 Accept 헤더보다 먼저 봅니다.
+    Returns:
+        str: 'json', 'ndjson' 또는 'binary'
+    """
+    requested = args.get('format')
+    if requested in ('ndjson', 'binary'):
+        return requested
+    if 'application/x-ndjson' in accept:
+        return 'ndjson'
+    if RECORDS_BINARY_MIMETYPE in accept:
+        return 'binary'
+    return 'json'
+
+def records_etag(user_id, version_info, query_string, response_format='json'):
+    """
+    사용자 기록의 변경 버전과 기록 수, 요청 파라미터, 응답 형식이 같으면 응답 내용도 같으므로 이를 ETag로 사용합니다.
+    (형식은 Accept 헤더로도 고를 수 있어 쿼리 문자열만으로는 구분되지 않습니다)
+    """
+    return hashlib.sha1(
+        f"{storage.name}:{user_id}:{version_info['version']}:{version_info['count']}:{query_string}:{response_format}".encode('utf-8')
+    ).hexdigest()[:20]
+
+def encode_records_binary(user_id, version, fields):
+    """
+    사용자의 모든 기록을 바이너리 형식(services/record_columns.py)으로 만듭니다. 기록 딕셔너리를 만들지 않습니다.
+    Returns:
+        tuple: (응답 본문 바이트, 200) 또는 (오류 딕셔너리, HTTP 상태 코드)
+    """
+    result, status_code = storage.record_columns(user_id)
+    if status_code != 200:
+        return result, status_code
+    return encode_binary(result['columns'], version, fields), 200
+
+# 바이너리 형식에 limit/cursor를 함께 보냈을 때의 오류 메시지
+BINARY_PAGINATION_MESSAGE = "format=binary는 limit과 cursor 없이 전체 기록을 한 번에 보냅니다."
+
+def paginate_records(records, limit, fields):
+    """
+    저장소에서 기록을 하나씩 꺼내며 (기록, None)을 내보내고, limit개를 넘기면 마지막으로 보낸 기록 위치를
+    다음 커서로 하여 (None, 커서)를 내보낸 뒤 멈춥니다.
+    """
+    count = 0
+    last_key = None
+    for key, record in records:
+        if limit is not None and count >= limit:
+            yield None, encode_cursor(last_key)
+            return
+        count += 1
+        last_key = key
+        yield project_record(record, fields), None
+
+def emotion_model_unavailable():
+    """
+    감정 분류 모델을 쓸 수 없을 때의 응답 (본문, 상태 코드, Retry-After)을 반환합니다.
+    로드에 실패했으면 500, 아직 로드 중이면 503입니다.
+    """
+    if model_loader.state('emotion') == FAILED:
+        return {"status": "error", "message": "서버 오류: AI 모델이 로드되지 않았습니다."}, 500, None
+    return {"status": "warming", "message": "AI 모델을 준비하는 중입니다. 잠시 후 다시 시도해주세요."}, 503, '5'
+
+def validate_diary_request(data):
+    """일기 분석 요청 본문을 확인하고, 문제가 있으면 오류 메시지를 반환합니다."""
+    if not data.get('diary_entry', '').strip():
+        return "일기 내용이 비어 있습니다."
+    if not data.get('user_email', '').strip():
+        return "사용자 이메일이 비어 있습니다."
+    if not data.get('position'):
+        return "위치 데이터가 없습니다."
     return None
 
+def summary_on_saved(user_id, diary_text):
+    """기록이 저장된 뒤 요약을 백그라운드에서 생성해 그 기록에 붙이는 on_saved 콜백을 만듭니다."""
+    def on_saved(row_number):
+        summary_worker.submit(
+            diary_text,
+            lambda summary: storage.attach_summary(user_id, row_number, summary)
+        )
+    return on_saved
+
+# 지난 실행에서 저장하지 못한 기록도 저장을 마치면 요약을 요청하도록 on_saved를 다시 만들어 넘깁니다.
+storage.start(summary_on_saved)
+
+def save_analyzed_diary(user_id, diary_text, position, analysis_result):
+    """
+    분석한 일기를 저장소에 저장하고 클라이언트에 보낼 (응답 딕셔너리, 상태 코드)를 반환합니다.
+    키워드가 없던 일기는 시트에 쓰인 뒤 요약을 백그라운드에서 생성해 그 행에 붙입니다.
+    """
+    on_saved = summary_on_saved(user_id, diary_text) if analysis_result['needs_summary'] else None
+
+    # 저장소에 기록을 저장합니다. (position 인자 추가)
+    save_result = storage.append_record(
+        user_id, diary_text, analysis_result['emotion'], analysis_result['category'], analysis_result['timestamp'],
+        position, on_saved
+    )
+    if save_result["status"] == "error":
+        return save_result, 500
+
+    # 최종 응답 데이터를 구성하여 클라이언트로 전송합니다.
+    return {
+        "status": "success",
+        "emotion": analysis_result['emotion'],
+        "emotion_label": analysis_result['emotion_label'],
+        "category": analysis_result['category'],
+        "timestamp": analysis_result['timestamp'],
+        "text": diary_text,
+        "position": position # 응답에 position 추가
+    }, 200
+
+# 기존 일기를 CSV/JSONL 파일로 한꺼번에 가져오는 작업. 묶음 단위로 분석/저장하고, 재시작하면 이어서 처리합니다.
+import_jobs = ImportJobManager(
+    IMPORT_DIR, storage, lambda: model_loader.wait_for('emotion', IMPORT_MODEL_WAIT_SECONDS), summary_worker,
+    write_rows=IMPORT_WRITE_ROWS, max_entries=IMPORT_MAX_ENTRIES
+)
+import_jobs.start()
+# 일괄 가져오기 라우트 추가
+add_import_routes(app, import_jobs, get_user_id_from_sheet)
+
 # 메인 페이지 라우트
 @app.route('/')
 def home():
@@ -77,79 +261,333 @@ def show_register_page():
     """register.html 페이지를 렌더링합니다."""
     return render_template('register.html')
 
+# 프로세스가 살아 있는지 확인하는 라우트 (liveness)
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """서버 프로세스가 요청을 처리할 수 있으면 항상 200을 반환합니다."""
+    return jsonify({"status": "alive", "uptime_seconds": model_loader.uptime(), "models": model_loader.status()}), 200
+
+# 분석 요청을 받을 준비가 되었는지 확인하는 라우트 (readiness)
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """감정 분류 모델이 로드되었으면 200, 아직 로드 중이거나 실패했으면 503을 반환합니다."""
+    ready = model_loader.state('emotion') == READY
+    body = {"status": "ready" if ready else "warming", "models": model_loader.status()}
+    return jsonify(body), 200 if ready else 503
+
+# 라우트별 요청 처리 시간을 /metrics에 기록합니다. (asgi.py의 비동기 라우트는 AsyncApp이 기록합니다)
+@app.before_request
+def start_request_timer():
+    g.metrics_started = metrics.start_request()
+
+@app.after_request
+def record_request_time(response):
+    rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.finish_request(g.pop('metrics_started', None), request.method, rule, response.status_code)
+    return response
+
+@app.after_request
+def add_storage_header(response):
+    response.headers[STORAGE_HEADER] = storage.name
+    return response
+
+# 단계별 지연 시간 히스토그램을 Prometheus 텍스트 형식으로 제공하는 라우트
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """요청 처리 단계, 라우트, Google Sheets 작업별 지연 시간 히스토그램을 반환합니다."""
+    sheets_histograms = [
+        ('sheets', (('op', op),), op_stats['histogram'])
+        for op, op_stats in get_guard_stats()['ops'].items()
+    ]
+    return Response(render_prometheus(sheets_histograms), mimetype='text/plain; version=0.0.4')
+
+# 서버 내부 캐시/풀 상태를 확인하는 라우트
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Google Sheets 클라이언트 풀, 사용자 디렉터리 캐시 등 서버 내부 구성 요소의 상태를 반환합니다."""
+    return jsonify({
+        "storage": storage.stats(),
+        "sheets_client": get_client_stats(),
+        "sheets_guard": get_guard_stats(),
+        "user_directory": user_directory.stats(),
+        "record_cache": record_cache.stats(),
+        "inference": get_inference_stats(),
+        "analysis_cache": get_analysis_cache_stats(),
+        "inference_server": get_inference_client_stats(),
+        "summary_worker": summary_worker.stats(),
+        "async_io": get_async_io_stats(),
+        "write_behind": get_write_behind_stats(),
+        "layout": layout_cache.stats(),
+        "spatial_index": spatial_index.stats(),
+        "search_index": search_index.stats(),
+        "imports": import_jobs.stats(),
+    })
+
 # 사용자의 모든 기록을 불러오는 라우트
 @app.route('/get_all_records', methods=['GET'])
 def get_all_records():
     """
-    사용자의 모든 일기 기록을 Google Sheets에서 불러와 클라이언트에 반환합니다.
+    사용자의 일기 기록을 저장소에서 불러와 클라이언트에 반환합니다.
+    쿼리 파라미터:
+        user_email (필수)
+        limit: 한 번에 받을 최대 기록 수. 더 남아 있으면 응답의 next_cursor로 다음 페이지를 요청합니다.
+        cursor: 이전 응답의 next_cursor.
+        fields: 쉼표로 구분한 필드 목록 (예: timestamp,emotion,category,position). 생략하면 모든 필드.
+        format: 'ndjson'이면 기록을 한 줄에 하나씩 스트리밍하고, 마지막 줄에 {"status", "count", "next_cursor", "version"}을 보냅니다.
+            'binary'(또는 Accept: application/x-diary-records)이면 위치/감정/카테고리를 typed array로 읽을 수 있는
+            바이너리 형식으로 전체 기록을 한 번에 보냅니다 (limit/cursor는 쓸 수 없고, fields는 timestamp/text/summary 포함 여부만 정합니다).
+    응답의 version은 /records/changes의 since로 사용합니다.
+    응답에는 ETag가 붙고, If-None-Match가 같으면 (기록이 바뀌지 않았으면) 304를 반환합니다.
+    """
+    user_email = request.args.get('user_email')
+    if not user_email:
+        return jsonify({"status": "error", "message": "사용자 이메일이 필요합니다."}), 400
+
+    try:
+        limit, after, fields = parse_records_query(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    response_format = records_response_format(request.args, request.headers.get('Accept', ''))
+    if response_format == 'binary' and (limit is not None or after is not None):
+        return jsonify({"status": "error", "message": BINARY_PAGINATION_MESSAGE}), 400
+
+    user_id = get_user_id_from_sheet(user_email)
+    if not user_id:
+        return jsonify({"status": "error", "message": "사용자를 찾을 수 없습니다."}), 404
+
+    # 기록이 바뀌지 않았으면 (ETag가 같으면) 본문 없이 304를 반환합니다.
+    version_info, status_code = storage.get_version(user_id)
+    if status_code != 200:
+        return jsonify(version_info), status_code
+    version = version_info['version']
+    etag = records_etag(user_id, version_info, request.query_string.decode(), response_format)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    if response_format == 'binary':
+        body, status_code = encode_records_binary(user_id, version, fields)
+        if status_code != 200:
+            return jsonify(body), status_code
+        response = Response(body, mimetype=RECORDS_BINARY_MIMETYPE)
+        response.set_etag(etag)
+        return response
+
+    # 저장소에서 기록을 하나씩 꺼내며, limit개를 넘기면 마지막으로 보낸 기록 위치를 다음 커서로 돌려줍니다.
+    result, status_code = storage.iter_records(user_id, after)
+    if status_code != 200:
+        return jsonify(result), status_code
+
+    if response_format == 'json':
+        records = []
+        next_cursor = None
+        for record, next_cursor in paginate_records(result['records'], limit, fields):
+            if record is not None:
+                records.append(record)
+        response = jsonify({"status": "success", "records": records, "next_cursor": next_cursor, "version": version})
+        response.set_etag(etag)
+        return response, 200
+
+    def generate():
+        # 첫 기록을 바로 보내 클라이언트가 전체 목록을 기다리지 않고 그리기 시작할 수 있게 합니다.
+        count = 0
+        next_cursor = None
+        for record, next_cursor in paginate_records(result['records'], limit, fields):
+            if record is not None:
+                count += 1
+                yield json.dumps(record, ensure_ascii=False) + '\n'
+        yield json.dumps({"status": "success", "count": count, "next_cursor": next_cursor, "version": version}, ensure_ascii=False) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.set_etag(etag)
+    return response
+
+# 마지막 동기화 이후 추가/변경된 기록만 불러오는 라우트
+@app.route('/records/changes', methods=['GET'])
+def get_record_changes():
+    """
+    변경 버전이 since보다 큰 기록과 새 버전을 반환합니다.
+    클라이언트는 받은 기록을 id 기준으로 덮어쓰고, 응답의 version을 다음 요청의 since로 사용합니다.
+    응답의 reset이 true이면 보관하던 기록을 버리고 받은 기록(전체)으로 바꿉니다.
     """
     user_email = request.args.get('user_email')
     if not user_email:
         return jsonify({"status": "error", "message": "사용자 이메일이 필요합니다."}), 400
+    since = request.args.get('since', 0, type=int)
+    if since < 0:
+        return jsonify({"status": "error", "message": "since는 0 이상의 정수여야 합니다."}), 400
 
     user_id = get_user_id_from_sheet(user_email)
     if not user_id:
         return jsonify({"status": "error", "message": "사용자를 찾을 수 없습니다."}), 404
 
-    # sheets.py의 함수를 호출하여 모든 기록을 가져옵니다.
-    result, status_code = get_records_from_sheet(user_id, SPREADSHEET_ID)
-    
+    result, status_code = storage.changes_since(user_id, since)
     return jsonify(result), status_code
 
+# 서버에서 계산한 은하계 레이아웃(어트랙터 위치와 구체의 안정된 위치)을 반환하는 라우트
+@app.route('/layout', methods=['GET'])
+def get_layout():
+    """
+    physics.js와 같은 힘 모델로 steps번 시뮬레이션한 구체 위치/속도와 어트랙터 위치를 반환합니다.
+    쿼리 파라미터:
+        user_email (필수), steps (기본값 LAYOUT_DEFAULT_STEPS)
+        G_FORCE_EMOTION, G_FORCE_CATEGORY, O_FORCE, R_FORCE, MAX_SPEED, DAMPING: physicsParams와 같은 이름의 값 (생략하면 기본값)
+    결과는 사용자별로 캐시하며, 기록이 추가/변경되었거나 조건이 다를 때만 다시 계산합니다.
+    """
+    user_email = request.args.get('user_email')
+    if not user_email:
+        return jsonify({"status": "error", "message": "사용자 이메일이 필요합니다."}), 400
+    try:
+        steps = request.args.get('steps', LAYOUT_DEFAULT_STEPS, type=int)
+        if not 0 <= steps <= LAYOUT_MAX_STEPS:
+            raise ValueError(f"steps는 0에서 {LAYOUT_MAX_STEPS} 사이여야 합니다.")
+        params = parse_physics_params(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    user_id = get_user_id_from_sheet(user_email)
+    if not user_id:
+        return jsonify({"status": "error", "message": "사용자를 찾을 수 없습니다."}), 404
+
+    version_info, status_code = storage.get_version(user_id)
+    if status_code != 200:
+        return jsonify(version_info), status_code
+    key = (version_info['version'], version_info['count'], steps, tuple(sorted(params.items())), LAYOUT_USE_CATEGORY)
+    layout = layout_cache.get(user_id, key)
+    cached = layout is not None
+    if layout is None:
+        result, status_code = storage.list_records(user_id)
+        if status_code != 200:
+            return jsonify(result), status_code
+        layout = compute_layout(user_id, result['records'], steps, params, LAYOUT_USE_CATEGORY)
+        layout_cache.put(user_id, key, layout)
+        logger.debug("사용자 '%s'의 레이아웃을 계산했습니다. 구체 %s개, %s초", user_id, len(layout['positions']), layout['seconds'])
+
+    return jsonify({"status": "success", "version": version_info['version'], "cached": cached, **layout})
+
+# 새 일기 구체를 놓을, 다른 구체와 겹치지 않는 위치를 추천하는 라우트
+@app.route('/next_position', methods=['POST'])
+def next_position():
+    """
+    사용자의 저장된 구체 위치로 만든 공간 해시 격자에서 MIN_DISTANCE 안에 다른 구체가 없는 위치를 골라 반환합니다.
+    반환한 위치는 잠시 예약해 두므로, 저장되기 전에 다시 요청해도 같은 자리를 주지 않습니다.
+    """
+    data = request.get_json(silent=True) or {}
+    user_email = data.get('user_email', '')
+    if not user_email.strip():
+        return jsonify({"status": "error", "message": "사용자 이메일이 비어 있습니다."}), 400
+
+    user_id = get_user_id_from_sheet(user_email)
+    if not user_id:
+        return jsonify({"status": "error", "message": "사용자를 찾을 수 없습니다."}), 404
+
+    version_info, status_code = storage.get_version(user_id)
+    if status_code != 200:
+        return jsonify(version_info), status_code
+
+    failure = []
+
+    def load_records():
+        result, list_status = storage.list_records(user_id)
+        if list_status != 200:
+            failure.append((result, list_status))
+            return None
+        return result['records']
+
+    position = spatial_index.suggest(user_id, (version_info['version'], version_info['count']), load_records)
+    if position is None:
+        return jsonify(failure[0][0]), failure[0][1]
+    return jsonify({"status": "success", "position": position})
+
+# 일기 본문 검색과 감정/카테고리/기간 필터 라우트
+@app.route('/search', methods=['GET'])
+def search_records():
+    """
+    사용자의 저장된 일기를 본문 검색어와 필터로 찾아, 구체로 이동할 수 있도록 id와 위치를 관련도 순으로 반환합니다.
+    쿼리 파라미터:
+        user_email (필수)
+        q: 검색어. 단어마다 2글자씩 나눠 찾으므로 '회사'로 '회사에서'도 찾습니다. 여러 단어이면 하나라도 들어 있는 기록을
+            찾고 드문 단어가 더 많이 들어 있는 기록을 앞에 둡니다. 생략하면 필터만 적용해 최근 기록부터 반환합니다.
+        emotion, category: 쉼표로 구분한 값 목록 (그중 하나와 같은 기록)
+        start, end: 기간 (2024, 2024-05, 2024-05-01, 2024-05-01-13:45 형식, end는 그 기간의 끝까지 포함)
+        limit: 결과 수 (기본값 SEARCH_DEFAULT_RESULTS, 최대 SEARCH_MAX_RESULTS)
+    응답: {"status", "total", "results": [{"id", "score", "timestamp", "emotion", "category", "position"}],
+        "facets": {"emotion": {값: 건수}, "category": {값: 건수}}, "version", "took_ms"}
+    패싯 건수는 자기 필터를 뺀 나머지 조건을 모두 만족하는 기록 수입니다.
+    """
+    user_email = request.args.get('user_email')
+    if not user_email:
+        return jsonify({"status": "error", "message": "사용자 이메일이 필요합니다."}), 400
+    try:
+        params = parse_search_query(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    user_id = get_user_id_from_sheet(user_email)
+    if not user_id:
+        return jsonify({"status": "error", "message": "사용자를 찾을 수 없습니다."}), 404
+
+    version_info, status_code = storage.get_version(user_id)
+    if status_code != 200:
+        return jsonify(version_info), status_code
+
+    failure = []
+
+    def load_changes(since):
+        result, changes_status = storage.changes_since(user_id, since)
+        if changes_status != 200:
+            failure.append((result, changes_status))
+            return None
+        return result['records'], result['version']
+
+    result = search_index.search(user_id, (version_info['version'], version_info['count']), load_changes, **params)
+    if result is None:
+        return jsonify(failure[0][0]), failure[0][1]
+    return jsonify({"status": "success", "version": version_info['version'], **result})
+
 # 일기 분석 및 처리 라우트
 @app.route('/analyze_diary', methods=['POST'])
 def analyze_diary():
-    """클라이언트로부터 일기 텍스트를 받아 감정/카테고리 분석 후 Google Sheets에 저장합니다."""
-    if emotion_classifier is None or summarizer is None:
-        return jsonify({"status": "error", "message": "서버 오류: AI 모델이 로드되지 않았습니다."}), 500
+    """클라이언트로부터 일기 텍스트를 받아 감정/카테고리 분석 후 저장소에 저장합니다."""
+    # 감정 분류 모델이 아직 로드 중이면 잠시 기다려 보고, 그래도 준비되지 않으면 '준비 중' 응답을 보냅니다.
+    emotion_classifier = model_loader.wait_for('emotion', MODEL_WARMUP_WAIT_SECONDS)
+    if emotion_classifier is None:
+        body, status_code, retry_after = emotion_model_unavailable()
+        response = jsonify(body)
+        if retry_after:
+            response.headers['Retry-After'] = retry_after
+        return response, status_code
 
     data = request.json
     diary_text = data.get('diary_entry', '')
     user_email = data.get('user_email', '')
     position = data.get('position') # position 데이터 가져오기
-    print(f"디버그: 클라이언트로부터 받은 일기 텍스트: '{diary_text}' 사용자: {user_email}")
+    logger.debug("클라이언트로부터 받은 일기 텍스트: '%s' 사용자: %s", diary_text, user_email)
 
-    if not diary_text.strip():
-        return jsonify({"status": "error", "message": "일기 내용이 비어 있습니다."}), 400
-    
-    if not user_email.strip():
-        return jsonify({"status": "error", "message": "사용자 이메일이 비어 있습니다."}), 400
-
-    if not position:
-        return jsonify({"status": "error", "message": "위치 데이터가 없습니다."}), 400
+    error = validate_diary_request(data)
+    if error:
+        return jsonify({"status": "error", "message": error}), 400
 
     try:
-        # Google Sheets에서 사용자 ID를 조회합니다.
+        # 저장소에서 사용자 ID를 조회합니다.
         user_id = get_user_id_from_sheet(user_email)
         if not user_id:
             return jsonify({"status": "error", "message": "User not found."}), 404
 
         # analyzer.py 파일의 분석 함수를 호출합니다.
-        analysis_result = analyze_text(diary_text, emotion_classifier, summarizer)
-        predicted_emotion = analysis_result['emotion']
-        predicted_emotion_label = analysis_result['emotion_label']
-        predicted_category = analysis_result['category']
-        timestamp = analysis_result['timestamp']
-
-        # sheets.py 파일의 데이터 저장 함수를 호출합니다. (position 인자 추가)
-        save_result = save_to_sheet(diary_text, predicted_emotion, predicted_category, timestamp, user_id, SPREADSHEET_ID, position)
-        if save_result["status"] == "error":
-            return jsonify(save_result), 500
-
-        # 최종 응답 데이터를 구성하여 클라이언트로 전송합니다.
-        response_data = {
-            "status": "success",
-            "emotion": predicted_emotion,
-            "emotion_label": predicted_emotion_label, 
-            "category": predicted_category,
-            "timestamp": timestamp,
-            "text": diary_text,
-            "position": position # 응답에 position 추가
-        }
-        return jsonify(response_data)
+        try:
+            analysis_result = analyze_text(diary_text, emotion_classifier)
+        except (QueueFullError, TimeoutError) as e:
+            # 분석 대기열이 가득 찼거나 (추론 서버의) 결과가 시간 안에 나오지 않은 경우,
+            # 서버 오류가 아니라 일시적인 과부하임을 알립니다.
+            return jsonify({"status": "error", "message": str(e)}), 503
+
+        response_data, status_code = save_analyzed_diary(user_id, diary_text, position, analysis_result)
+        return jsonify(response_data), status_code
 
     except Exception as e:
-        print(f"처리 중 오류가 발생했습니다: {e}")
+        logger.exception("처리 중 오류가 발생했습니다: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 if __name__ == '__main__':
@@ -0,0 +1,245 @@
+import logging
+import json
+from services.async_http import AsyncApp, AsyncResponse, WsgiFallback, StreamingResponse, json_response, io_executor
+from services.analyzer import analyze_text_async
+from services.inference import QueueFullError
+from services.login import validate_user_from_sheet
+from services.model_loader import READY
+from services.spatial_index import spatial_index
+from services.storage import DUPLICATE_EMAIL_MESSAGE
+from services.record_columns import RECORDS_BINARY_MIMETYPE
+from services.settings import MODEL_WARMUP_WAIT_SECONDS
+from app import (
+    app as flask_app, storage, model_loader, get_user_id_from_sheet, parse_records_query, records_response_format, records_etag,
+    paginate_records, encode_records_binary, emotion_model_unavailable, validate_diary_request, save_analyzed_diary,
+    BINARY_PAGINATION_MESSAGE, STORAGE_HEADER
+)
+
+logger = logging.getLogger(__name__)
+
+# ASGI 서버에서 실행하는 진입점입니다. 예: uvicorn asgi:app --workers 2
+# 요청이 많은 라우트(로그인/회원가입, 기록 조회, 일기 분석, 위치 추천)는 비동기로 처리해,
+# Sheets 응답이나 감정 분류 결과를 기다리는 동안 워커 스레드를 점유하지 않습니다.
+# 나머지 라우트(페이지, /stats, /layout, /imports 등)는 app.py의 Flask 앱이 그대로 처리합니다.
+
+# flask_cors의 설정과 같이 비동기 라우트의 응답에도 모든 출처를 허용하고, 저장소 이름 헤더를 붙입니다.
+app = AsyncApp(WsgiFallback(flask_app, io_executor), extra_headers={
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Expose-Headers': STORAGE_HEADER,
+    STORAGE_HEADER: storage.name,
+})
+
+run_blocking = io_executor.run
+
+
+class _StorageFailure(Exception):
+    """저장소가 오류 응답(딕셔너리, 상태 코드)을 돌려준 경우. 스레드 풀에서 읽던 반복자를 멈추고 오류를 전달합니다."""
+
+    def __init__(self, result, status_code):
+        super().__init__(result.get('message'))
+        self.result = result
+        self.status_code = status_code
+
+
+def _error(message, status_code):
+    return json_response({"status": "error", "message": message}, status_code)
+
+
+@app.route('/login', methods=('POST',))
+async def login(request):
+    data = await request.json()
+    if data is None:
+        return _error("JSON 형식의 요청 본문이 필요합니다.", 400)
+    email = data.get('email')
+    password = data.get('password')
+    if not email or not password:
+        return _error("이메일과 비밀번호를 모두 입력해주세요.", 400)
+
+    is_authenticated, message = await run_blocking(validate_user_from_sheet, email, password)
+    if is_authenticated:
+        return json_response({"status": "success", "message": message}, 200)
+    return _error(message, 401)
+
+
+@app.route('/register', methods=('POST',))
+async def register(request):
+    data = await request.json()
+    if data is None:
+        return _error("JSON 형식의 요청 본문이 필요합니다.", 400)
+    email = data.get('email')
+    password = data.get('password')
+    if not email or not password:
+        return _error("이메일과 비밀번호를 모두 입력해주세요.", 400)
+
+    success, message = await run_blocking(storage.create_user, email, password)
+    if success:
+        return json_response({"status": "success", "message": message}, 201)
+    return _error(message, 409 if message == DUPLICATE_EMAIL_MESSAGE else 500)
+
+
+@app.route('/get_all_records')
+async def get_all_records(request):
+    """app.py의 get_all_records와 같은 파라미터와 응답 형식 (ETag/304, 커서, 필드 선택, ndjson 스트리밍, 바이너리)."""
+    user_email = request.args.get('user_email')
+    if not user_email:
+        return _error("사용자 이메일이 필요합니다.", 400)
+    try:
+        limit, after, fields = parse_records_query(request.args)
+    except ValueError as e:
+        return _error(str(e), 400)
+    response_format = records_response_format(request.args, request.headers.get('accept', ''))
+    if response_format == 'binary' and (limit is not None or after is not None):
+        return _error(BINARY_PAGINATION_MESSAGE, 400)
+
+    user_id = await run_blocking(get_user_id_from_sheet, user_email)
+    if not user_id:
+        return _error("사용자를 찾을 수 없습니다.", 404)
+
+    version_info, status_code = await run_blocking(storage.get_version, user_id)
+    if status_code != 200:
+        return json_response(version_info, status_code)
+    version = version_info['version']
+    etag = records_etag(user_id, version_info, request.query_string, response_format)
+    headers = {'ETag': f'"{etag}"'}
+    if request.if_none_match.contains(etag):
+        return AsyncResponse(b'', 304, headers, content_type=None)
+
+    if response_format == 'binary':
+        body, status_code = await run_blocking(encode_records_binary, user_id, version, fields)
+        if status_code != 200:
+            return json_response(body, status_code)
+        return AsyncResponse(body, 200, headers, content_type=RECORDS_BINARY_MIMETYPE)
+
+    def read_pages():
+        # 저장소 반복자를 만든 스레드에서 닫아야 하므로, 다 읽지 않고 멈춰도 여기서 닫습니다.
+        result, status_code = storage.iter_records(user_id, after)
+        if status_code != 200:
+            raise _StorageFailure(result, status_code)
+        source = result['records']
+        try:
+            yield from paginate_records(source, limit, fields)
+        finally:
+            close = getattr(source, 'close', None)
+            if close is not None:
+                close()
+
+    # 첫 묶음을 읽어 본 뒤에 응답을 시작하므로, 저장소 오류는 스트리밍 응답이라도 오류 상태 코드로 돌려줍니다.
+    chunks = io_executor.iterate(read_pages)
+    try:
+        first = await anext(chunks, [])
+    except _StorageFailure as e:
+        return json_response(e.result, e.status_code)
+
+    async def pages():
+        for item in first:
+            yield item
+        async for chunk in chunks:
+            for item in chunk:
+                yield item
+
+    if response_format == 'json':
+        records = []
+        next_cursor = None
+        async for record, next_cursor in pages():
+            if record is not None:
+                records.append(record)
+        return json_response({"status": "success", "records": records, "next_cursor": next_cursor, "version": version}, 200, headers)
+
+    async def generate():
+        count = 0
+        next_cursor = None
+        async for record, next_cursor in pages():
+            if record is not None:
+                count += 1
+                yield json.dumps(record, ensure_ascii=False) + '\n'
+        yield json.dumps({"status": "success", "count": count, "next_cursor": next_cursor, "version": version}, ensure_ascii=False) + '\n'
+
+    return StreamingResponse(generate(), headers=headers)
+
+
+@app.route('/records/changes')
+async def get_record_changes(request):
+    user_email = request.args.get('user_email')
+    if not user_email:
+        return _error("사용자 이메일이 필요합니다.", 400)
+    since = request.args.get('since', 0, type=int)
+    if since < 0:
+        return _error("since는 0 이상의 정수여야 합니다.", 400)
+
+    user_id = await run_blocking(get_user_id_from_sheet, user_email)
+    if not user_id:
+        return _error("사용자를 찾을 수 없습니다.", 404)
+
+    result, status_code = await run_blocking(storage.changes_since, user_id, since)
+    return json_response(result, status_code)
+
+
+@app.route('/next_position', methods=('POST',))
+async def next_position(request):
+    data = await request.json() or {}
+    user_email = data.get('user_email', '')
+    if not user_email.strip():
+        return _error("사용자 이메일이 비어 있습니다.", 400)
+
+    user_id = await run_blocking(get_user_id_from_sheet, user_email)
+    if not user_id:
+        return _error("사용자를 찾을 수 없습니다.", 404)
+
+    version_info, status_code = await run_blocking(storage.get_version, user_id)
+    if status_code != 200:
+        return json_response(version_info, status_code)
+
+    failure = []
+
+    def load_records():
+        result, list_status = storage.list_records(user_id)
+        if list_status != 200:
+            failure.append((result, list_status))
+            return None
+        return result['records']
+
+    # 격자가 캐시되어 있으면 load_records를 부르지 않으므로 대부분 바로 끝나지만, 격자를 새로 만들 때는 저장소를 읽습니다.
+    position = await run_blocking(spatial_index.suggest, user_id, (version_info['version'], version_info['count']), load_records)
+    if position is None:
+        return json_response(failure[0][0], failure[0][1])
+    return json_response({"status": "success", "position": position})
+
+
+@app.route('/analyze_diary', methods=('POST',))
+async def analyze_diary(request):
+    """
+    app.py의 analyze_diary와 같은 요청/응답 형식.
+    감정 분류는 배치 스케줄러의 결과를 await로 기다리고, 사용자 조회와 저장만 스레드 풀에서 실행합니다.
+    """
+    emotion_classifier = model_loader.get('emotion')
+    if emotion_classifier is None and model_loader.state('emotion') != READY:
+        # 모델이 로드 중일 때만 잠시 기다립니다 (서버 시작 직후).
+        emotion_classifier = await run_blocking(model_loader.wait_for, 'emotion', MODEL_WARMUP_WAIT_SECONDS)
+    if emotion_classifier is None:
+        body, status_code, retry_after = emotion_model_unavailable()
+        return json_response(body, status_code, {'Retry-After': retry_after} if retry_after else None)
+
+    data = await request.json()
+    if data is None:
+        return _error("JSON 형식의 요청 본문이 필요합니다.", 400)
+    error = validate_diary_request(data)
+    if error:
+        return _error(error, 400)
+    diary_text = data['diary_entry']
+    position = data['position']
+    logger.debug("클라이언트로부터 받은 일기 텍스트: '%s' 사용자: %s", diary_text, data['user_email'])
+
+    try:
+        user_id = await run_blocking(get_user_id_from_sheet, data['user_email'])
+        if not user_id:
+            return _error("User not found.", 404)
+        try:
+            analysis_result = await analyze_text_async(diary_text, emotion_classifier)
+        except (QueueFullError, TimeoutError) as e:
+            return _error(str(e), 503)
+        response_data, status_code = await run_blocking(save_analyzed_diary, user_id, diary_text, position, analysis_result)
+        return json_response(response_data, status_code)
+
+    except Exception as e:
+        logger.exception("처리 중 오류가 발생했습니다: %s", e)
+        return _error(str(e), 500)
@@ -0,0 +1,140 @@
+"""
+동기(Flask, WSGI 스레드) 경로와 비동기(asgi.py, ASGI) 경로의 동시 접속 처리 성능을 비교합니다.
+
+사용법 (프로젝트 최상위 폴더에서, uvicorn 필요):
+    python -m bench.async_vs_sync --clients 50 200 1000 --io-ms 80 --output bench/results/async_vs_sync.json
+
+서버마다 별도 프로세스에서 SQLite 저장소에 사용자 1명과 기록 --records개를 만들고,
+저장소의 get_version/iter_records 호출마다 --io-ms만큼 기다리게 해 Google Sheets 왕복 시간을 흉내 냅니다.
+  - sync: app.py의 Flask 앱을 스레드 --sync-threads개짜리 WSGI 서버로 실행합니다 (gunicorn gthread와 같은 구조).
+  - async: asgi.py를 uvicorn 워커 하나로 실행합니다. 블로킹 호출은 ASYNC_IO_WORKERS(--io-workers)개 스레드에서 실행됩니다.
+동시 접속 수마다 클라이언트들이 --seconds초 동안 같은 요청을 반복하고 초당 처리량, 지연 시간 p50/p99, 실패 수를 측정합니다.
+  - --endpoint records: GET /get_all_records?limit=50 (저장소 읽기 2번)
+  - --endpoint analyze: POST /analyze_diary. 감정 분류 모델 대신 배치 하나에 --infer-ms가 걸리는 가짜 모델을 사용하며,
+    해시태그가 있는 일기를 보내 요약은 만들지 않습니다. 분석 캐시는 끕니다.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.http_load import raise_file_limit, run_load, serve_asgi, serve_wsgi, wait_until_up
+
+USER_EMAIL = 'bench@example.com'
+
+
+# --- 서버 프로세스 ---
+
+def _prepare_storage(records, io_ms):
+    from services.storage import get_storage
+    storage = get_storage()
+    storage.create_user(USER_EMAIL, 'bench')
+    user_id = storage.get_user_id(USER_EMAIL)
+    storage.append_records(user_id, [
+        {"text": f"기록 {i}", "emotion": "기쁨", "category": "일상", "timestamp": "2024-01-01-12:00",
+         "position": {"x": i * 0.1, "y": 0.0, "z": 0.0}}
+        for i in range(records)
+    ])
+
+    def delayed(method):
+        def call(*args, **kwargs):
+            time.sleep(io_ms / 1000.0)
+            return method(*args, **kwargs)
+        return call
+
+    for name in ('get_version', 'iter_records'):
+        setattr(storage, name, delayed(getattr(storage, name)))
+
+
+def _serve(mode, port, records, io_ms, sync_threads, infer_ms):
+    raise_file_limit()
+    from bench.fakes import ensure_config, install_stub_models
+    ensure_config()
+    # 입력 수와 관계없이 배치 한 번에 infer_ms가 걸리는 감정 분류 모델 (배치 스케줄러가 요청을 묶는 효과를 그대로 보여 줍니다)
+    install_stub_models(emotion_batch_ms=infer_ms)
+    if mode == 'sync':
+        from app import app
+        _prepare_storage(records, io_ms)
+        serve_wsgi(app, port, sync_threads)
+    else:
+        from asgi import app
+        _prepare_storage(records, io_ms)
+        serve_asgi(app, port)
+
+
+# --- 클라이언트 ---
+
+def _next_request(endpoint, counter):
+    if endpoint == 'records':
+        return 'GET', f'/get_all_records?user_email={USER_EMAIL}&limit=50', None
+    body = {"diary_entry": f"#일상 벤치마크 일기 {counter}", "user_email": USER_EMAIL, "position": {"x": 0, "y": 0, "z": 0}}
+    return 'POST', '/analyze_diary', body
+
+
+def _measure(mode, args, port):
+    env = dict(os.environ, STORAGE_BACKEND='sqlite', SQLITE_PATH=os.path.join(args.workdir, f'{mode}.db'),
+               ANALYSIS_CACHE_ENABLED='0')
+    if args.io_workers:
+        env['ASYNC_IO_WORKERS'] = str(args.io_workers)
+    command = [sys.executable, '-m', 'bench.async_vs_sync', '--serve', mode, '--port', str(port),
+               '--records', str(args.records), '--io-ms', str(args.io_ms), '--sync-threads', str(args.sync_threads),
+               '--infer-ms', str(args.infer_ms)]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_up(port, process)
+        results = []
+        for clients in args.clients:
+            result = asyncio.run(run_load(port, functools.partial(_next_request, args.endpoint), clients, args.seconds, args.timeout))
+            result["mode"] = mode
+            print(f"{mode:>5} clients={clients:<5} rps={result['rps']:<8} p50={result['p50_ms']}ms "
+                  f"p99={result['p99_ms']}ms failures={result['failures']}", flush=True)
+            results.append(result)
+        return results
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, nargs='+', default=[50, 200, 1000], help='동시 접속 수 목록')
+    parser.add_argument('--endpoint', choices=['records', 'analyze'], default='records', help='측정할 요청')
+    parser.add_argument('--modes', nargs='+', choices=['sync', 'async'], default=['sync', 'async'])
+    parser.add_argument('--seconds', type=float, default=10.0, help='동시 접속 수마다 요청을 보내는 시간 (초)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='요청 하나의 제한 시간 (초). 넘으면 실패로 셉니다.')
+    parser.add_argument('--records', type=int, default=200, help='사용자 기록 수')
+    parser.add_argument('--io-ms', type=float, default=80.0, help='저장소 호출 하나의 가짜 네트워크 지연 (밀리초)')
+    parser.add_argument('--infer-ms', type=float, default=50.0, help='가짜 감정 분류 모델의 배치 하나 처리 시간 (밀리초)')
+    parser.add_argument('--sync-threads', type=int, default=8, help='동기 서버의 요청 처리 스레드 수')
+    parser.add_argument('--io-workers', type=int, help='비동기 서버의 ASYNC_IO_WORKERS (생략하면 설정값)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    parser.add_argument('--serve', choices=['sync', 'async'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        _serve(args.serve, args.port, args.records, args.io_ms, args.sync_threads, args.infer_ms)
+        return
+
+    raise_file_limit()
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        args.workdir = workdir
+        for offset, mode in enumerate(args.modes):
+            results.extend(_measure(mode, args, args.port + offset))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"endpoint": args.endpoint, "io_ms": args.io_ms, "infer_ms": args.infer_ms, "sync_threads": args.sync_threads, "io_workers": args.io_workers, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+감정 분류 추론 백엔드(pipeline / quantized / onnx)의 처리량, 지연 시간, 메모리, fp32 레이블 일치율을 비교합니다.
+
+사용법 (프로젝트 최상위 폴더에서):
+    python -m bench.compare_emotion_backends --backends pipeline quantized onnx --threads 4 --output bench/results/backends.json
+
+백엔드마다 별도 프로세스에서 측정하므로 서로의 메모리 사용량이 섞이지 않습니다.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from queue import Empty
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.fakes import ensure_config
+
+# 모델만 로드하므로 config.py(시트 자격 증명)가 없어도 실행할 수 있게 합니다. 측정 프로세스에서도 이 모듈을 다시 가져오며 적용됩니다.
+ensure_config()
+
+
+def _rss_mb():
+    # 리눅스의 /proc/self/status에서 현재 상주 메모리(VmRSS)를 읽습니다.
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(1, math.ceil(p / 100.0 * len(ordered))) - 1]
+
+
+def _measure(backend, threads, texts, batch_sizes, repeats, queue):
+    os.environ['EMOTION_BACKEND'] = backend
+    os.environ['INFERENCE_NUM_THREADS'] = str(threads)
+    os.environ['EMOTION_BACKEND_VALIDATE'] = '0'
+    from services import analyzer
+
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    classifier = analyzer.build_emotion_backend(backend)
+    load_seconds = time.perf_counter() - started
+    rss_after = _rss_mb()
+
+    # 첫 호출의 초기화 비용을 제외합니다.
+    analyzer._classify_batch(classifier, texts[:1])
+
+    single = []
+    for _ in range(repeats):
+        for text in texts:
+            t = time.perf_counter()
+            analyzer._classify_batch(classifier, [text])
+            single.append((time.perf_counter() - t) * 1000.0)
+
+    throughput = {}
+    for batch_size in batch_sizes:
+        t = time.perf_counter()
+        count = 0
+        for _ in range(repeats):
+            for start in range(0, len(texts), batch_size):
+                batch = texts[start:start + batch_size]
+                analyzer._classify_batch(classifier, batch)
+                count += len(batch)
+        throughput[str(batch_size)] = round(count / (time.perf_counter() - t), 1)
+
+    labels = [result['label'] for result in analyzer._classify_batch(classifier, texts)]
+    queue.put({
+        "backend": backend,
+        "threads": threads,
+        "load_seconds": round(load_seconds, 2),
+        "rss_mb": round(rss_after, 1) if rss_after else None,
+        "model_rss_mb": round(rss_after - rss_before, 1) if rss_after and rss_before else None,
+        "latency_ms": {
+            "p50": round(statistics.median(single), 2),
+            "p99": round(_percentile(single, 99), 2),
+        },
+        "throughput_per_sec": throughput,
+        "labels": labels,
+    })
+
+
+def _wait_result(process, queue):
+    # 측정 프로세스가 결과를 보내지 못하고 종료되면 None을 반환합니다 (기다리기만 하면 멈춥니다).
+    while True:
+        try:
+            return queue.get(timeout=1.0)
+        except Empty:
+            if not process.is_alive():
+                break
+    # 종료 직전에 보낸 결과가 남아 있을 수 있으므로 한 번 더 확인합니다.
+    try:
+        return queue.get(timeout=1.0)
+    except Empty:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=['pipeline', 'quantized', 'onnx'])
+    parser.add_argument('--threads', type=int, default=0, help='intra-op 스레드 수 (0이면 라이브러리 기본값)')
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8, 16])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--reference', help='기준 문장 파일 (한 줄에 한 문장)')
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    from services.analyzer import REFERENCE_TEXTS
+    texts = REFERENCE_TEXTS
+    if args.reference:
+        with open(args.reference, encoding='utf-8') as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    context = multiprocessing.get_context('spawn')
+    results = []
+    failed = []
+    for backend in args.backends:
+        queue = context.Queue()
+        process = context.Process(target=_measure, args=(backend, args.threads, texts, args.batch_sizes, args.repeats, queue))
+        process.start()
+        result = _wait_result(process, queue)
+        process.join()
+        if result is None:
+            # 모델을 로드하지 못했거나 측정 중 프로세스가 종료되었습니다 (오류는 측정 프로세스가 출력합니다).
+            print(f"'{backend}' 백엔드를 측정하지 못했습니다 (종료 코드 {process.exitcode}).", file=sys.stderr)
+            failed.append(backend)
+            continue
+        results.append(result)
+
+    # fp32 파이프라인 결과를 기준으로 레이블 일치율을 계산합니다.
+    baseline = next((r['labels'] for r in results if r['backend'] == 'pipeline'), None)
+    for result in results:
+        if baseline:
+            same = sum(1 for a, b in zip(result['labels'], baseline) if a == b)
+            result['fp32_agreement'] = round(same / len(texts), 3)
+        del result['labels']
+
+    header = "| backend | load (s) | RSS (MB) | p50 (ms) | p99 (ms) | " + " | ".join(f"batch {b} (/s)" for b in args.batch_sizes) + " | fp32 agreement |"
+    print(header)
+    print("|" + "---|" * (header.count('|') - 1))
+    for r in results:
+        throughput = " | ".join(str(r['throughput_per_sec'][str(b)]) for b in args.batch_sizes)
+        print(f"| {r['backend']} | {r['load_seconds']} | {r['rss_mb']} | {r['latency_ms']['p50']} | {r['latency_ms']['p99']} | {throughput} | {r.get('fp32_agreement')} |")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"threads": args.threads, "texts": len(texts), "results": results, "failed": failed}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
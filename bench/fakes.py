@@ -0,0 +1,303 @@
+"""
+Google Sheets API와 허깅페이스 모델 없이 서버를 실행하기 위한 로컬 대체물입니다. (bench/load_test.py 등에서 사용)
+
+  - FakeSheetsService: googleapiclient의 Sheets 서비스 객체 중 이 앱이 쓰는 부분
+    (spreadsheets().get, spreadsheets().batchUpdate, spreadsheets().values().get/append/update)을 메모리에서 흉내 냅니다.
+    execute()마다 설정한 만큼 기다려 네트워크 왕복 시간을 재현하고, 없는 시트를 읽으면 실제 API와 같은 400 오류를 냅니다.
+  - StubEmotionModel, StubSummarizer: transformers 파이프라인과 같은 방식으로 호출되고, 정해진 시간만큼 기다린 뒤 결과를 돌려줍니다.
+
+서비스 모듈을 import하기 전에 ensure_config()를 호출하고, 앱을 import하기 전에 install_fake_sheets()와 install_stub_models()를 호출합니다.
+"""
+import random
+import re
+import sys
+import threading
+import time
+import types
+import zlib
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+USERS_HEADER = ['email', 'password', 'user_id']
+DIARY_HEADER = ['Timestamp', 'Emotion', 'Category', 'Text']
+EMOTION_LABELS = ('happy', 'sad', 'anxious', 'embarrassed', 'angry', 'heartache', 'surprise', 'neutral')
+CATEGORIES = ('업무', '학업', '관계', '건강', '여행', '일상', '음식', '기타')
+
+_RANGE = re.compile(r'^(?P<sheet>[^!]+)!(?P<start_col>[A-Z]+)(?P<start_row>\d*):(?P<end_col>[A-Z]+)(?P<end_row>\d*)$')
+
+
+def ensure_config():
+    """config.py가 없으면(자격 증명이 없는 개발 환경) 가짜 서비스에 필요한 값만 담은 config 모듈을 대신 등록합니다."""
+    try:
+        import config  # noqa: F401
+    except ImportError:
+        config = types.ModuleType('config')
+        config.DIARY_SPREADSHEET_ID = 'bench-spreadsheet'
+        sys.modules['config'] = config
+
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def _http_error(status, message):
+    return HttpError(httplib2.Response({'status': status}), message.encode('utf-8'))
+
+
+class _FakeRequest:
+    """HttpRequest처럼 execute()를 호출해야 실행되는 요청. 기다리는 동안에는 잠금을 잡지 않습니다."""
+
+    def __init__(self, service, op, delay, apply):
+        self.service = service
+        self.op = op
+        self.delay = delay
+        self.apply = apply
+
+    def execute(self, http=None, num_retries=0):
+        if self.delay > 0:
+            time.sleep(self.delay)
+        with self.service._lock:
+            self.service.calls[self.op] = self.service.calls.get(self.op, 0) + 1
+            return self.apply()
+
+
+class _Values:
+    def __init__(self, service):
+        self._service = service
+
+    def get(self, spreadsheetId=None, range=None, **kwargs):
+        return self._service._values_get(range)
+
+    def append(self, spreadsheetId=None, range=None, body=None, **kwargs):
+        return self._service._values_append(range, body['values'])
+
+    def update(self, spreadsheetId=None, range=None, body=None, **kwargs):
+        return self._service._values_update(range, body['values'])
+
+
+class _Spreadsheets:
+    def __init__(self, service):
+        self._service = service
+
+    def values(self):
+        return _Values(self._service)
+
+    def get(self, spreadsheetId=None, fields=None, **kwargs):
+        return self._service._spreadsheet_get()
+
+    def batchUpdate(self, spreadsheetId=None, body=None, **kwargs):
+        return self._service._batch_update(body['requests'])
+
+
+class FakeSheetsService:
+    """
+    스프레드시트 하나를 메모리에 두는 가짜 Sheets 서비스입니다.
+    Args:
+        read_ms (float): 읽기 요청(values.get, spreadsheets.get) 하나의 지연 시간 (밀리초).
+        write_ms (float): 쓰기 요청(values.append/update, batchUpdate) 하나의 지연 시간 (밀리초).
+        row_us (float): 읽기 응답의 행 하나마다 더하는 시간 (마이크로초). 큰 시트를 내려받는 시간을 흉내 냅니다.
+    """
+
+    def __init__(self, read_ms=0.0, write_ms=0.0, row_us=0.0):
+        self.read_delay = read_ms / 1000.0
+        self.write_delay = write_ms / 1000.0
+        self.row_delay = row_us / 1000000.0
+        self._lock = threading.Lock()
+        self._sheets = {}
+        self._sheet_ids = {}
+        self.calls = {}
+        self.add_sheet('users', rows=[list(USERS_HEADER)])
+
+    def spreadsheets(self):
+        return _Spreadsheets(self)
+
+    # --- 데이터 준비 (지연 없음) ---
+
+    def add_sheet(self, title, sheet_id=None, rows=None):
+        with self._lock:
+            if sheet_id is None:
+                sheet_id = len(self._sheet_ids) + 1
+            self._sheets[title] = rows if rows is not None else []
+            self._sheet_ids[title] = sheet_id
+
+    def add_user(self, email, password, user_id, records=0, rng=None):
+        """사용자 행과 일기 시트를 만들고 기록 records개를 채웁니다."""
+        self.add_sheet(user_id, rows=[list(DIARY_HEADER)] + list(generate_rows(records, rng)))
+        with self._lock:
+            self._sheets['users'].append([email, password, user_id])
+
+    def row_count(self, title):
+        with self._lock:
+            return len(self._sheets.get(title, []))
+
+    # --- API ---
+
+    def _parse(self, range_name):
+        match = _RANGE.match(range_name)
+        if match is None or match.group('sheet') not in self._sheets:
+            raise _http_error(400, f'Unable to parse range: {range_name}')
+        start_row = int(match.group('start_row')) if match.group('start_row') else 1
+        end_row = int(match.group('end_row')) if match.group('end_row') else None
+        return (match.group('sheet'), _column_index(match.group('start_col')), _column_index(match.group('end_col')) + 1,
+                start_row, end_row)
+
+    def _values_get(self, range_name):
+        def apply():
+            title, first_col, last_col, start_row, end_row = self._parse(range_name)
+            rows = self._sheets[title][start_row - 1:end_row]
+            values = []
+            for row in rows:
+                cells = ['' if value is None else str(value) for value in row[first_col:last_col]]
+                while cells and cells[-1] == '':
+                    cells.pop()
+                values.append(cells)
+            while values and not values[-1]:
+                values.pop()
+            result = {'range': range_name, 'majorDimension': 'ROWS'}
+            if values:
+                result['values'] = values
+            return result
+
+        # 응답 크기에 비례하는 전송 시간도 잠금 밖에서 기다립니다.
+        delay = self.read_delay + self.row_delay * self.row_count(range_name.split('!', 1)[0])
+        return _FakeRequest(self, 'values.get', delay, apply)
+
+    def _values_append(self, range_name, new_rows):
+        def apply():
+            title, first_col, _, _, _ = self._parse(range_name)
+            rows = self._sheets[title]
+            start = len(rows) + 1
+            rows.extend([''] * first_col + list(row) for row in new_rows)
+            width = max((len(row) for row in new_rows), default=0)
+            end_col = chr(ord('A') + first_col + max(width, 1) - 1)
+            return {
+                'spreadsheetId': 'fake',
+                'updates': {
+                    'updatedRange': f'{title}!A{start}:{end_col}{len(rows)}',
+                    'updatedRows': len(new_rows),
+                    'updatedCells': sum(len(row) for row in new_rows),
+                },
+            }
+        return _FakeRequest(self, 'values.append', self.write_delay, apply)
+
+    def _values_update(self, range_name, new_values):
+        def apply():
+            title, first_col, _, start_row, _ = self._parse(range_name)
+            rows = self._sheets[title]
+            for offset, values in enumerate(new_values):
+                index = start_row - 1 + offset
+                while len(rows) <= index:
+                    rows.append([])
+                row = rows[index]
+                if len(row) < first_col + len(values):
+                    row.extend([''] * (first_col + len(values) - len(row)))
+                row[first_col:first_col + len(values)] = values
+            return {'updatedRange': range_name, 'updatedCells': sum(len(values) for values in new_values)}
+        return _FakeRequest(self, 'values.update', self.write_delay, apply)
+
+    def _spreadsheet_get(self):
+        def apply():
+            return {'sheets': [
+                {'properties': {'sheetId': sheet_id, 'title': title}} for title, sheet_id in self._sheet_ids.items()
+            ]}
+        return _FakeRequest(self, 'spreadsheets.get', self.read_delay, apply)
+
+    def _batch_update(self, requests):
+        def apply():
+            # 실제 API처럼 요청 전체를 검사한 뒤 한꺼번에 적용합니다 (하나라도 잘못되면 아무것도 바꾸지 않습니다).
+            titles = {sheet_id: title for title, sheet_id in self._sheet_ids.items()}
+            added = {}
+            for request in requests:
+                if 'addSheet' in request:
+                    properties = request['addSheet']['properties']
+                    if properties['title'] in self._sheets or properties['title'] in added:
+                        raise _http_error(400, f"A sheet with the name \"{properties['title']}\" already exists.")
+                    added[properties['title']] = properties.get('sheetId', max(list(titles) + list(added.values())) + 1)
+                elif 'appendCells' in request:
+                    sheet_id = request['appendCells']['sheetId']
+                    if sheet_id not in titles and sheet_id not in added.values():
+                        raise _http_error(400, f"No grid with id: {sheet_id}")
+                else:
+                    raise _http_error(400, f'Unsupported request: {sorted(request)}')
+            replies = []
+            for request in requests:
+                if 'addSheet' in request:
+                    title = request['addSheet']['properties']['title']
+                    sheet_id = added[title]
+                    self._sheets[title] = []
+                    self._sheet_ids[title] = sheet_id
+                    titles[sheet_id] = title
+                    replies.append({'addSheet': {'properties': {'sheetId': sheet_id, 'title': title}}})
+                else:
+                    rows = self._sheets[titles[request['appendCells']['sheetId']]]
+                    for row in request['appendCells']['rows']:
+                        rows.append([cell['userEnteredValue'].get('stringValue', '') for cell in row['values']])
+                    replies.append({})
+            return {'spreadsheetId': 'fake', 'replies': replies}
+        return _FakeRequest(self, 'spreadsheets.batchUpdate', self.write_delay, apply)
+
+
+def generate_rows(count, rng=None):
+    """일기 시트 형식(A:I)의 기록 행 count개를 만듭니다. 위치는 겹치지 않도록 넓게 흩어 놓습니다."""
+    rng = rng or random.Random(0)
+    spread = max(10.0, count ** (1.0 / 3.0) * 1.5)
+    for i in range(count):
+        yield [
+            f'2024-{1 + i % 12:02d}-{1 + i % 28:02d}-{i % 24:02d}:{i % 60:02d}',
+            rng.choice(('기쁨', '슬픔', '불안', '당황', '분노', '상처', '놀람', '중립')),
+            rng.choice(CATEGORIES),
+            f'벤치마크 기록 {i}번째. 오늘은 {rng.choice(("회사", "학교", "카페", "여행지"))}에서 하루를 보냈다.',
+            round(rng.uniform(-spread, spread), 3),
+            round(rng.uniform(-spread, spread), 3),
+            round(rng.uniform(-spread, spread), 3),
+            '',
+            i + 1,
+        ]
+
+
+class StubEmotionModel:
+    """
+    텍스트 분류 파이프라인처럼 호출되는 가짜 감정 분류 모델입니다.
+    배치 하나에 batch_ms + 문장 수 × item_ms가 걸리며, 레이블은 문장 내용으로 정해지므로 같은 문장은 항상 같은 결과가 나옵니다.
+    """
+
+    def __init__(self, batch_ms=0.0, item_ms=0.0):
+        self.batch_ms = batch_ms
+        self.item_ms = item_ms
+
+    def __call__(self, inputs, batch_size=None, truncation=True, **kwargs):
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        time.sleep((self.batch_ms + self.item_ms * len(texts)) / 1000.0)
+        return [
+            {"label": EMOTION_LABELS[zlib.crc32(text.encode('utf-8')) % len(EMOTION_LABELS)], "score": 1.0}
+            for text in texts
+        ]
+
+
+class StubSummarizer:
+    """요약 파이프라인처럼 호출되는 가짜 요약 모델. summary_ms만큼 기다린 뒤 앞부분을 잘라 돌려줍니다."""
+
+    def __init__(self, summary_ms=0.0):
+        self.summary_ms = summary_ms
+
+    def __call__(self, text, **kwargs):
+        time.sleep(self.summary_ms / 1000.0)
+        return [{"summary_text": text[:20]}]
+
+
+def install_fake_sheets(service):
+    """이 프로세스의 모든 Sheets 호출이 service를 사용하게 합니다."""
+    from services.sheets_client import use_sheets_service
+    use_sheets_service(service)
+    return service
+
+
+def install_stub_models(emotion_batch_ms=0.0, emotion_item_ms=0.0, summary_ms=0.0):
+    """모델 로더가 실제 모델 대신 가짜 모델을 로드하게 합니다. app.py를 import하기 전에 호출해야 합니다."""
+    from services.model_loader import model_loader
+    model_loader.register('emotion', 'bench-stub', lambda: StubEmotionModel(emotion_batch_ms, emotion_item_ms))
+    model_loader.register('summarizer', 'bench-stub', lambda: StubSummarizer(summary_ms))
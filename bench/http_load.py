@@ -0,0 +1,147 @@
+"""
+벤치마크 스크립트들이 함께 쓰는 HTTP 부하 생성기와 서버 실행 도구입니다.
+(bench/async_vs_sync.py, bench/load_test.py에서 사용)
+"""
+import asyncio
+import json
+import math
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(samples, p):
+    """최근접 순위 방식의 p 백분위수. samples가 비어 있으면 None을 반환합니다."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(1, math.ceil(p / 100.0 * len(ordered))) - 1]
+
+
+def raise_file_limit():
+    # 동시 접속 수만큼 소켓을 열 수 있도록 파일 디스크립터 한도를 최대로 올립니다.
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+# --- 서버 ---
+
+def serve_wsgi(wsgi_app, port, threads):
+    """
+    WSGI 앱을 스레드 threads개짜리 서버로 실행합니다 (gunicorn gthread와 같은 구조). 반환하지 않습니다.
+    연결 하나를 스레드 하나가 끝까지 처리하며, 스레드가 모두 바쁘면 새 연결은 listen 대기열에서 기다립니다.
+    """
+    from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    class PooledWSGIServer(BaseWSGIServer):
+        request_queue_size = 4096
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._process, request, client_address)
+
+        def _process(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    PooledWSGIServer('127.0.0.1', port, wsgi_app, handler=QuietHandler).serve_forever()
+
+
+def serve_asgi(asgi_app, port):
+    """ASGI 앱을 uvicorn 워커 하나로 실행합니다 (uvicorn 필요). 반환하지 않습니다."""
+    import uvicorn
+    uvicorn.run(asgi_app, host='127.0.0.1', port=port, log_level='warning', backlog=4096)
+
+
+# --- 클라이언트 ---
+
+async def request(port, method, path, body=None):
+    """요청 하나를 보내고 응답 본문을 끝까지 읽은 뒤 (상태 코드, 본문 바이트 수)를 반환합니다."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else b''
+        head = f'{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\nContent-Length: {len(payload)}\r\n'
+        if body is not None:
+            head += 'Content-Type: application/json\r\n'
+        writer.write(head.encode('latin-1') + b'\r\n' + payload)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    header_end = response.find(b'\r\n\r\n')
+    return int(response.split(b' ', 2)[1]), len(response) - header_end - 4
+
+
+async def run_load(port, next_request, clients, seconds, timeout):
+    """
+    clients개의 클라이언트가 seconds초 동안 요청을 반복해 보냅니다. 2xx가 아닌 응답과 시간 초과는 실패로 셉니다.
+    Args:
+        next_request (callable): next_request(번호) -> (메서드, 경로, JSON 본문 또는 None).
+    Returns:
+        dict: 요청 수, 실패 수, 초당 처리량, 지연 시간 p50/p95/p99(밀리초), 평균 응답 크기(바이트).
+    """
+    counter = 0
+    latencies = []
+    sizes = []
+    failures = 0
+    deadline = time.monotonic() + seconds
+
+    async def client():
+        nonlocal failures, counter
+        while time.monotonic() < deadline:
+            counter += 1
+            method, path, body = next_request(counter)
+            started = time.perf_counter()
+            try:
+                status, size = await asyncio.wait_for(request(port, method, path, body), timeout)
+                if not 200 <= status < 300:
+                    raise RuntimeError(status)
+                latencies.append(time.perf_counter() - started)
+                sizes.append(size)
+            except Exception:
+                failures += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.monotonic() - started
+
+    def ms(p):
+        value = percentile(latencies, p)
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "failures": failures,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": ms(50),
+        "p95_ms": ms(95),
+        "p99_ms": ms(99),
+        "avg_bytes": round(sum(sizes) / len(sizes)) if sizes else None,
+    }
+
+
+def wait_until_up(port, process, timeout=60, path='/readyz'):
+    """서버 프로세스가 path에 200으로 응답할 때까지 기다립니다."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("서버 프로세스가 시작하지 못했습니다.")
+        try:
+            if asyncio.run(request(port, 'GET', path))[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("서버가 제한 시간 안에 준비되지 않았습니다.")
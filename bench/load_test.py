@@ -0,0 +1,269 @@
+"""
+Google Sheets와 허깅페이스 모델 없이 실행하는 재현 가능한 부하 테스트입니다.
+
+사용법 (프로젝트 최상위 폴더에서):
+    python -m bench.load_test --records 10 1000 100000 --concurrency 1 16 64 --output bench/results/load_test.json
+    python -m bench.load_test --baseline bench/results/before.json --output bench/results/after.json
+    python -m bench.load_test --compare bench/results/before.json bench/results/after.json
+
+기록 수(--records)마다 서버 프로세스를 새로 띄웁니다. 서버는 bench/fakes.py의 가짜 Sheets 서비스
+(또는 --backend sqlite이면 임시 SQLite 파일)에 사용자 --users명과 사용자마다 기록 N개를 만들고, 가짜 감정 분류/요약 모델을 사용합니다.
+시나리오(--scenarios)와 동시 접속 수(--concurrency)마다 클라이언트들이 --seconds초 동안 요청을 반복하고
+초당 처리량, 지연 시간 p50/p95/p99, 실패 수를 측정해 JSON으로 저장합니다.
+  - login:   POST /login (준비된 사용자로 로그인)
+  - register: POST /register (매번 새 이메일)
+  - records: GET /get_all_records (--page-size를 주면 limit을 붙여 첫 페이지만, --records-format으로 응답 형식 선택)
+  - analyze: POST /analyze_diary (키워드 / 해시태그 / 키워드 없음 일기를 번갈아 보냅니다. 기록이 계속 늘어납니다)
+가짜 서비스의 지연 시간(--sheets-read-ms 등)과 모델 처리 시간(--infer-ms 등)도 결과 파일에 함께 기록되므로,
+같은 옵션으로 측정한 두 파일을 --compare로 비교할 수 있습니다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.http_load import raise_file_limit, run_load, serve_asgi, serve_wsgi, wait_until_up
+
+SCENARIOS = ('login', 'register', 'records', 'analyze')
+PASSWORD = 'bench-password'
+ANALYZE_TEXTS = (
+    '오늘 회사에서 회의가 길어 야근을 했다',          # 키워드
+    '#여행 바다를 보러 다녀왔다',                    # 해시태그
+    '아무 생각 없이 창밖을 오래 바라보았다',          # 키워드 없음 → 백그라운드 요약
+)
+
+
+def _email(index):
+    return f'bench{index}@example.com'
+
+
+# --- 서버 프로세스 ---
+
+def _seed(options):
+    """사용자와 기록을 만듭니다. 앱을 import하기 전에 호출합니다 (가짜 Sheets 서비스는 app.py가 사용자 디렉터리를 읽기 전에 있어야 합니다)."""
+    rng = random.Random(options['seed'])
+    if options['backend'] == 'sheets':
+        from bench.fakes import FakeSheetsService, install_fake_sheets
+        service = install_fake_sheets(FakeSheetsService(options['sheets_read_ms'], options['sheets_write_ms'], options['sheets_row_us']))
+        for index in range(options['users']):
+            service.add_user(_email(index), PASSWORD, str(uuid.UUID(int=rng.getrandbits(128))), options['records'], rng)
+        return
+
+    from bench.fakes import generate_rows
+    from services.storage import get_storage
+    storage = get_storage()
+    for index in range(options['users']):
+        storage.create_user(_email(index), PASSWORD)
+        user_id = storage.get_user_id(_email(index))
+        rows = list(generate_rows(options['records'], rng))
+        for start in range(0, len(rows), 5000):
+            storage.append_records(user_id, [
+                {"timestamp": row[0], "emotion": row[1], "category": row[2], "text": row[3],
+                 "position": {"x": row[4], "y": row[5], "z": row[6]}}
+                for row in rows[start:start + 5000]
+            ])
+
+
+def _serve(options):
+    raise_file_limit()
+    from bench.fakes import ensure_config, install_stub_models
+    ensure_config()
+    install_stub_models(options['infer_ms'], options['infer_item_ms'], options['summary_ms'])
+    _seed(options)
+    if options['server'] == 'sync':
+        from app import app
+        serve_wsgi(app, options['port'], options['sync_threads'])
+    else:
+        from asgi import app
+        serve_asgi(app, options['port'])
+
+
+# --- 클라이언트 ---
+
+def _request_factory(scenario, options, run_id):
+    users = options['users']
+
+    def login(counter):
+        return 'POST', '/login', {"email": _email(counter % users), "password": PASSWORD}
+
+    def register(counter):
+        return 'POST', '/register', {"email": f'new-{run_id}-{counter}@example.com', "password": PASSWORD}
+
+    def records(counter):
+        path = f'/get_all_records?user_email={_email(counter % users)}'
+        if options['page_size']:
+            path += f"&limit={options['page_size']}"
+        if options['records_format'] != 'json':
+            path += f"&format={options['records_format']}"
+        return 'GET', path, None
+
+    def analyze(counter):
+        text = f'{ANALYZE_TEXTS[counter % len(ANALYZE_TEXTS)]} ({run_id}-{counter})'
+        position = {"x": (counter % 100) * 3.0, "y": (counter // 100 % 100) * 3.0, "z": 500.0 + counter // 10000 * 3.0}
+        return 'POST', '/analyze_diary', {"diary_entry": text, "user_email": _email(counter % users), "position": position}
+
+    return {'login': login, 'register': register, 'records': records, 'analyze': analyze}[scenario]
+
+
+def _measure(records, args, workdir):
+    options = {
+        "backend": args.backend, "server": args.server, "port": args.port, "users": args.users, "records": records,
+        "seed": args.seed, "sheets_read_ms": args.sheets_read_ms, "sheets_write_ms": args.sheets_write_ms,
+        "sheets_row_us": args.sheets_row_us, "infer_ms": args.infer_ms, "infer_item_ms": args.infer_item_ms,
+        "summary_ms": args.summary_ms, "sync_threads": args.sync_threads, "page_size": args.page_size,
+        "records_format": args.records_format,
+    }
+    run_dir = tempfile.mkdtemp(prefix=f'records-{records}-', dir=workdir)
+    env = dict(
+        os.environ,
+        STORAGE_BACKEND=args.backend,
+        SQLITE_PATH=os.path.join(run_dir, 'diary.db'),
+        JOURNAL_DIR=os.path.join(run_dir, 'journal'),
+        IMPORT_DIR=os.path.join(run_dir, 'imports'),
+        ANALYSIS_CACHE_PATH=os.path.join(run_dir, 'analysis_cache.db'),
+        CATEGORY_KEYWORDS_PATH=os.path.join(run_dir, 'category_keywords.json'),
+        INFERENCE_SERVER_SOCKET='',
+        LOG_LEVEL=os.environ.get('LOG_LEVEL', 'ERROR'),
+    )
+    command = [sys.executable, '-m', 'bench.load_test', '--serve', json.dumps(options)]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+    results = []
+    try:
+        wait_until_up(args.port, process, timeout=args.startup_timeout)
+        for scenario in args.scenarios:
+            for clients in args.concurrency:
+                # 실행마다 새 식별자를 붙여 register의 이메일과 analyze의 일기 내용이 앞선 실행과 겹치지 않게 합니다.
+                next_request = _request_factory(scenario, options, uuid.uuid4().hex[:8])
+                result = asyncio.run(run_load(args.port, next_request, clients, args.seconds, args.timeout))
+                result = {"scenario": scenario, "records": records, **result}
+                print(f"{scenario:>8} records={records:<7} clients={clients:<5} rps={result['rps']:<8} "
+                      f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                      f"failures={result['failures']}", flush=True)
+                results.append(result)
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- 결과 비교 ---
+
+def _key(result):
+    return result['scenario'], result['records'], result['clients']
+
+
+def _change(old, new):
+    if old is None or new is None:
+        return '-'
+    if old == 0:
+        return f'{new}'
+    return f'{new} ({(new - old) / old * 100:+.0f}%)'
+
+
+def compare(old_report, new_report):
+    """두 결과 파일에서 같은 (시나리오, 기록 수, 동시 접속 수)끼리 처리량과 지연 시간 변화를 표로 출력합니다."""
+    old_results = {_key(result): result for result in old_report['results']}
+    if old_report.get('settings') != new_report.get('settings'):
+        print("주의: 두 결과의 측정 설정(가짜 서비스 지연 시간, 모델 처리 시간 등)이 다릅니다.")
+    print(f"{'scenario':>8} {'records':>7} {'clients':>7} | {'rps':>16} | {'p50 ms':>16} | {'p95 ms':>16} | {'p99 ms':>16} | failures")
+    for new in new_report['results']:
+        old = old_results.get(_key(new))
+        if old is None:
+            continue
+        print(f"{new['scenario']:>8} {new['records']:>7} {new['clients']:>7} | "
+              f"{_change(old['rps'], new['rps']):>16} | {_change(old['p50_ms'], new['p50_ms']):>16} | "
+              f"{_change(old['p95_ms'], new['p95_ms']):>16} | {_change(old['p99_ms'], new['p99_ms']):>16} | "
+              f"{old['failures']} -> {new['failures']}")
+
+
+def _load_report(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--records', type=int, nargs='+', default=[10, 1000, 10000], help='사용자 한 명의 기록 수 목록')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64], help='동시 접속 수 목록')
+    parser.add_argument('--users', type=int, default=2, help='미리 만들어 두는 사용자 수 (요청은 사용자들에게 번갈아 보냅니다)')
+    parser.add_argument('--seconds', type=float, default=10.0, help='시나리오/동시 접속 수마다 요청을 보내는 시간 (초)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='요청 하나의 제한 시간 (초). 넘으면 실패로 셉니다.')
+    parser.add_argument('--backend', choices=['sheets', 'sqlite'], default='sheets',
+                        help='sheets: 가짜 Sheets 서비스, sqlite: 임시 SQLite 파일')
+    parser.add_argument('--server', choices=['sync', 'async'], default='sync',
+                        help='sync: app.py를 스레드 WSGI 서버로, async: asgi.py를 uvicorn으로 (uvicorn 필요)')
+    parser.add_argument('--sync-threads', type=int, default=8, help='sync 서버의 요청 처리 스레드 수')
+    parser.add_argument('--page-size', type=int, help='records 시나리오에서 limit 파라미터로 받을 기록 수 (생략하면 전체)')
+    parser.add_argument('--records-format', choices=['json', 'ndjson', 'binary'], default='json',
+                        help='records 시나리오의 응답 형식 (binary는 --page-size와 함께 쓸 수 없습니다)')
+    parser.add_argument('--sheets-read-ms', type=float, default=80.0, help='가짜 Sheets 읽기 요청 하나의 지연 시간 (밀리초)')
+    parser.add_argument('--sheets-write-ms', type=float, default=150.0, help='가짜 Sheets 쓰기 요청 하나의 지연 시간 (밀리초)')
+    parser.add_argument('--sheets-row-us', type=float, default=2.0, help='가짜 Sheets 읽기 응답의 행당 추가 시간 (마이크로초)')
+    parser.add_argument('--infer-ms', type=float, default=30.0, help='가짜 감정 분류 모델의 배치 하나 처리 시간 (밀리초)')
+    parser.add_argument('--infer-item-ms', type=float, default=5.0, help='가짜 감정 분류 모델의 문장당 추가 시간 (밀리초)')
+    parser.add_argument('--summary-ms', type=float, default=500.0, help='가짜 요약 모델의 요약 하나 처리 시간 (밀리초)')
+    parser.add_argument('--seed', type=int, default=0, help='기록 데이터 생성용 난수 시드')
+    parser.add_argument('--port', type=int, default=8775)
+    parser.add_argument('--startup-timeout', type=float, default=300.0, help='서버가 데이터를 만들고 준비될 때까지 기다리는 시간 (초)')
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    parser.add_argument('--baseline', help='측정이 끝난 뒤 비교할 이전 결과 파일')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='측정하지 않고 두 결과 파일만 비교합니다')
+    parser.add_argument('--serve', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        _serve(json.loads(args.serve))
+        return
+    if args.compare:
+        compare(_load_report(args.compare[0]), _load_report(args.compare[1]))
+        return
+
+    raise_file_limit()
+    started_at = datetime.now().isoformat(timespec='seconds')
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for records in args.records:
+            results.extend(_measure(records, args, workdir))
+
+    report = {
+        "started_at": started_at,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "backend": args.backend, "server": args.server, "users": args.users, "seconds": args.seconds,
+            "sync_threads": args.sync_threads, "page_size": args.page_size, "records_format": args.records_format,
+            "sheets_read_ms": args.sheets_read_ms,
+            "sheets_write_ms": args.sheets_write_ms, "sheets_row_us": args.sheets_row_us, "infer_ms": args.infer_ms,
+            "infer_item_ms": args.infer_item_ms, "summary_ms": args.summary_ms, "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        compare(_load_report(args.baseline), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+기록 목록의 메모리 사용량과 /get_all_records 응답 크기를 표현 방식별로 비교합니다.
+
+사용법 (프로젝트 최상위 폴더에서):
+    python -m bench.record_format --sizes 1000 10000 100000 --output bench/results/record_format.json
+
+bench/fakes.py의 generate_rows()로 시트에서 읽은 것과 같은 문자열 행을 만든 뒤,
+  - 메모리: 행을 기록 딕셔너리 목록(이전 기록 캐시)과 열 목록(RecordColumns)으로 바꿀 때 새로 할당된 바이트 (tracemalloc)
+  - 응답 크기: JSON(jsonify와 같은 설정), NDJSON, 바이너리(format=binary), 위치/감정/카테고리만 보내는 바이너리(fields=position)
+    각각의 원래 크기와 gzip 크기, 응답 본문을 만드는 시간
+을 측정합니다.
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.fakes import generate_rows
+from services.record_columns import RecordColumns, encode_binary
+
+
+def _record_dict(row, row_number):
+    # 열 목록 이전의 기록 캐시가 보관하던 기록 딕셔너리 (sheets.py의 옛 _row_to_record와 같은 모양)
+    record = {
+        "id": row_number,
+        "version": int(row[8]) if len(row) > 8 and row[8] else 0,
+        "timestamp": row[0],
+        "emotion": row[1],
+        "category": row[2],
+        "text": row[3],
+        "position": {"x": float(row[4]), "y": float(row[5]), "z": float(row[6])},
+    }
+    if len(row) > 7 and row[7]:
+        record["summary"] = row[7]
+    return record
+
+
+def _columns(rows):
+    columns = RecordColumns()
+    for row_number, row in enumerate(rows, start=2):
+        columns.append(
+            row_number, int(row[8]) if row[8] else 0, row[0], row[1], row[2], row[3],
+            float(row[4]), float(row[5]), float(row[6]), row[7] or None
+        )
+    return columns
+
+
+def _allocated(build):
+    """build()가 만든 객체가 차지하는 바이트 (tracemalloc 기준)와 그 객체를 반환합니다."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, value
+
+
+def _timed(encode):
+    started = time.perf_counter()
+    body = encode()
+    return body, round((time.perf_counter() - started) * 1000, 1)
+
+
+def measure(size, seed):
+    # 시트 API처럼 모든 값을 문자열로 돌려받은 행
+    rows = [[str(value) for value in row] for row in generate_rows(size, random.Random(seed))]
+    dict_bytes, records = _allocated(lambda: [_record_dict(row, index) for index, row in enumerate(rows, start=2)])
+    column_bytes, columns = _allocated(lambda: _columns(rows))
+
+    from flask import Flask
+    flask_json = Flask(__name__).json
+    encoders = {
+        "json": lambda: flask_json.dumps({"status": "success", "records": records, "next_cursor": None, "version": 0}).encode('utf-8'),
+        "ndjson": lambda: ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode('utf-8'),
+        "binary": lambda: encode_binary(columns, 0),
+        "binary_position_only": lambda: encode_binary(columns, 0, ['position']),
+    }
+    wire = {}
+    for name, encode in encoders.items():
+        body, encode_ms = _timed(encode)
+        wire[name] = {"bytes": len(body), "gzip_bytes": len(gzip.compress(body, 6)), "encode_ms": encode_ms}
+    return {
+        "records": size,
+        "memory": {"dicts": dict_bytes, "columns": column_bytes, "columns_estimate": columns.estimate_bytes()},
+        "wire": wire,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='사용자 한 명의 기록 수 목록')
+    parser.add_argument('--seed', type=int, default=0, help='기록 데이터 생성용 난수 시드')
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        result = measure(size, args.seed)
+        memory = result['memory']
+        print(f"records={size:<7} memory dicts={memory['dicts'] / 1e6:.2f}MB columns={memory['columns'] / 1e6:.2f}MB "
+              f"({memory['dicts'] / max(1, memory['columns']):.1f}x)", flush=True)
+        for name, wire in result['wire'].items():
+            print(f"    {name:<21} {wire['bytes'] / 1e3:>10.1f}KB  gzip {wire['gzip_bytes'] / 1e3:>9.1f}KB  {wire['encode_ms']}ms")
+        results.append(result)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
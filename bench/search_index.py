@@ -0,0 +1,183 @@
+"""
+일기 검색 인덱스(services/search_index.py)의 성능을 기록 수별로 측정합니다.
+
+사용법 (프로젝트 최상위 폴더에서):
+    python -m bench.search_index --sizes 1000 10000 100000 --output bench/results/search_index.json
+
+기록 수마다 다음을 측정합니다.
+  - 인덱스 만들기 시간 (changes_since(0)의 기록을 모두 색인)
+  - 기록 하나를 덧붙인 뒤 검색하기까지의 시간 (변경분 색인)
+  - 검색어 종류별 검색 1회 지연 시간 p50/p99. 비교 대상은 모든 기록의 본문을 문자열로 훑으며 필터를 거는 방식.
+본문은 bench/fakes.py의 generate_rows()와 같은 형식의 행에, 어휘 목록에서 고른 단어와 조사를 이어 붙여 만듭니다
+(generate_rows()의 본문은 거의 같은 문장이라 검색어마다 결과 수가 크게 달라지지 않습니다).
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.fakes import ensure_config, generate_rows
+
+ensure_config()
+
+from services.search_index import SearchIndexCache, parse_time_bound, timestamp_key
+
+# 본문 어휘: 자주 나오는 단어부터 드문 단어까지 (앞쪽 단어일수록 자주 고릅니다)
+_WORDS = (
+    '오늘', '친구', '회사', '학교', '카페', '저녁', '아침', '산책', '커피', '공부', '운동', '가족', '엄마', '주말', '비',
+    '영화', '여행', '바다', '도서관', '회의', '발표', '시험', '점심', '강아지', '고양이', '케이크', '생일', '병원', '이사',
+    '제주도', '부산', '캠핑', '등산', '콘서트', '전시회', '면접', '합격', '퇴근', '야근', '선물', '편지', '눈', '첫눈',
+)
+_PARTICLES = ('', '에서', '를', '을', '와', '이', '가', '에', '도', '는')
+_ENDINGS = ('좋았다.', '힘들었다.', '즐거웠다.', '피곤했다.', '설렜다.', '그냥 그랬다.')
+
+# (이름, 검색어, 필터)
+_QUERIES = (
+    ('common word', '회사', {}),
+    ('rare word', '첫눈', {}),
+    ('two words', '제주도 여행', {}),
+    ('one char', '비', {}),
+    ('word + facets', '친구', {"emotions": ['기쁨', '놀람'], "start": '2024-03', "end": '2024-06'}),
+    ('facets only', '', {"categories": ['일상'], "start": '2024-05-01', "end": '2024-05-31'}),
+)
+
+
+def _text(rng):
+    weights = [1.0 / (rank + 1) for rank in range(len(_WORDS))]
+    words = rng.choices(_WORDS, weights, k=rng.randint(4, 12))
+    return ' '.join(word + rng.choice(_PARTICLES) for word in words) + ' ' + rng.choice(_ENDINGS)
+
+
+def _records(n, seed):
+    rng = random.Random(seed)
+    records = []
+    for record_id, row in enumerate(generate_rows(n, random.Random(seed)), start=2):
+        records.append({
+            "id": record_id,
+            "version": row[8],
+            "timestamp": row[0],
+            "emotion": row[1],
+            "category": row[2],
+            "text": _text(rng),
+            "position": {"x": row[4], "y": row[5], "z": row[6]},
+        })
+    return records
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(1, math.ceil(p / 100.0 * len(ordered))) - 1]
+
+
+def _filters(filters):
+    return {
+        "emotions": filters.get('emotions'),
+        "categories": filters.get('categories'),
+        "start": parse_time_bound(filters['start'], upper=False) if 'start' in filters else None,
+        "end": parse_time_bound(filters['end'], upper=True) if 'end' in filters else None,
+    }
+
+
+def _linear_search(records, query, emotions, categories, start, end, limit):
+    # 인덱스 없이 모든 기록의 본문에 검색어 단어가 들어 있는지 확인하는 기준 구현
+    words = query.lower().split()
+    matched = []
+    for record in records:
+        if emotions and record['emotion'] not in emotions:
+            continue
+        if categories and record['category'] not in categories:
+            continue
+        key = timestamp_key(record['timestamp'])
+        if (start is not None and key < start) or (end is not None and key > end):
+            continue
+        text = record['text'].lower()
+        score = sum(1 for word in words if word in text)
+        if score or not words:
+            matched.append((score, key, record['id']))
+    matched.sort(reverse=True)
+    return matched[:limit]
+
+
+def _timed_ms(function, repeats):
+    samples = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - t) * 1000.0)
+    return samples
+
+
+def _measure(n, repeats, linear_max, seed):
+    records = _records(n, seed)
+
+    started = time.perf_counter()
+    cache = SearchIndexCache(1)
+    key = (n + 1, n)
+    cache.search(1, key, lambda since: (records, n + 1), '', limit=1)
+    build_ms = (time.perf_counter() - started) * 1000.0
+
+    # 기록 하나를 저장한 뒤 첫 검색: 변경분(기록 1개)만 읽어 색인합니다.
+    extra = dict(records[-1], id=n + 2, version=n + 2, text='새로 쓴 일기 첫눈이 왔다')
+    started = time.perf_counter()
+    cache.search(1, (n + 2, n + 1), lambda since: ([extra], n + 2), '첫눈', limit=20)
+    update_ms = (time.perf_counter() - started) * 1000.0
+    records.append(extra)
+
+    index = cache._indexes[1]
+    queries = {}
+    for name, query, filters in _QUERIES:
+        params = _filters(filters)
+        total = index.search(query, limit=20, **params)['total']
+        indexed = _timed_ms(lambda: index.search(query, limit=20, **params), repeats)
+        linear = _timed_ms(lambda: _linear_search(records, query, limit=20, **params), min(repeats, 20)) if n <= linear_max else None
+        queries[name] = {
+            "query": query,
+            "matches": total,
+            "p50_ms": round(statistics.median(indexed), 3),
+            "p99_ms": round(_percentile(indexed, 99), 3),
+            "linear_p50_ms": round(statistics.median(linear), 2) if linear else None,
+        }
+    return {
+        "records": n,
+        "tokens": len(index.postings),
+        "build_ms": round(build_ms, 1),
+        "update_ms": round(update_ms, 3),
+        "queries": queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--repeats', type=int, default=200, help='검색어마다 검색을 반복할 횟수')
+    parser.add_argument('--linear-max', type=int, default=100000, help='본문을 훑는 방식을 측정할 최대 기록 수')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        result = _measure(n, args.repeats, args.linear_max, args.seed)
+        print(f"records={n:<7} tokens={result['tokens']:<6} build={result['build_ms']}ms update+search={result['update_ms']}ms", flush=True)
+        results.append(result)
+
+    print("| records | query | matches | p50 / p99 (ms) | linear scan p50 (ms) |")
+    print("|---|---|---|---|---|")
+    for r in results:
+        for name, q in r['queries'].items():
+            print(f"| {r['records']} | {name} | {q['matches']} | {q['p50_ms']} / {q['p99_ms']} | {q['linear_p50_ms']} |")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+공간 해시 격자(services/spatial_index.py)의 성능을 구체 수별로 측정합니다.
+
+사용법 (프로젝트 최상위 폴더에서):
+    python -m bench.spatial_index --sizes 1000 10000 100000 --output bench/results/spatial_index.json
+
+구체 수마다 다음을 측정합니다.
+  - 격자 만들기 시간
+  - 겹치지 않는 위치 찾기(find_free_position + 예약) 1회 지연 시간 p50/p99.
+    비교 대상은 app.js의 generateNonOverlappingPosition()과 같이 후보마다 모든 구체와 거리를 재는 방식 (NumPy로 벡터화).
+  - 레이아웃 한 단계의 반발력 계산 시간. 비교 대상은 모든 쌍을 비교하는 방식 (--dense-max 이하의 구체 수에서만).
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from services.layout import MIN_DISTANCE, _repulsion_forces
+from services.spatial_index import SpatialHashGrid
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(1, math.ceil(p / 100.0 * len(ordered))) - 1]
+
+
+def _dense_repulsion(positions, r_force):
+    # 모든 쌍을 비교하는 기준 구현 (메모리를 제한하기 위해 행을 나눠 계산)
+    n = len(positions)
+    forces = np.zeros_like(positions)
+    chunk = max(1, 3_000_000 // max(1, 3 * n))
+    for start in range(0, n, chunk):
+        diff = positions[start:start + chunk, None, :] - positions[None, :, :]
+        squared = np.einsum('ijk,ijk->ij', diff, diff)
+        rows, cols = np.nonzero((squared < MIN_DISTANCE * MIN_DISTANCE) & (squared > 0))
+        pair_squared = squared[rows, cols]
+        weight = r_force / (pair_squared + 0.1) / np.sqrt(pair_squared)
+        np.add.at(forces, rows + start, diff[rows, cols] * weight[:, None])
+    return forces
+
+
+def _linear_free_position(points, extent, rng, max_attempts=100):
+    # app.js의 재시도 방식: 후보를 뽑을 때마다 모든 구체와의 거리를 잽니다.
+    for _ in range(max_attempts):
+        candidate = np.array([rng.uniform(-extent, extent) for _ in range(3)])
+        squared = np.einsum('ij,ij->i', points - candidate, points - candidate)
+        if not (squared < MIN_DISTANCE * MIN_DISTANCE).any():
+            break
+    return candidate
+
+
+def _timed_ms(function, repeats):
+    samples = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - t) * 1000.0)
+    return samples
+
+
+def _measure(n, density, queries, steps, dense_max, seed):
+    rng = random.Random(seed)
+    # 격자 한 칸(MIN_DISTANCE³) 부피당 구체 density개가 되도록 정육면체 크기를 정합니다.
+    extent = 0.5 * (n / density) ** (1.0 / 3.0) * MIN_DISTANCE
+    positions = np.random.default_rng(seed).uniform(-extent, extent, (n, 3))
+
+    started = time.perf_counter()
+    grid = SpatialHashGrid(MIN_DISTANCE)
+    for point in positions.tolist():
+        grid.insert(point)
+    build_ms = (time.perf_counter() - started) * 1000.0
+
+    place = []
+    for _ in range(queries):
+        t = time.perf_counter()
+        grid.insert(grid.find_free_position(MIN_DISTANCE, extent, rng=rng))
+        place.append((time.perf_counter() - t) * 1000.0)
+    linear = _timed_ms(lambda: _linear_free_position(positions, extent, rng), min(queries, 200))
+
+    grid_step = _timed_ms(lambda: _repulsion_forces(positions, 0.1), steps)
+    dense_step = _timed_ms(lambda: _dense_repulsion(positions, 0.1), steps) if n <= dense_max else None
+    return {
+        "orbs": n,
+        "extent": round(extent, 2),
+        "grid_build_ms": round(build_ms, 1),
+        "place_ms": {"p50": round(statistics.median(place), 3), "p99": round(_percentile(place, 99), 3)},
+        "linear_place_ms": {"p50": round(statistics.median(linear), 3), "p99": round(_percentile(linear, 99), 3)},
+        "repulsion_step_ms": round(statistics.median(grid_step), 1),
+        "dense_repulsion_step_ms": round(statistics.median(dense_step), 1) if dense_step else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--density', type=float, default=0.5, help='격자 한 칸 부피당 평균 구체 수')
+    parser.add_argument('--queries', type=int, default=1000, help='위치 찾기 반복 횟수')
+    parser.add_argument('--steps', type=int, default=5, help='반발력 계산 반복 횟수')
+    parser.add_argument('--dense-max', type=int, default=10000, help='모든 쌍 비교 방식을 측정할 최대 구체 수')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    results = [_measure(n, args.density, args.queries, args.steps, args.dense_max, args.seed) for n in args.sizes]
+
+    print("| orbs | build (ms) | place p50/p99 (ms) | linear place p50/p99 (ms) | repulsion step (ms) | dense step (ms) |")
+    print("|---|---|---|---|---|---|")
+    for r in results:
+        print(f"| {r['orbs']} | {r['grid_build_ms']} | {r['place_ms']['p50']} / {r['place_ms']['p99']} | "
+              f"{r['linear_place_ms']['p50']} / {r['linear_place_ms']['p99']} | {r['repulsion_step_ms']} | {r['dense_repulsion_step_ms']} |")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"density": args.density, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
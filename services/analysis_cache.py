@@ -0,0 +1,177 @@
+import logging
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# 같은 일기 내용을 다시 분석하지 않도록 모델 결과를 보관하는 2단계 캐시입니다.
+# 재전송된 요청, 다시 가져온 일기, 다시 제출한 초안은 내용이 같으므로 모델을 다시 실행할 필요가 없습니다.
+#   1단계: 프로세스 메모리의 LRU (memory_entries개)
+#   2단계: 디스크의 SQLite 파일 (disk_entries개, 워커 프로세스와 재시작 사이에 공유)
+# 키는 정규화한 텍스트와 모델 버전(모델 이름)의 SHA-256 해시이므로 일기 원문은 저장하지 않습니다.
+# 모델 이름이 바뀌면 키가 달라져 이전 결과를 쓰지 않으며, 시작할 때 디스크에 남은 이전 모델의 결과를 지웁니다.
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """유니코드 정규화(NFC)와 공백 정리를 거친 텍스트를 반환합니다. 보이는 내용이 같으면 같은 키가 됩니다."""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+class AnalysisCache:
+    """
+    Args:
+        path (str): SQLite 파일 경로. 비어 있으면 메모리 단계만 사용합니다.
+        model_versions (dict): 종류('emotion', 'summary')별 모델 버전 문자열.
+        memory_entries (int): 메모리에 보관할 최대 결과 수.
+        disk_entries (int): 디스크에 보관할 최대 결과 수. 넘으면 가장 오래 쓰지 않은 결과부터 지웁니다.
+    """
+
+    # 디스크 크기를 이 횟수의 저장마다 확인합니다.
+    PRUNE_EVERY = 500
+
+    def __init__(self, path, model_versions, memory_entries, disk_entries):
+        self.path = path
+        self.model_versions = dict(model_versions)
+        self.memory_entries = max(1, memory_entries)
+        self.disk_entries = max(1, disk_entries)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_failed = False
+        self._puts = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # 캐시 적중으로 실행하지 않은 모델 시간의 합 (결과를 처음 계산할 때 걸린 시간 기준)
+        self.saved_seconds = 0.0
+        self.invalidated = 0
+
+    def _key(self, kind, text):
+        raw = f'{kind}\0{self.model_versions[kind]}\0{normalize_text(text)}'.encode('utf-8')
+        return hashlib.sha256(raw).hexdigest()
+
+    # --- 디스크 ---
+
+    def _disk(self):
+        """SQLite 연결을 반환합니다. 처음 호출될 때 열고, 열 수 없으면 None을 반환합니다 (잠금을 잡은 상태에서 호출)."""
+        if self._conn is not None or self._disk_failed or not self.path:
+            return self._conn
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL, cost REAL NOT NULL, last_used REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used)')
+            conn.execute('CREATE TABLE IF NOT EXISTS model_versions (kind TEXT PRIMARY KEY, version TEXT NOT NULL)')
+            # 모델이 바뀐 종류의 결과는 다시 쓰일 일이 없으므로 지웁니다.
+            stored = dict(conn.execute('SELECT kind, version FROM model_versions').fetchall())
+            for kind, version in self.model_versions.items():
+                if stored.get(kind) != version:
+                    deleted = conn.execute('DELETE FROM results WHERE kind = ?', (kind,)).rowcount
+                    conn.execute('INSERT OR REPLACE INTO model_versions (kind, version) VALUES (?, ?)', (kind, version))
+                    if deleted:
+                        self.invalidated += deleted
+                        logger.info("모델이 바뀌어 '%s' 분석 캐시 %s개를 지웠습니다. (%s -> %s)", kind, deleted, stored.get(kind), version)
+            self._conn = conn
+        except sqlite3.Error as e:
+            self._disk_failed = True
+            logger.error("분석 캐시 파일을 열 수 없어 메모리 캐시만 사용합니다: %s", e)
+        return self._conn
+
+    def _disk_error(self, e):
+        # 캐시는 성능을 위한 것이므로 디스크 오류가 분석을 실패시키지 않도록 메모리 단계만 사용합니다.
+        logger.error("분석 캐시 디스크 오류로 메모리 캐시만 사용합니다: %s", e)
+        self._disk_failed = True
+        self._conn = None
+
+    def _prune(self, conn):
+        count = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        if count > self.disk_entries:
+            conn.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)',
+                (count - self.disk_entries,)
+            )
+
+    # --- 조회 / 저장 ---
+
+    def _remember(self, key, value, cost):
+        self._memory[key] = (value, cost)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, kind, text):
+        """캐시된 결과를 반환합니다. 없으면 None을 반환합니다."""
+        key = self._key(kind, text)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.saved_seconds += entry[1]
+                return entry[0]
+            conn = self._disk()
+            if conn is not None:
+                try:
+                    row = conn.execute('SELECT value, cost FROM results WHERE key = ?', (key,)).fetchone()
+                    if row is not None:
+                        conn.execute('UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key))
+                        self._remember(key, row[0], row[1])
+                        self.disk_hits += 1
+                        self.saved_seconds += row[1]
+                        return row[0]
+                except sqlite3.Error as e:
+                    self._disk_error(e)
+            self.misses += 1
+            return None
+
+    def put(self, kind, text, value, cost):
+        """
+        모델 결과를 저장합니다.
+        Args:
+            value (str): 결과 (감정 레이블 또는 요약문).
+            cost (float): 이 결과를 계산하는 데 걸린 모델 시간 (초). 적중 시 절약한 시간으로 집계합니다.
+        """
+        key = self._key(kind, text)
+        with self._lock:
+            self._remember(key, value, cost)
+            conn = self._disk()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    'INSERT OR REPLACE INTO results (key, kind, value, cost, last_used) VALUES (?, ?, ?, ?, ?)',
+                    (key, kind, value, cost, time.time())
+                )
+                self._puts += 1
+                if self._puts % self.PRUNE_EVERY == 0:
+                    self._prune(conn)
+            except sqlite3.Error as e:
+                self._disk_error(e)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "disk": self.path if self._conn is not None else None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+                "saved_model_seconds": round(self.saved_seconds, 3),
+                "invalidated": self.invalidated,
+                "model_versions": self.model_versions,
+            }
@@ -1,7 +1,191 @@
-import torch
-from transformers import pipeline
+import logging
+import os
 import re
+import time
+import threading
 from datetime import datetime
+from services.inference import BatchScheduler
+from services.latency import LatencyWindow
+from services.metrics import metrics
+from services.category_matcher import ReloadingCategoryMatcher
+from services.analysis_cache import AnalysisCache
+from services.settings import (
+    INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS, INFERENCE_MAX_QUEUE_DEPTH, INFERENCE_TIMEOUT_SECONDS,
+    CATEGORY_KEYWORDS_PATH, CATEGORY_KEYWORDS_CHECK_SECONDS,
+    EMOTION_BACKEND, INFERENCE_NUM_THREADS, EMOTION_BACKEND_VALIDATE, EMOTION_BACKEND_MIN_AGREEMENT,
+    EMOTION_REFERENCE_PATH, ONNX_MODEL_DIR,
+    ANALYSIS_CACHE_ENABLED, ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_MEMORY_ENTRIES, ANALYSIS_CACHE_DISK_ENTRIES
+)
+
+logger = logging.getLogger(__name__)
+
+# 사용할 허깅페이스 모델 이름
+EMOTION_MODEL_NAME = "Jinuuuu/KoELECTRA_fine_tunning_emotion"
+# 한국어 요약에 특화된 'gogamza/kobart-summarization' 모델을 사용합니다.
+SUMMARIZER_MODEL_NAME = "gogamza/kobart-summarization"
+
+# 감정 분류 결과를 검증할 때 사용하는 기본 기준 문장들
+REFERENCE_TEXTS = [
+    "오늘 친구들과 맛있는 저녁을 먹어서 정말 행복했다.",
+    "시험을 망쳐서 너무 속상하고 눈물이 난다.",
+    "내일 발표가 있는데 준비가 부족해서 걱정된다.",
+    "회의 중에 이름을 잘못 불러서 너무 민망했다.",
+    "동생이 내 물건을 허락 없이 써서 화가 났다.",
+    "믿었던 친구에게 배신당해 마음이 아프다.",
+    "길에서 우연히 초등학교 동창을 만나 깜짝 놀랐다.",
+    "특별한 일 없이 평범하게 하루를 보냈다.",
+    "드디어 합격 소식을 들어서 날아갈 것 같다.",
+    "비 오는 날 혼자 있으니 괜히 우울하다.",
+    "면접 결과가 언제 나올지 몰라 초조하다.",
+    "사람들 앞에서 넘어져서 얼굴이 빨개졌다.",
+    "약속을 또 어긴 동료 때문에 짜증이 폭발했다.",
+    "헤어진 연인이 생각나서 가슴이 먹먹하다.",
+    "갑자기 선물을 받아서 놀랍고 고마웠다.",
+    "점심으로 김밥을 먹고 오후에는 책을 읽었다.",
+]
+
+# torch/transformers는 가져오는 데만 수 초가 걸리므로, 서버 시작을 늦추지 않도록 모델을 로드할 때 가져옵니다.
+def _device():
+    import torch
+    return 0 if torch.cuda.is_available() else -1
+
+def _set_num_threads():
+    """추론 연산 스레드 수를 설정값에 맞춥니다."""
+    if INFERENCE_NUM_THREADS > 0:
+        import torch
+        torch.set_num_threads(INFERENCE_NUM_THREADS)
+
+def _build_pipeline(task, model_name):
+    from transformers import pipeline
+    _set_num_threads()
+    return pipeline(task, model=model_name, device=_device())
+
+def _build_quantized_pipeline(model_name):
+    """선형 계층을 int8로 동적 양자화한 CPU용 감정 분류 파이프라인을 만듭니다."""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+    _set_num_threads()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline("text-classification", model=quantized, tokenizer=tokenizer, device=-1)
+
+class OnnxEmotionClassifier:
+    """
+    ONNX Runtime 세션으로 감정 분류를 수행합니다.
+    transformers 파이프라인과 같은 방식(texts, batch_size=..., truncation=...)으로 호출할 수 있습니다.
+    """
+
+    def __init__(self, model_name, onnx_dir, num_threads=0):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.id2label = AutoConfig.from_pretrained(model_name).id2label
+        onnx_path = os.path.join(onnx_dir, model_name.replace('/', '__') + '.onnx')
+        if not os.path.exists(onnx_path):
+            self._export(model_name, onnx_path)
+
+        options = ort.SessionOptions()
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _export(self, model_name, onnx_path):
+        import torch
+        from transformers import AutoModelForSequenceClassification
+        logger.info("'%s' 모델을 ONNX로 내보냅니다: %s", model_name, onnx_path)
+        os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        sample = self.tokenizer(["예시 문장"], return_tensors='pt')
+        names = list(sample.keys())
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in names}
+        dynamic_axes['logits'] = {0: 'batch'}
+        torch.onnx.export(
+            model, tuple(sample[name] for name in names), onnx_path,
+            input_names=names, output_names=['logits'], dynamic_axes=dynamic_axes, opset_version=14
+        )
+
+    def __call__(self, texts, batch_size=None, truncation=True):
+        import numpy as np
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        batch_size = batch_size or len(texts)
+        results = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=truncation, return_tensors='np')
+            feeds = {name: value.astype(np.int64) for name, value in encoded.items() if name in self.input_names}
+            logits = self.session.run(None, feeds)[0]
+            # softmax
+            logits = logits - logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+            for row in probs:
+                index = int(row.argmax())
+                results.append({"label": self.id2label[index], "score": float(row[index])})
+        return results[0] if single else results
+
+def build_emotion_backend(backend):
+    """
+    설정한 백엔드 이름에 맞는 감정 분류기를 만듭니다.
+    Args:
+        backend (str): 'pipeline', 'quantized', 'onnx' 중 하나.
+    """
+    if backend == 'pipeline':
+        return _build_pipeline("text-classification", EMOTION_MODEL_NAME)
+    if backend == 'quantized':
+        return _build_quantized_pipeline(EMOTION_MODEL_NAME)
+    if backend == 'onnx':
+        return OnnxEmotionClassifier(EMOTION_MODEL_NAME, ONNX_MODEL_DIR, INFERENCE_NUM_THREADS)
+    raise ValueError(f"알 수 없는 감정 분류 백엔드입니다: {backend}")
+
+def load_reference_texts():
+    """백엔드 검증에 사용할 기준 문장들을 반환합니다."""
+    if EMOTION_REFERENCE_PATH and os.path.exists(EMOTION_REFERENCE_PATH):
+        with open(EMOTION_REFERENCE_PATH, encoding='utf-8') as f:
+            texts = [line.strip() for line in f if line.strip()]
+        if texts:
+            return texts
+    return REFERENCE_TEXTS
+
+def validate_backend(classifier, reference_classifier, texts):
+    """
+    기준 문장들에 대해 두 분류기의 레이블이 일치하는 비율을 반환합니다.
+    Returns:
+        tuple: (일치 비율, 불일치한 (문장, 기준 레이블, 백엔드 레이블) 목록)
+    """
+    expected = _classify_batch(reference_classifier, texts)
+    actual = _classify_batch(classifier, texts)
+    mismatches = [
+        (text, e['label'], a['label'])
+        for text, e, a in zip(texts, expected, actual) if e['label'] != a['label']
+    ]
+    return 1.0 - len(mismatches) / len(texts), mismatches
+
+def load_emotion_model():
+    """
+    설정된 백엔드로 감정 분류 모델을 로드하여 반환합니다.
+    fp32 이외의 백엔드는 기준 문장으로 fp32 결과와 비교하고, 일치율이 낮으면 fp32 파이프라인을 사용합니다.
+    """
+    classifier = build_emotion_backend(EMOTION_BACKEND)
+    if EMOTION_BACKEND == 'pipeline' or not EMOTION_BACKEND_VALIDATE:
+        return classifier
+
+    reference = _build_pipeline("text-classification", EMOTION_MODEL_NAME)
+    agreement, mismatches = validate_backend(classifier, reference, load_reference_texts())
+    logger.info("'%s' 백엔드의 fp32 레이블 일치율: %.1f%%", EMOTION_BACKEND, agreement * 100)
+    for text, expected, actual in mismatches:
+        logger.warning("레이블 불일치 - '%s': fp32=%s, %s=%s", text, expected, EMOTION_BACKEND, actual)
+    if agreement < EMOTION_BACKEND_MIN_AGREEMENT:
+        logger.warning("일치율이 기준(%.0f%%)보다 낮아 fp32 파이프라인을 사용합니다.", EMOTION_BACKEND_MIN_AGREEMENT * 100)
+        return reference
+    return classifier
+
+def load_summarizer_model():
+    """요약 모델을 로드하여 반환합니다."""
+    return _build_pipeline("summarization", SUMMARIZER_MODEL_NAME)
 
 # 허깅페이스 모델을 로드하고 한국어 감정을 매핑합니다.
 def load_models():
@@ -12,18 +196,13 @@ def load_models():
     emotion_classifier = None
     summarizer = None
     try:
-        # 'Jinuuuu/KoELECTRA_fine_tunning_emotion' 모델을 로드합니다.
-        emotion_model_name = "Jinuuuu/KoELECTRA_fine_tunning_emotion"
-        emotion_classifier = pipeline("text-classification", model=emotion_model_name, device=0 if torch.cuda.is_available() else -1)
-        # 한국어 요약에 특화된 모델을 로드합니다.
-        # 'gogamza/kobart-summarization' 모델을 사용합니다.
-        summarizer_model_name = "gogamza/kobart-summarization"
-        summarizer = pipeline("summarization", model=summarizer_model_name, device=0 if torch.cuda.is_available() else -1)
-        print("디버그: 텍스트 분류 및 요약 모델이 성공적으로 로드되었습니다.")
+        emotion_classifier = load_emotion_model()
+        summarizer = load_summarizer_model()
+        logger.info("텍스트 분류 및 요약 모델이 성공적으로 로드되었습니다.")
     except ImportError as e:
-        print(f"디버그: ImportError로 인해 모델 로드에 실패했습니다: {e}")
+        logger.error("ImportError로 인해 모델 로드에 실패했습니다: %s", e)
     except Exception as e:
-        print(f"디버그: 예상치 못한 오류로 인해 모델 로드에 실패했습니다: {e}")
+        logger.error("예상치 못한 오류로 인해 모델 로드에 실패했습니다: %s", e)
     return emotion_classifier, summarizer
 
 # 모델의 감정 레이블을 한국어로 매핑하기 위한 딕셔너리
@@ -39,6 +218,7 @@ emotion_map = {
 }
 
 # 일기 텍스트에 특정 키워드가 포함되어 있는지 확인하여 카테고리를 분류합니다.
+# 키워드 파일(CATEGORY_KEYWORDS_PATH)이 있으면 그 내용을, 없으면 아래 기본 사전을 사용합니다.
 category_keywords = {
     '업무': ['회사', '업무', '프로젝트', '야근', '회의'],
     '학업': ['공부', '과제', '시험', '학교', '강의', '지식', '습득'],
@@ -49,57 +229,181 @@ category_keywords = {
     '음식': ['음식', '요리', '맛집', '먹방', '카페']
 }
 
-def analyze_text(diary_text, emotion_classifier, summarizer):
+# 모든 키워드를 한 번의 순회로 찾는 매처. 키워드 파일이 바뀌면 재시작 없이 다시 만듭니다.
+category_matcher = ReloadingCategoryMatcher(CATEGORY_KEYWORDS_PATH, category_keywords, CATEGORY_KEYWORDS_CHECK_SECONDS)
+
+# 감정 분류 모델별 배치 스케줄러 (분류기 객체의 id를 키로 사용)
+_emotion_schedulers = {}
+_scheduler_lock = threading.Lock()
+
+def _classify_batch(emotion_classifier, texts):
+    """
+    여러 문장을 한 번에 감정 분류 모델에 넣습니다.
+    파이프라인에 리스트를 넘기면 batch_size 단위로 패딩하여 한 번의 forward로 처리합니다.
+    """
+    results = emotion_classifier(texts, batch_size=len(texts), truncation=True)
+    return [result[0] if isinstance(result, list) else result for result in results]
+
+# 같은 내용의 일기에 대한 감정 레이블과 요약문 캐시. 모델 이름(감정 분류는 백엔드 포함)이 바뀌면 이전 결과는 쓰지 않습니다.
+analysis_cache = AnalysisCache(
+    ANALYSIS_CACHE_PATH,
+    {'emotion': f'{EMOTION_MODEL_NAME}:{EMOTION_BACKEND}', 'summary': SUMMARIZER_MODEL_NAME},
+    memory_entries=ANALYSIS_CACHE_MEMORY_ENTRIES,
+    disk_entries=ANALYSIS_CACHE_DISK_ENTRIES
+) if ANALYSIS_CACHE_ENABLED else None
+
+def get_analysis_cache_stats():
+    """분석 결과 캐시의 적중률과 절약한 모델 시간을 반환합니다."""
+    return analysis_cache.stats() if analysis_cache else {"enabled": False}
+
+def _classify_and_cache(emotion_classifier, texts):
+    """배치를 분류하고, 배치 시간을 문장 수로 나눈 값을 문장별 비용으로 하여 결과를 캐시에 넣습니다."""
+    started = time.perf_counter()
+    with metrics.span('classifier_batch'):
+        results = _classify_batch(emotion_classifier, texts)
+    if analysis_cache is not None:
+        cost = (time.perf_counter() - started) / len(texts)
+        for text, result in zip(texts, results):
+            analysis_cache.put('emotion', text, result['label'], cost)
+    return results
+
+def get_emotion_scheduler(emotion_classifier):
+    """주어진 감정 분류 모델에 연결된 배치 스케줄러를 반환합니다. 처음 호출될 때 생성합니다."""
+    key = id(emotion_classifier)
+    scheduler = _emotion_schedulers.get(key)
+    if scheduler is None:
+        with _scheduler_lock:
+            scheduler = _emotion_schedulers.get(key)
+            if scheduler is None:
+                scheduler = BatchScheduler(
+                    lambda texts: _classify_and_cache(emotion_classifier, texts),
+                    max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+                    max_wait_ms=INFERENCE_MAX_WAIT_MS,
+                    max_queue_depth=INFERENCE_MAX_QUEUE_DEPTH,
+                    name='emotion-batch-scheduler'
+                )
+                _emotion_schedulers[key] = scheduler
+    return scheduler
+
+# 카테고리 결정 경로별 analyze_text 처리 시간 (해시태그 / 키워드 / 키워드 없음)
+analyze_latency = {
+    'hashtag': LatencyWindow(),
+    'keyword': LatencyWindow(),
+    'fallback': LatencyWindow(),
+}
+
+def get_inference_stats():
+    """감정 분류 배치 스케줄러의 상태와 경로별 분석 지연 시간을 반환합니다."""
+    return {
+        "emotion": [scheduler.stats() for scheduler in _emotion_schedulers.values()],
+        "category_matcher": category_matcher.stats(),
+        "analyze_latency": {path: window.summary() for path, window in analyze_latency.items()},
+    }
+
+@metrics.timed('keyword_match')
+def categorize(diary_text):
+    """
+    해시태그 → 키워드 → '기타' 순서로 일기의 카테고리를 정합니다.
+    Returns:
+        tuple: (카테고리, 요약 필요 여부, 결정 경로 'hashtag' | 'keyword' | 'fallback')
+    """
+    # 1. 해시태그로 카테고리 분류.
+    hashtags = re.findall(r'#(\w+)', diary_text)
+    if hashtags:
+        logger.debug("해시태그 '#%s' 발견. 카테고리 지정.", hashtags[0])
+        return hashtags[0], False, 'hashtag'
+    # 2. 키워드를 기반으로 카테고리 분류. 키워드가 가장 많이 등장한 카테고리를 선택합니다.
+    found_category, hits = category_matcher.get().best(diary_text)
+    if found_category:
+        logger.debug("키워드 %s회 발견. 카테고리: %s.", hits, found_category)
+        return found_category, False, 'keyword'
+    # 3. 키워드도 없으면 '기타'로 지정하고, 요약은 나중에 비동기로 생성합니다.
+    logger.debug("해시태그나 키워드 없음. '기타' 카테고리로 지정.")
+    return "기타", True, 'fallback'
+
+def analyze_text(diary_text, emotion_classifier):
     """
     주어진 일기 텍스트에 대해 감정 및 카테고리 분석을 수행합니다.
     분석 결과를 담은 딕셔너리를 반환합니다.
+    해시태그와 키워드가 모두 없으면 카테고리는 '기타'가 되고 needs_summary가 True가 됩니다.
+    이 경우 요약은 요청 처리 경로 밖에서 SummaryWorker가 생성합니다.
     """
+    started = time.perf_counter()
     try:
-        # 감정 분석을 수행합니다.
-        emotion_result = emotion_classifier(diary_text)[0]
-        predicted_emotion_label = emotion_result['label']
-        predicted_emotion = emotion_map.get(predicted_emotion_label, '분류불가')
-        print(f"디버그: 감정 분석 결과 - 레이블: {predicted_emotion_label}, 예측 감정: {predicted_emotion}")
-
-        # 2. 카테고리 분석을 수행합니다.
-        predicted_category = "기타"  # 기본값 설정.
-        # 2-1. 해시태그로 카테고리 분류.
-        hashtags = re.findall(r'#(\w+)', diary_text)
-        if hashtags:
-            predicted_category = hashtags[0]
-            print(f"디버그: 해시태그 '#{predicted_category}' 발견. 카테고리 지정.")
-        else:
-            # 2-2. 키워드를 기반으로 카테고리 분류.
-            found_category = None
-            for category, keywords in category_keywords.items():
-                for keyword in keywords:
-                    if keyword in diary_text:
-                        found_category = category
-                        break
-                if found_category:
-                    break
-            if found_category:
-                predicted_category = found_category
-                print(f"디버그: 키워드 '{keyword}' 발견. 카테고리: {predicted_category}.")
-            else:
-                # 2-3. 키워드도 없으면 요약 모델로 카테고리 지정.
-                if summarizer:
-                    summary_result = summarizer(diary_text)[0]
-                    predicted_category = summary_result['summary_text']
-                    print(f"디버그: 해시태그나 키워드 없음 {summary_result}. 요약 모델로 카테고리 지정: '{predicted_category}'")
-                    predicted_category = "기타"
-                    print("디버그: 해시태그나 키워드 없음. '기타' 카테고리로 지정.")
-        
-        # 현재 시간을 'yyyy-mm-dd-HH:MM' 형식으로 포맷합니다.
-        current_timestamp = datetime.now().strftime('%Y-%m-%d-%H:%M')
-
-        return {
-            "emotion": predicted_emotion,
-            "emotion_label": predicted_emotion_label,
-            "category": predicted_category,
-            "timestamp": current_timestamp
-        }
+        # 감정 분석을 수행합니다. 같은 내용을 분석한 적이 있으면 캐시된 결과를 사용하고,
+        # 없으면 동시에 들어온 요청들과 한 배치로 묶여 처리됩니다.
+        predicted_emotion_label = analysis_cache.get('emotion', diary_text) if analysis_cache is not None else None
+        if predicted_emotion_label is None:
+            with metrics.span('classifier'):
+                emotion_result = get_emotion_scheduler(emotion_classifier).submit(diary_text, timeout=INFERENCE_TIMEOUT_SECONDS)
+            predicted_emotion_label = emotion_result['label']
+        return _analysis_result(diary_text, predicted_emotion_label, started)
     
     except Exception as e:
-        print(f"디버그: 분석 중 오류가 발생했습니다: {e}")
-        raise e
\ No newline at end of file
+        logger.error("분석 중 오류가 발생했습니다: %s", e)
+        raise e
+
+async def analyze_text_async(diary_text, emotion_classifier):
+    """
+    analyze_text()의 비동기 버전입니다 (ASGI 경로용).
+    감정 분류는 같은 배치 스케줄러에 넣고, 결과를 기다리는 동안 이벤트 루프가 다른 요청을 처리합니다.
+    """
+    started = time.perf_counter()
+    try:
+        predicted_emotion_label = analysis_cache.get('emotion', diary_text) if analysis_cache is not None else None
+        if predicted_emotion_label is None:
+            with metrics.span('classifier'):
+                emotion_result = await get_emotion_scheduler(emotion_classifier).submit_async(diary_text, timeout=INFERENCE_TIMEOUT_SECONDS)
+            predicted_emotion_label = emotion_result['label']
+        return _analysis_result(diary_text, predicted_emotion_label, started)
+
+    except Exception as e:
+        logger.error("분석 중 오류가 발생했습니다: %s", e)
+        raise e
+
+def _analysis_result(diary_text, predicted_emotion_label, started):
+    """감정 레이블이 정해진 일기의 카테고리를 분석하고 analyze_text()의 결과 딕셔너리를 만듭니다."""
+    predicted_emotion = emotion_map.get(predicted_emotion_label, '분류불가')
+    logger.debug("감정 분석 결과 - 레이블: %s, 예측 감정: %s", predicted_emotion_label, predicted_emotion)
+
+    # 2. 카테고리 분석을 수행합니다.
+    predicted_category, needs_summary, path = categorize(diary_text)
+
+    # 현재 시간을 'yyyy-mm-dd-HH:MM' 형식으로 포맷합니다.
+    current_timestamp = datetime.now().strftime('%Y-%m-%d-%H:%M')
+    analyze_latency[path].add(time.perf_counter() - started)
+
+    return {
+        "emotion": predicted_emotion,
+        "emotion_label": predicted_emotion_label,
+        "category": predicted_category,
+        "timestamp": current_timestamp,
+        "needs_summary": needs_summary
+    }
+
+def analyze_batch(texts, emotion_classifier):
+    """
+    여러 일기를 한꺼번에 분석합니다 (일괄 가져오기용). 결과는 analyze_text()와 같은 형태의 딕셔너리 목록입니다.
+    캐시에 없는 문장만 요청들과 같은 배치 스케줄러로 분류하되, 대기열을 독차지하지 않도록 INFERENCE_MAX_BATCH_SIZE개씩 나눠 넣습니다.
+    """
+    scheduler = get_emotion_scheduler(emotion_classifier)
+    labels = [analysis_cache.get('emotion', text) if analysis_cache is not None else None for text in texts]
+    # 캐시에 없는 문장만 모델에 넣습니다.
+    missing = [i for i, label in enumerate(labels) if label is None]
+    for start in range(0, len(missing), INFERENCE_MAX_BATCH_SIZE):
+        batch = missing[start:start + INFERENCE_MAX_BATCH_SIZE]
+        results = scheduler.submit_many([texts[i] for i in batch], timeout=INFERENCE_TIMEOUT_SECONDS)
+        for i, result in zip(batch, results):
+            labels[i] = result['label']
+    current_timestamp = datetime.now().strftime('%Y-%m-%d-%H:%M')
+    results = []
+    for diary_text, label in zip(texts, labels):
+        category, needs_summary, _ = categorize(diary_text)
+        results.append({
+            "emotion": emotion_map.get(label, '분류불가'),
+            "emotion_label": label,
+            "category": category,
+            "timestamp": current_timestamp,
+            "needs_summary": needs_summary
+        })
+    return results
@@ -0,0 +1,312 @@
+import logging
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import parse_qsl
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_etags
+from services.latency import LatencyWindow
+from services.metrics import metrics
+from services.settings import ASYNC_IO_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# ASGI 서버(uvicorn 등)에서 실행하는 비동기 요청 경로의 기반 모듈입니다. (asgi.py에서 사용)
+# WSGI 워커에서는 Google Sheets 응답을 기다리는 동안 요청 하나가 스레드 하나를 차지하므로 동시 요청 수가 스레드 수로 제한됩니다.
+# ASGI 경로에서는 연결을 이벤트 루프가 들고 있고, googleapiclient처럼 블로킹하는 호출만 크기가 정해진 스레드 풀(io_executor)에서 실행합니다.
+# 캐시에서 바로 응답하는 요청은 스레드를 오래 잡지 않으며, 감정 분류는 배치 스케줄러의 결과를 await로 기다립니다.
+# 비동기 버전이 없는 라우트는 WsgiFallback으로 기존 Flask 앱에 넘깁니다.
+
+
+class BlockingExecutor:
+    """
+    블로킹 호출을 스레드 풀에서 실행하고 결과를 await로 돌려받게 합니다.
+    스레드 수(max_workers)가 동시에 진행되는 Sheets 호출 수의 상한이며, 나머지 호출은 스레드 없이 대기열에서 기다립니다.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='async-io')
+        self._lock = threading.Lock()
+        self.latency = LatencyWindow()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def run(self, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        with self._lock:
+            self.pending += 1
+        try:
+            result = await loop.run_in_executor(self._executor, lambda: function(*args, **kwargs))
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.pending -= 1
+            self.latency.add(time.perf_counter() - started)
+        with self._lock:
+            self.completed += 1
+        return result
+
+    async def iterate(self, open_iterator, chunk_size=200):
+        """
+        블로킹 반복자(저장소의 iter_records 등)를 스레드 풀의 스레드 하나에서 진행시키며 chunk_size개씩 묶어 비동기로 내보냅니다.
+        SQLite 커서처럼 만든 스레드에서만 쓸 수 있는 반복자가 있으므로, open_iterator() 호출과 반복, close()를 모두 같은 스레드에서 합니다.
+        반복이 끝날 때까지 스레드 하나를 쓰며, 받는 쪽이 느리면 묶음 2개까지만 미리 읽고 기다립니다.
+        open_iterator()나 반복 중에 발생한 예외는 받는 쪽에서 다시 발생합니다.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue(maxsize=2)
+        stopped = threading.Event()
+
+        def put(item):
+            asyncio.run_coroutine_threadsafe(chunks.put(item), loop).result()
+
+        def produce():
+            try:
+                iterator = iter(open_iterator())
+                try:
+                    while not stopped.is_set():
+                        chunk = list(islice(iterator, chunk_size))
+                        if not chunk:
+                            break
+                        put(('chunk', chunk))
+                finally:
+                    close = getattr(iterator, 'close', None)
+                    if close is not None:
+                        close()
+                put(('done', None))
+            except Exception as e:
+                put(('error', e))
+
+        producer = asyncio.ensure_future(self.run(produce))
+        try:
+            while True:
+                kind, value = await chunks.get()
+                if kind == 'error':
+                    raise value
+                if kind == 'done':
+                    return
+                yield value
+        finally:
+            # 받는 쪽이 중간에 멈췄으면 (클라이언트 연결 끊김 등) 생산자가 put에서 막히지 않도록 대기열을 비워 줍니다.
+            stopped.set()
+            while not producer.done():
+                try:
+                    chunks.get_nowait()
+                except asyncio.QueueEmpty:
+                    await asyncio.sleep(0.01)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "pending": self.pending,
+                "completed": self.completed,
+                "failed": self.failed,
+                "latency": self.latency.summary(),
+            }
+
+
+class AsyncRequest:
+    """ASGI scope와 receive로 만든 요청 객체. Flask의 request와 비슷한 이름의 속성만 제공합니다."""
+
+    def __init__(self, scope, receive):
+        self.scope = scope
+        self._receive = receive
+        self._body = None
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query_string = scope.get('query_string', b'').decode('latin-1')
+        self.args = MultiDict(parse_qsl(self.query_string, keep_blank_values=True))
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+
+    @property
+    def if_none_match(self):
+        return parse_etags(self.headers.get('if-none-match'))
+
+    async def body(self):
+        if self._body is None:
+            chunks = []
+            while True:
+                message = await self._receive()
+                if message['type'] == 'http.disconnect':
+                    break
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            self._body = b''.join(chunks)
+        return self._body
+
+    async def json(self):
+        """JSON 본문을 반환합니다. 본문이 없거나 JSON 객체가 아니면 None을 반환합니다."""
+        try:
+            data = json.loads(await self.body() or b'null')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+
+class AsyncResponse:
+    def __init__(self, body=b'', status=200, headers=None, content_type='application/json'):
+        self.body = body
+        self.status = status
+        self.headers = dict(headers or {})
+        if content_type:
+            self.headers.setdefault('Content-Type', content_type)
+
+    def _raw_headers(self):
+        return [(name.lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in self.headers.items()]
+
+    async def send(self, send):
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': self._raw_headers()})
+        await send({'type': 'http.response.body', 'body': self.body})
+
+
+class StreamingResponse(AsyncResponse):
+    """비동기 반복자가 내보내는 문자열을 한 줄씩 바로 보내는 응답 (ndjson 스트리밍용)."""
+
+    def __init__(self, chunks, status=200, headers=None, content_type='application/x-ndjson'):
+        super().__init__(b'', status, headers, content_type)
+        self.chunks = chunks
+
+    async def send(self, send):
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': self._raw_headers()})
+        async for chunk in self.chunks:
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+def json_response(data, status=200, headers=None):
+    """Flask의 jsonify와 같이 한글을 이스케이프하지 않은 JSON 응답을 만듭니다."""
+    return AsyncResponse(json.dumps(data, ensure_ascii=False).encode('utf-8'), status, headers)
+
+
+class WsgiFallback:
+    """비동기 버전이 없는 요청을 WSGI 앱(Flask)에 넘겨 스레드 풀에서 처리합니다. 응답 본문은 모아서 한 번에 보냅니다."""
+
+    def __init__(self, wsgi_app, executor):
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+
+    def _environ(self, request, body):
+        scope = request.scope
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        path = scope.get('raw_path') or scope['path'].encode('utf-8')
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': path.split(b'?', 1)[0].decode('latin-1'),
+            'QUERY_STRING': request.query_string,
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+            'CONTENT_LENGTH': str(len(body)),
+        }
+        for name, value in request.headers.items():
+            if name == 'content-type':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'content-length':
+                environ['HTTP_' + name.upper().replace('-', '_')] = value
+        return environ
+
+    def _call(self, environ):
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = headers
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return started['status'], started['headers'], body
+
+    async def __call__(self, request, send):
+        body = await request.body()
+        status, headers, body = await self.executor.run(self._call, self._environ(request, body))
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+class AsyncApp:
+    """
+    (메서드, 경로)로 비동기 처리기를 찾는 작은 ASGI 앱입니다. 등록되지 않은 요청은 fallback(WSGI 앱)으로 넘깁니다.
+    Args:
+        fallback (WsgiFallback): 등록되지 않은 요청을 처리할 객체.
+        extra_headers (dict): 비동기 처리기의 모든 응답에 붙일 헤더 (CORS 등).
+    """
+
+    def __init__(self, fallback, extra_headers=None):
+        self.fallback = fallback
+        self.extra_headers = dict(extra_headers or {})
+        self._routes = {}
+
+    def route(self, path, methods=('GET',)):
+        def decorator(handler):
+            for method in methods:
+                self._routes[(method, path)] = handler
+            return handler
+        return decorator
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+
+        request = AsyncRequest(scope, receive)
+        handler = self._routes.get((request.method, request.path))
+        if handler is None:
+            await self.fallback(request, send)
+            return
+        # 스트리밍 응답은 본문을 보내기 전까지의 시간만 기록합니다.
+        started = metrics.start_request()
+        try:
+            response = await handler(request)
+        except Exception as e:
+            logger.exception("비동기 요청 처리 중 오류가 발생했습니다 (%s %s): %s", request.method, request.path, e)
+            response = json_response({"status": "error", "message": "서버 내부 오류가 발생했습니다."}, 500)
+        metrics.finish_request(started, request.method, request.path, response.status)
+        for name, value in self.extra_headers.items():
+            response.headers.setdefault(name, value)
+        await response.send(send)
+
+
+def get_async_io_stats():
+    return io_executor.stats()
+
+
+# 비동기 경로가 블로킹 호출(Sheets/SQLite 저장소, Flask 앱)에 쓰는 스레드 풀
+io_executor = BlockingExecutor(ASYNC_IO_WORKERS)
@@ -0,0 +1,157 @@
+import logging
+import json
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# 일기 텍스트에서 카테고리 키워드를 한 번의 순회로 모두 찾아내는 Aho-Corasick 매처입니다.
+# 카테고리 × 키워드마다 `keyword in text`를 반복하던 방식은 키워드 사전이 커질수록 느려지므로,
+# 시작할 때(또는 키워드 파일이 바뀌었을 때) 오토마톤을 한 번 만들어 두고 텍스트 길이에 비례하는 시간에 찾습니다.
+
+
+class CategoryMatcher:
+    """
+    {카테고리: [키워드, ...]} 사전으로 만든 Aho-Corasick 오토마톤입니다.
+    한 번 만든 뒤에는 변경하지 않으므로 여러 스레드가 동시에 사용해도 안전합니다.
+    """
+
+    def __init__(self, category_keywords):
+        # 카테고리 순서 (적중 수가 같을 때 먼저 정의된 카테고리를 선택하기 위해 사용)
+        self.categories = list(category_keywords)
+        self._order = {category: i for i, category in enumerate(self.categories)}
+        # 상태별 전이 테이블, 실패 링크, 출력(해당 상태에서 끝나는 키워드의 (카테고리, 키워드) 목록)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self.keyword_count = 0
+        for category, keywords in category_keywords.items():
+            for keyword in keywords:
+                if keyword:
+                    self._add(keyword, category)
+        self._build_fail_links()
+
+    def _add(self, keyword, category):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((category, keyword))
+        self.keyword_count += 1
+
+    def _build_fail_links(self):
+        # 너비 우선으로 실패 링크를 계산하고, 실패 링크 쪽의 출력을 합쳐 둡니다.
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self._goto[state].items():
+                pending.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find_all(self, text):
+        """텍스트에서 발견된 모든 (카테고리, 키워드) 쌍을 등장 순서대로 반환합니다."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        matches = []
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                matches.extend(out[state])
+        return matches
+
+    def score(self, text):
+        """카테고리별 키워드 적중 수를 반환합니다."""
+        scores = {}
+        for category, _ in self.find_all(text):
+            scores[category] = scores.get(category, 0) + 1
+        return scores
+
+    def best(self, text):
+        """
+        적중 수가 가장 많은 카테고리와 그 점수를 반환합니다. 적중이 없으면 (None, 0)을 반환합니다.
+        점수가 같으면 키워드 사전에 먼저 정의된 카테고리를 선택합니다.
+        """
+        scores = self.score(text)
+        if not scores:
+            return None, 0
+        category = min(scores, key=lambda c: (-scores[c], self._order[c]))
+        return category, scores[category]
+
+
+class ReloadingCategoryMatcher:
+    """
+    키워드 파일(JSON)의 수정 시각을 주기적으로 확인해, 바뀌었으면 매처를 새로 만들어 교체합니다.
+    파일이 없거나 잘못된 경우에는 기본 키워드 사전(또는 마지막으로 성공한 사전)을 계속 사용합니다.
+    """
+
+    def __init__(self, path, default_keywords, check_interval):
+        self.path = path
+        self.check_interval = check_interval
+        self._matcher = CategoryMatcher(default_keywords)
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.reload_failures = 0
+
+    def get(self):
+        """현재 사용할 매처를 반환합니다. 확인 주기가 지났으면 키워드 파일 변경 여부를 확인합니다."""
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self._maybe_reload()
+        return self._matcher
+
+    def _maybe_reload(self, force=False):
+        if not self.path:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if not force and mtime == self._mtime:
+            return False
+        with self._lock:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    table = json.load(f)
+                if not isinstance(table, dict) or not all(isinstance(v, list) for v in table.values()):
+                    raise ValueError("키워드 파일은 {카테고리: [키워드, ...]} 형태여야 합니다.")
+                self._matcher = CategoryMatcher(table)
+                self._mtime = mtime
+                self.reloads += 1
+                logger.info("카테고리 키워드를 다시 불러왔습니다. 카테고리 %s개, 키워드 %s개", len(table), self._matcher.keyword_count)
+                return True
+            except (OSError, ValueError) as e:
+                self.reload_failures += 1
+                self._mtime = mtime
+                logger.error("카테고리 키워드 파일을 불러오지 못했습니다 (%s): %s", self.path, e)
+                return False
+
+    def reload(self):
+        """키워드 파일을 즉시 다시 읽습니다."""
+        return self._maybe_reload(force=True)
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "categories": len(self._matcher.categories),
+            "keywords": self._matcher.keyword_count,
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+        }
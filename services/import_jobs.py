@@ -0,0 +1,465 @@
+import logging
+import csv
+import fcntl
+import io
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import request, jsonify
+from services.analyzer import analyze_batch
+from services.latency import LatencyWindow
+from services.spatial_index import spatial_index
+
+logger = logging.getLogger(__name__)
+
+# 기존 일기를 한꺼번에 가져오는 백그라운드 작업(import job)입니다.
+# 업로드한 CSV/JSONL 파일을 정리된 JSONL(entries.jsonl)로 디스크에 옮겨 둔 뒤, 작업 스레드가
+# IMPORT_WRITE_ROWS개씩 감정/카테고리를 묶어서 분석하고, 위치를 정하고, 저장소에 한 번에 씁니다.
+# 묶음 하나를 쓸 때마다 진행 상황(state.json의 done)을 저장하므로, 서버가 중간에 종료되어도 다음 시작 시
+# 마지막으로 저장한 묶음 다음부터 이어서 처리합니다. 묶음을 쓰기 직전에는 그때 사용자의 기록 수(pending_count)를
+# 저장해 두고, 이어서 처리할 때 지금의 기록 수와 비교해 이미 저장된 앞쪽 기록 수만큼 정확히 건너뜁니다.
+#
+# 작업 디렉터리 구성 (IMPORT_DIR/<job_id>/):
+#   entries.jsonl  한 줄에 {"text", "timestamp", "position"} 하나. 형식이 잘못된 줄은 미리 걸러 둡니다.
+#   state.json     작업 상태와 진행 상황
+#   lock           작업을 처리하는 프로세스가 flock으로 잡는 파일 (워커가 여러 개일 때 중복 처리 방지)
+
+# CSV 열 이름 (대소문자 무시)
+TEXT_COLUMNS = ('text', 'diary_entry', 'diary', 'diary text', 'content', '일기', '내용')
+TIMESTAMP_COLUMNS = ('timestamp', 'date', 'datetime', 'time', '날짜', '시간')
+# 받아들이는 날짜 형식. 저장할 때는 앱과 같은 'yyyy-mm-dd-HH:MM' 형식으로 바꿉니다.
+TIMESTAMP_FORMATS = (
+    '%Y-%m-%d-%H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M',
+    '%Y-%m-%d', '%Y.%m.%d', '%Y/%m/%d',
+)
+# 형식 및 파일 확장자/Content-Type과 형식의 대응
+FORMATS = {'csv': 'csv', 'jsonl': 'jsonl', 'ndjson': 'jsonl'}
+CONTENT_TYPES = {'text/csv': 'csv', 'application/x-ndjson': 'jsonl', 'application/jsonl': 'jsonl', 'application/json-lines': 'jsonl'}
+# state.json에 남겨 둘 잘못된 줄의 최대 수
+MAX_REPORTED_ERRORS = 20
+
+
+class ImportFormatError(ValueError):
+    """업로드한 파일을 읽을 수 없거나 가져올 기록이 없을 때 발생합니다."""
+
+
+class ImportTooLargeError(ValueError):
+    """한 작업의 기록 수가 IMPORT_MAX_ENTRIES를 넘을 때 발생합니다."""
+
+
+def normalize_timestamp(value):
+    """
+    여러 형식의 날짜 문자열을 'yyyy-mm-dd-HH:MM' 형식으로 바꿉니다.
+    Raises:
+        ValueError: 알 수 없는 형식인 경우.
+    """
+    value = str(value).strip()
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-%d-%H:%M')
+        except ValueError:
+            continue
+    raise ValueError(f"알 수 없는 날짜 형식입니다: {value!r}")
+
+
+def _normalize_entry(raw, default_timestamp):
+    """
+    CSV 행 또는 JSON 객체를 {"text", "timestamp", "position"}으로 정리합니다. position은 없으면 None입니다.
+    Raises:
+        ValueError: 일기 내용이 없거나 날짜/위치 값이 잘못된 경우.
+    """
+    fields = {str(key).strip().lower(): value for key, value in raw.items() if key is not None}
+    text = next((fields[name] for name in TEXT_COLUMNS if fields.get(name) not in (None, '')), None)
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("일기 내용이 비어 있습니다.")
+    raw_timestamp = next((fields[name] for name in TIMESTAMP_COLUMNS if fields.get(name) not in (None, '')), None)
+    timestamp = normalize_timestamp(raw_timestamp) if raw_timestamp is not None else default_timestamp
+
+    position = fields.get('position')
+    if position is None and all(fields.get(axis) not in (None, '') for axis in 'xyz'):
+        position = {axis: fields[axis] for axis in 'xyz'}
+    if position is not None:
+        try:
+            position = {axis: float(position[axis]) for axis in 'xyz'}
+        except (TypeError, ValueError, KeyError):
+            raise ValueError(f"위치 값이 올바르지 않습니다: {position!r}")
+    return {"text": text, "timestamp": timestamp, "position": position}
+
+
+def parse_entries(text_stream, fmt):
+    """
+    업로드한 파일에서 (줄 번호, 원본 딕셔너리 또는 ValueError)를 하나씩 내놓습니다.
+    Raises:
+        ImportFormatError: CSV에 일기 내용 열이 없는 경우.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        header = [name.strip().lower() for name in reader.fieldnames or []]
+        if not any(name in header for name in TEXT_COLUMNS):
+            raise ImportFormatError(f"CSV에 일기 내용 열이 없습니다. 다음 중 하나가 필요합니다: {', '.join(TEXT_COLUMNS)}")
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError:
+            yield line_number, ValueError("JSON 형식이 올바르지 않습니다.")
+            continue
+        yield line_number, value if isinstance(value, dict) else ValueError("각 줄은 JSON 객체여야 합니다.")
+
+
+class ImportJobManager:
+    """
+    일괄 가져오기 작업을 만들고, 백그라운드 스레드 하나에서 차례로 처리합니다.
+    Args:
+        import_dir (str): 작업 파일을 둘 디렉터리.
+        storage (StorageBackend): 기록을 저장할 저장소.
+        get_classifier (callable): 감정 분류 모델을 반환하는 함수. 준비될 때까지 기다리며, 사용할 수 없으면 None을 반환합니다.
+        summary_worker (SummaryWorker): 키워드가 없는 일기의 요약을 맡길 작업자.
+        write_rows (int): 한 번에 분석하고 저장소에 쓰는 기록 수.
+        max_entries (int): 한 작업의 최대 기록 수.
+    """
+
+    def __init__(self, import_dir, storage, get_classifier, summary_worker, write_rows, max_entries):
+        self.import_dir = import_dir
+        self.storage = storage
+        self.get_classifier = get_classifier
+        self.summary_worker = summary_worker
+        self.write_rows = max(1, write_rows)
+        self.max_entries = max_entries
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.write_latency = LatencyWindow()
+        self.completed = 0
+        self.failed = 0
+        self.imported = 0
+
+    # --- 작업 파일 ---
+
+    def _path(self, job_id, name):
+        return os.path.join(self.import_dir, job_id, name)
+
+    def load_state(self, job_id):
+        """작업 상태를 반환합니다. 없는 작업이면 None을 반환합니다."""
+        # 경로 밖을 가리키는 id를 막기 위해 uuid hex 형식만 받습니다.
+        if not (len(job_id) == 32 and all(c in '0123456789abcdef' for c in job_id)):
+            return None
+        try:
+            with open(self._path(job_id, 'state.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, state):
+        # 임시 파일에 쓴 뒤 바꿔 넣으므로, 쓰는 도중 종료되어도 이전 상태가 남습니다.
+        state['updated_at'] = time.time()
+        path = self._path(state['id'], 'state.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    # --- 작업 만들기 / 조회 ---
+
+    def create(self, user_id, binary_stream, fmt):
+        """
+        업로드한 파일을 읽어 작업을 만들고 대기열에 넣습니다. 파일 전체를 메모리에 올리지 않고 한 줄씩 옮겨 씁니다.
+        Returns:
+            dict: 작업 상태.
+        Raises:
+            ImportFormatError, ImportTooLargeError
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.import_dir, job_id)
+        os.makedirs(job_dir)
+        try:
+            total, skipped, errors = self._copy_entries(binary_stream, fmt, job_dir)
+        except UnicodeDecodeError:
+            self._discard(job_id)
+            raise ImportFormatError("파일은 UTF-8로 인코딩되어 있어야 합니다.")
+        except csv.Error as e:
+            self._discard(job_id)
+            raise ImportFormatError(f"CSV 형식이 올바르지 않습니다: {e}")
+        except Exception:
+            self._discard(job_id)
+            raise
+
+        state = {
+            "id": job_id, "user_id": user_id, "status": "queued", "format": fmt,
+            "total": total, "done": 0, "imported": 0, "skipped": skipped, "errors": errors,
+            "summaries_queued": 0, "summaries_skipped": 0, "runs": 0, "pending_count": None, "error": None,
+            "created_at": time.time(), "updated_at": None,
+        }
+        self._save_state(state)
+        logger.info("가져오기 작업 %s 생성 - 사용자 '%s', 기록 %s개, 건너뛴 줄 %s개", job_id, user_id, total, skipped)
+        self._enqueue(job_id)
+        return state
+
+    def _copy_entries(self, binary_stream, fmt, job_dir):
+        """업로드한 파일의 기록을 정리해 entries.jsonl에 씁니다. (기록 수, 건너뛴 줄 수, 오류 목록)을 반환합니다."""
+        # 날짜가 없는 기록은 업로드 시각을 사용합니다. 미리 정해 두어야 이어서 처리할 때 같은 값이 됩니다.
+        default_timestamp = datetime.now().strftime('%Y-%m-%d-%H:%M')
+        total, skipped, errors = 0, 0, []
+        text_stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+        with open(os.path.join(job_dir, 'entries.jsonl'), 'w', encoding='utf-8') as out:
+            for line_number, raw in parse_entries(text_stream, fmt):
+                try:
+                    if isinstance(raw, ValueError):
+                        raise raw
+                    entry = _normalize_entry(raw, default_timestamp)
+                except ValueError as e:
+                    skipped += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"line": line_number, "message": str(e)})
+                    continue
+                total += 1
+                if total > self.max_entries:
+                    raise ImportTooLargeError(f"한 번에 가져올 수 있는 기록은 최대 {self.max_entries}개입니다.")
+                out.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        if total == 0:
+            raise ImportFormatError("가져올 일기가 없습니다.")
+        return total, skipped, errors
+
+    def _discard(self, job_id):
+        job_dir = os.path.join(self.import_dir, job_id)
+        for name in os.listdir(job_dir):
+            os.remove(os.path.join(job_dir, name))
+        os.rmdir(job_dir)
+
+    def resume(self, job_id):
+        """실패했거나 중단된 작업을 다시 대기열에 넣습니다. 이미 완료된 작업이면 False를 반환합니다."""
+        state = self.load_state(job_id)
+        if state is None or state['status'] == 'completed':
+            return False
+        self._enqueue(job_id)
+        return True
+
+    # --- 백그라운드 처리 ---
+
+    def start(self):
+        """작업 스레드를 시작하고, 지난 실행에서 끝나지 않은 작업을 다시 대기열에 넣습니다."""
+        os.makedirs(self.import_dir, exist_ok=True)
+        for job_id in sorted(os.listdir(self.import_dir)):
+            state = self.load_state(job_id)
+            if state is not None and state['status'] in ('queued', 'running'):
+                logger.info("끝나지 않은 가져오기 작업 %s를 이어서 처리합니다 (%s/%s).", job_id, state['done'], state['total'])
+                self._enqueue(job_id)
+
+    def _enqueue(self, job_id):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='import-worker', daemon=True)
+                self._thread.start()
+        self._queue.put(job_id)
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            # 다른 워커 프로세스가 같은 작업을 처리하고 있으면 건너뜁니다.
+            try:
+                lock_file = open(self._path(job_id, 'lock'), 'a')
+            except OSError:
+                continue
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            try:
+                self._process(job_id)
+            finally:
+                lock_file.close()
+
+    def _fail(self, state, message):
+        state['status'] = 'failed'
+        state['error'] = message
+        self._save_state(state)
+        self.failed += 1
+        logger.error("가져오기 작업 %s 실패 (%s/%s): %s", state['id'], state['done'], state['total'], message)
+
+    def _process(self, job_id):
+        state = self.load_state(job_id)
+        if state is None or state['status'] == 'completed':
+            return
+        classifier = self.get_classifier()
+        if classifier is None:
+            self._fail(state, "감정 분류 모델을 사용할 수 없습니다.")
+            return
+        state.update(status='running', error=None, runs=state['runs'] + 1)
+        self._save_state(state)
+
+        with open(self._path(job_id, 'entries.jsonl'), encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f][state['done']:]
+        try:
+            for start in range(0, len(entries), self.write_rows):
+                chunk = entries[start:start + self.write_rows]
+                if state.get('pending_count') is not None:
+                    chunk = self._skip_written(state, chunk)
+                error = self._write_chunk(state, chunk, classifier)
+                if error:
+                    self._fail(state, error)
+                    return
+                state['done'] += len(chunk)
+                state['pending_count'] = None
+                self._save_state(state)
+        except Exception as e:
+            self._fail(state, str(e))
+            return
+        state['status'] = 'completed'
+        self._save_state(state)
+        self.completed += 1
+        logger.info("가져오기 작업 %s 완료 - 기록 %s개", job_id, state['imported'])
+
+    def _skip_written(self, state, chunk):
+        """
+        이전 실행이 이 묶음을 쓰는 도중이나 쓴 직후(진행 상황을 저장하기 전)에 중단되었다면, 이미 저장된 앞쪽 기록을
+        진행 상황에 반영하고 나머지만 반환합니다. 저장된 수는 쓰기 직전에 남긴 기록 수(pending_count)와 지금의 기록 수의 차이입니다.
+        """
+        version_info, status_code = self.storage.get_version(state['user_id'])
+        if status_code != 200:
+            raise RuntimeError(version_info.get('message', '기록 버전을 확인하지 못했습니다.'))
+        # 그 사이에 사용자가 직접 쓰거나 지운 기록이 있을 수 있으므로 묶음 크기 안으로 제한합니다.
+        written = min(max(version_info['count'] - state['pending_count'], 0), len(chunk))
+        if written:
+            logger.info("가져오기 작업 %s - 이전 실행에서 이미 저장된 기록 %s개를 건너뜁니다.", state['id'], written)
+        state['done'] += written
+        state['imported'] += written
+        self.imported += written
+        state['pending_count'] = None
+        self._save_state(state)
+        return chunk[written:]
+
+    def _write_chunk(self, state, chunk, classifier):
+        """묶음 하나를 분석하고 저장합니다. 실패하면 오류 메시지를 반환합니다."""
+        if not chunk:
+            return None
+        user_id = state['user_id']
+        analyses = analyze_batch([entry['text'] for entry in chunk], classifier)
+
+        # 위치가 없는 기록은 공간 인덱스에서 다른 구체와 겹치지 않는 위치를 받습니다.
+        version_info, status_code = self.storage.get_version(user_id)
+        if status_code != 200:
+            return version_info.get('message', '기록 버전을 확인하지 못했습니다.')
+        key = (version_info['version'], version_info['count'])
+
+        def load_records():
+            result, list_status = self.storage.list_records(user_id)
+            return result['records'] if list_status == 200 else None
+
+        items = []
+        for entry, analysis in zip(chunk, analyses):
+            position = entry['position'] or spatial_index.suggest(user_id, key, load_records)
+            if position is None:
+                return "기록을 불러오지 못해 위치를 정할 수 없습니다."
+            items.append({
+                "text": entry['text'], "emotion": analysis['emotion'], "category": analysis['category'],
+                "timestamp": entry['timestamp'], "position": position, "needs_summary": analysis['needs_summary'],
+            })
+
+        # 쓰는 도중이나 직후에 중단되어도 이어서 처리할 때 이미 저장된 수를 알 수 있도록, 쓰기 전의 기록 수를 남겨 둡니다.
+        state['pending_count'] = version_info['count']
+        self._save_state(state)
+        started = time.perf_counter()
+        result = self.storage.append_records(user_id, items)
+        if result["status"] == "error":
+            return result["message"]
+        self.write_latency.add(time.perf_counter() - started)
+        state['imported'] += len(items)
+        self.imported += len(items)
+
+        for item, row_number in zip(items, result['rows']):
+            if not item['needs_summary'] or row_number is None:
+                continue
+            submitted = self.summary_worker.submit(
+                item['text'], lambda summary, row_number=row_number: self.storage.attach_summary(user_id, row_number, summary)
+            )
+            state['summaries_queued' if submitted else 'summaries_skipped'] += 1
+        return None
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "imported": self.imported,
+            "write_latency": self.write_latency.summary(),
+        }
+
+
+def _job_view(state):
+    view = {key: value for key, value in state.items() if key != 'user_id'}
+    view['percent'] = round(100.0 * state['done'] / state['total'], 1) if state['total'] else 100.0
+    return view
+
+
+def add_import_routes(app, import_jobs, get_user_id):
+    """일괄 가져오기 라우트를 추가합니다."""
+
+    def owned_state(job_id, user_email):
+        user_id = get_user_id(user_email) if user_email else None
+        state = import_jobs.load_state(job_id) if user_id else None
+        # 다른 사용자의 작업은 없는 작업과 같이 취급합니다.
+        return state if state is not None and state['user_id'] == user_id else None
+
+    @app.route('/imports', methods=['POST'])
+    def create_import():
+        """
+        CSV 또는 JSONL 파일로 일기를 한꺼번에 가져오는 작업을 만듭니다.
+        multipart 업로드(file 필드) 또는 요청 본문 그대로 보낼 수 있습니다.
+        쿼리 파라미터: user_email (필수), format ('csv' | 'jsonl', 생략하면 파일 확장자나 Content-Type으로 판단)
+        CSV는 text(또는 diary, content, 일기 등) 열이 필요하고, timestamp, x, y, z 열은 선택입니다.
+        JSONL은 한 줄에 {"text": ..., "timestamp": ..., "position": {"x", "y", "z"}} 객체 하나입니다.
+        """
+        user_email = request.values.get('user_email', '')
+        if not user_email.strip():
+            return jsonify({"status": "error", "message": "사용자 이메일이 비어 있습니다."}), 400
+        user_id = get_user_id(user_email)
+        if not user_id:
+            return jsonify({"status": "error", "message": "사용자를 찾을 수 없습니다."}), 404
+
+        upload = request.files.get('file')
+        stream = upload.stream if upload else request.stream
+        fmt = request.values.get('format')
+        if not fmt and upload and upload.filename:
+            fmt = upload.filename.rsplit('.', 1)[-1].lower()
+        if not fmt:
+            fmt = CONTENT_TYPES.get(request.mimetype)
+        if fmt not in FORMATS:
+            return jsonify({"status": "error", "message": "format은 'csv' 또는 'jsonl'이어야 합니다."}), 400
+
+        try:
+            state = import_jobs.create(user_id, stream, FORMATS[fmt])
+        except ImportTooLargeError as e:
+            return jsonify({"status": "error", "message": str(e)}), 413
+        except ImportFormatError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        response = jsonify({"status": "accepted", "job": _job_view(state)})
+        response.headers['Location'] = f"/imports/{state['id']}"
+        return response, 202
+
+    @app.route('/imports/<job_id>', methods=['GET'])
+    def get_import(job_id):
+        """가져오기 작업의 상태와 진행률(done/total, percent)을 반환합니다."""
+        state = owned_state(job_id, request.args.get('user_email'))
+        if state is None:
+            return jsonify({"status": "error", "message": "가져오기 작업을 찾을 수 없습니다."}), 404
+        return jsonify({"status": "success", "job": _job_view(state)})
+
+    @app.route('/imports/<job_id>/resume', methods=['POST'])
+    def resume_import(job_id):
+        """실패했거나 중단된 가져오기 작업을 마지막으로 저장한 위치부터 다시 처리합니다."""
+        state = owned_state(job_id, request.values.get('user_email'))
+        if state is None:
+            return jsonify({"status": "error", "message": "가져오기 작업을 찾을 수 없습니다."}), 404
+        if not import_jobs.resume(job_id):
+            return jsonify({"status": "error", "message": "이미 완료된 작업입니다."}), 409
+        return jsonify({"status": "accepted", "job": _job_view(state)}), 202
@@ -0,0 +1,170 @@
+import logging
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# 여러 요청의 입력을 모아 한 번의 배치로 모델에 넣는 스케줄러입니다.
+# 요청마다 배치 크기 1로 모델을 호출하면 CPU 연산이 서로 경쟁하고 배치 처리 이점을 얻지 못하므로,
+# 전용 워커 스레드 하나가 대기열의 입력을 최대 max_wait_ms 동안(또는 배치가 찰 때까지) 모아서 처리합니다.
+
+
+class QueueFullError(RuntimeError):
+    """대기열이 가득 차서 요청을 받을 수 없을 때 발생합니다."""
+
+
+class BatchScheduler:
+    """
+    입력 하나를 제출하면 배치 처리 결과 중 자신의 결과를 돌려받는 스케줄러입니다.
+    Args:
+        batch_fn (callable): 입력 리스트를 받아 같은 길이의 결과 리스트를 반환하는 함수.
+        max_batch_size (int): 한 배치에 넣을 최대 입력 수.
+        max_wait_ms (float): 첫 입력이 들어온 뒤 배치를 채우기 위해 기다리는 최대 시간 (밀리초).
+        max_queue_depth (int): 대기열에 쌓아둘 수 있는 최대 입력 수.
+    """
+
+    def __init__(self, batch_fn, max_batch_size, max_wait_ms, max_queue_depth, name='batch-scheduler'):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue(maxsize=max(1, max_queue_depth))
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.max_batch_seen = 0
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item, timeout=None):
+        """
+        입력 하나를 대기열에 넣고 결과가 나올 때까지 기다립니다.
+        Raises:
+            QueueFullError: 대기열이 가득 찬 경우.
+            TimeoutError: timeout 안에 결과가 나오지 않은 경우.
+        """
+        future = self._enqueue(item)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._cancel([future])
+            raise TimeoutError(f"분석 결과를 {timeout}초 안에 받지 못했습니다.")
+
+    async def submit_async(self, item, timeout=None):
+        """
+        submit()의 비동기 버전입니다. 결과를 기다리는 동안 스레드를 점유하지 않고 이벤트 루프에 제어를 돌려줍니다.
+        Raises:
+            QueueFullError: 대기열이 가득 찬 경우.
+            TimeoutError: timeout 안에 결과가 나오지 않은 경우.
+        """
+        future = self._enqueue(item)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._cancel([future])
+            raise TimeoutError(f"분석 결과를 {timeout}초 안에 받지 못했습니다.")
+
+    def _enqueue(self, item):
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFullError(f"분석 대기열이 가득 찼습니다 (최대 {self._queue.maxsize}건). 잠시 후 다시 시도해주세요.")
+        return future
+
+    def submit_many(self, items, timeout=None):
+        """
+        여러 입력을 대기열에 넣고 모든 결과를 입력 순서대로 반환합니다. 일괄 가져오기 같은 백그라운드 작업용입니다.
+        대기열이 가득 차 있으면 거절하지 않고 자리가 날 때까지 기다리므로, 호출하는 쪽에서 한 번에 넣는 수를
+        max_batch_size 정도로 나눠야 같은 대기열을 쓰는 요청들이 거절되지 않습니다.
+        Raises:
+            TimeoutError: timeout 안에 결과가 나오지 않은 경우.
+        """
+        futures = []
+        for item in items:
+            future = Future()
+            try:
+                self._queue.put((item, future), timeout=timeout)
+            except queue.Full:
+                raise TimeoutError(f"분석 대기열에 {timeout}초 동안 자리가 나지 않았습니다.")
+            futures.append(future)
+        try:
+            return [future.result(timeout=timeout) for future in futures]
+        except FutureTimeoutError:
+            self._cancel(futures)
+            raise TimeoutError(f"분석 결과를 {timeout}초 안에 받지 못했습니다.")
+
+    def _cancel(self, futures):
+        # 결과를 기다리는 쪽이 없어진 입력이 배치 자리를 차지하거나 추론되지 않도록 취소합니다.
+        # 이미 배치에 들어가 실행 중인 입력은 취소되지 않습니다.
+        cancelled = sum(1 for future in futures if future.cancel())
+        if cancelled:
+            with self._lock:
+                self.cancelled += cancelled
+
+    def _collect(self):
+        # 첫 입력이 들어올 때까지 기다린 뒤, 마감 시간까지 배치를 채웁니다.
+        # 기다리다 취소된 입력은 배치 자리를 차지하지 않도록 건너뜁니다.
+        entry = self._queue.get()
+        while entry[1].cancelled():
+            entry = self._queue.get()
+        batch = [entry]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    entry = self._queue.get_nowait()
+                else:
+                    entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if not entry[1].cancelled():
+                batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # 배치를 모은 뒤 실행 직전까지 사이에 취소된 요청도 제외합니다.
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"배치 결과 수({len(results)})가 입력 수({len(items)})와 다릅니다.")
+            except Exception as e:
+                logger.error("배치 추론 중 오류가 발생했습니다: %s", e)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            with self._lock:
+                self.batches += 1
+                self.items += len(items)
+                self.max_batch_seen = max(self.max_batch_seen, len(items))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._queue.maxsize,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else None,
+                "max_batch_seen": self.max_batch_seen,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+            }
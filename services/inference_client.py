@@ -0,0 +1,226 @@
+import logging
+import json
+import socket
+import threading
+import time
+from services.latency import LatencyWindow
+from services.settings import (
+    INFERENCE_SERVER_SOCKET, INFERENCE_CLIENT_TIMEOUT_SECONDS, INFERENCE_SERVER_CONNECT_WAIT, INFERENCE_SERVER_RETRY_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# 별도 프로세스로 실행하는 추론 서버(services/inference_server.py)의 클라이언트입니다.
+# Flask 워커는 모델을 직접 로드하지 않고 Unix 소켓으로 서버에 분류/요약을 요청하므로,
+# 워커를 늘려도 모델 메모리는 서버 한 곳에만 있습니다.
+# 서버에 연결할 수 없거나 서버에 모델이 없으면 RemoteModel이 기존처럼 프로세스 안에서 모델을 로드해 사용합니다.
+# 응답이 늦는 것은 서버가 바쁜 것이므로 프로세스 안의 모델로 바꾸지 않고 InferenceTimeoutError로 알립니다.
+#
+# 프로토콜: 요청/응답 모두 한 줄에 JSON 하나
+#   {"op": "ping"}                       -> {"ok": true, "models": {"emotion": "ready", ...}, "pid": ..., "workers": ...}
+#   {"op": "classify", "texts": [...]}   -> {"ok": true, "results": [{"label": ..., "score": ...}, ...]}
+#   {"op": "summarize", "text": "..."}   -> {"ok": true, "summary": "..."}
+#   실패 시                              -> {"ok": false, "error": "...", "unavailable": true | false, "timeout": true | false}
+
+
+class InferenceUnavailableError(RuntimeError):
+    """추론 서버에 연결할 수 없거나, 서버에 해당 모델이 없을 때 발생합니다."""
+
+
+class InferenceTimeoutError(TimeoutError):
+    """추론 서버가 요청을 받았지만 시간 안에 결과를 주지 못했을 때 발생합니다 (서버 과부하)."""
+
+
+class InferenceClient:
+    """
+    스레드마다 연결 하나를 유지하며 추론 서버에 요청을 보냅니다.
+    Args:
+        socket_path (str): 서버의 Unix 소켓 경로.
+        timeout (float): 요청 하나의 최대 대기 시간 (초). 서버 쪽의 추론 대기 시간보다 길어야 합니다.
+    """
+
+    def __init__(self, socket_path, timeout):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.latency = LatencyWindow()
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.fallbacks = 0
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock, sock.makefile('rb')
+
+    def _close(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            for closable in reversed(connection):
+                try:
+                    closable.close()
+                except OSError:
+                    pass
+
+    def _count_error(self, timeout=False):
+        with self._lock:
+            self.errors += 1
+            if timeout:
+                self.timeouts += 1
+
+    def _request(self, message):
+        payload = (json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8')
+        started = time.perf_counter()
+        for attempt in range(2):
+            reused = getattr(self._local, 'connection', None) is not None
+            if not reused:
+                try:
+                    self._local.connection = self._connect()
+                except OSError as e:
+                    self._close()
+                    self._count_error()
+                    raise InferenceUnavailableError(f"추론 서버({self.socket_path})에 연결하지 못했습니다: {e}") from e
+            sock, reader = self._local.connection
+            try:
+                sock.sendall(payload)
+                line = reader.readline()
+            except socket.timeout as e:
+                # 요청을 보낸 뒤 응답이 늦은 것이므로 같은 요청을 다시 보내지 않습니다. 늦게 오는 응답이 다음 요청의
+                # 응답으로 읽히지 않도록 연결은 닫습니다.
+                self._close()
+                self._count_error(timeout=True)
+                raise InferenceTimeoutError(f"추론 서버가 {self.timeout}초 안에 응답하지 않았습니다.") from e
+            except OSError as e:
+                # 끊긴 연결에 보냈거나 (broken pipe, reset) 읽는 중에 끊긴 경우입니다.
+                line, error = b'', e
+            else:
+                error = "응답 전에 연결이 닫혔습니다."
+            if line:
+                break
+            self._close()
+            # 이전에 열어 둔 연결은 서버 워커가 재시작되어 끊겼을 수 있으므로 새 연결로 한 번 더 시도합니다.
+            if reused and attempt == 0:
+                continue
+            self._count_error()
+            raise RuntimeError(f"추론 서버({self.socket_path})의 응답을 받지 못했습니다: {error}")
+        try:
+            response = json.loads(line)
+        except ValueError as e:
+            self._close()
+            self._count_error()
+            raise RuntimeError(f"추론 서버의 응답을 해석하지 못했습니다: {e}") from e
+        with self._lock:
+            self.calls += 1
+        self.latency.add(time.perf_counter() - started)
+        if not response.get('ok'):
+            if response.get('unavailable'):
+                raise InferenceUnavailableError(response.get('error'))
+            if response.get('timeout'):
+                with self._lock:
+                    self.timeouts += 1
+                raise InferenceTimeoutError(response.get('error'))
+            raise RuntimeError(f"추론 서버 오류: {response.get('error')}")
+        return response
+
+    def ping(self):
+        """서버 상태를 반환합니다. 연결할 수 없으면 None을 반환합니다."""
+        try:
+            return self._request({"op": "ping"})
+        except (InferenceUnavailableError, InferenceTimeoutError, RuntimeError):
+            return None
+
+    def classify(self, texts):
+        return self._request({"op": "classify", "texts": list(texts)})['results']
+
+    def summarize(self, text):
+        return self._request({"op": "summarize", "text": text})['summary']
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "socket": self.socket_path,
+                "calls": self.calls,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "fallbacks": self.fallbacks,
+                "latency": self.latency.summary(),
+            }
+
+
+class RemoteModel:
+    """
+    추론 서버의 모델을 transformers 파이프라인과 같은 방식으로 호출할 수 있게 감싼 객체입니다.
+    서버에 연결할 수 없거나 서버가 모델이 없다고 알리면 fallback_loader로 프로세스 안에 모델을 로드해(처음 한 번)
+    그 결과를 사용하고, retry_seconds가 지나면 다시 서버를 사용해 봅니다.
+    시간 초과(InferenceTimeoutError)나 다른 오류는 그대로 호출한 쪽에 전달합니다.
+    Args:
+        kind (str): 'emotion' 또는 'summarizer'.
+    """
+
+    def __init__(self, client, kind, fallback_loader, retry_seconds):
+        self.client = client
+        self.kind = kind
+        self.fallback_loader = fallback_loader
+        self.retry_seconds = retry_seconds
+        self._local_model = None
+        self._local_lock = threading.Lock()
+        self._retry_at = 0.0
+
+    def _local(self):
+        with self._local_lock:
+            if self._local_model is None:
+                logger.info("추론 서버 대신 프로세스 안에서 '%s' 모델을 로드합니다.", self.kind)
+                self._local_model = self.fallback_loader()
+            return self._local_model
+
+    def __call__(self, inputs, **kwargs):
+        if time.monotonic() >= self._retry_at:
+            try:
+                if self.kind == 'emotion':
+                    texts = [inputs] if isinstance(inputs, str) else list(inputs)
+                    return self.client.classify(texts)
+                return [{"summary_text": self.client.summarize(inputs)}]
+            except InferenceUnavailableError as e:
+                logger.error("%s %s초 동안 프로세스 안의 모델을 사용합니다.", e, self.retry_seconds)
+                self._retry_at = time.monotonic() + self.retry_seconds
+        self.client.record_fallback()
+        return self._local()(inputs, **kwargs)
+
+
+def remote_loader(kind, fallback_loader):
+    """
+    ModelLoader에 등록할 로더를 만듭니다. 추론 서버가 해당 모델을 준비할 때까지 INFERENCE_SERVER_CONNECT_WAIT초 기다린 뒤
+    RemoteModel을 반환하고, 끝내 연결할 수 없거나 서버에 모델이 없으면 fallback_loader로 프로세스 안에서 로드합니다.
+    """
+    def load():
+        deadline = time.monotonic() + INFERENCE_SERVER_CONNECT_WAIT
+        while True:
+            info = inference_client.ping()
+            if info is not None:
+                state = info.get('models', {}).get(kind)
+                if state == 'ready':
+                    logger.info("추론 서버(pid %s, 워커 %s개)의 '%s' 모델을 사용합니다.", info.get('pid'), info.get('workers'), kind)
+                    return RemoteModel(inference_client, kind, fallback_loader, INFERENCE_SERVER_RETRY_SECONDS)
+                logger.warning("추론 서버에 '%s' 모델이 없어(%s) 프로세스 안에서 로드합니다.", kind, state)
+                return fallback_loader()
+            if time.monotonic() >= deadline:
+                logger.error("추론 서버(%s)에 연결할 수 없어 프로세스 안에서 '%s' 모델을 로드합니다.", INFERENCE_SERVER_SOCKET, kind)
+                return fallback_loader()
+            time.sleep(1.0)
+    return load
+
+
+def get_inference_client_stats():
+    return inference_client.stats() if inference_client else {"enabled": False}
+
+
+# INFERENCE_SERVER_SOCKET이 설정되어 있을 때만 추론 서버를 사용합니다.
+inference_client = InferenceClient(INFERENCE_SERVER_SOCKET, INFERENCE_CLIENT_TIMEOUT_SECONDS) if INFERENCE_SERVER_SOCKET else None
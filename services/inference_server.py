@@ -0,0 +1,205 @@
+"""
+감정 분류(KoELECTRA)와 요약(KoBART) 모델을 한 번만 로드해 여러 Flask 워커가 함께 쓰는 로컬 추론 서버입니다.
+
+사용법 (프로젝트 최상위 폴더에서):
+    python -m services.inference_server --socket data/inference.sock --workers 2
+
+모델을 로드한 뒤 워커 프로세스를 fork하므로, 모델 가중치는 copy-on-write로 워커끼리 공유되어 한 번만 메모리를 차지합니다.
+워커들은 같은 Unix 소켓에서 연결을 받고, 워커 안에서는 동시에 들어온 분류 요청을 BatchScheduler로 묶어서 처리합니다.
+Flask 쪽은 INFERENCE_SERVER_SOCKET에 같은 경로를 설정하면 services/inference_client.py를 통해 이 서버를 사용합니다.
+워커 프로세스가 비정상 종료되면 부모 프로세스가 다시 fork합니다.
+"""
+import logging
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.analyzer import load_emotion_model, load_summarizer_model, _classify_batch, _set_num_threads
+from services.inference import BatchScheduler
+from services.log import configure_logging
+from services.settings import (
+    INFERENCE_SERVER_SOCKET, INFERENCE_SERVER_WORKERS,
+    INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS, INFERENCE_MAX_QUEUE_DEPTH, INFERENCE_TIMEOUT_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+
+def load_models():
+    """
+    두 모델을 로드합니다. 로드에 실패한 모델은 None으로 두고, 클라이언트가 프로세스 안에서 로드하도록 알립니다.
+    Returns:
+        dict: {"emotion": 모델 또는 None, "summarizer": 모델 또는 None}
+    """
+    models = {}
+    for kind, loader in (('emotion', load_emotion_model), ('summarizer', load_summarizer_model)):
+        started = time.monotonic()
+        try:
+            models[kind] = loader()
+            logger.info("추론 서버 '%s' 모델 로드 완료 (%.1f초)", kind, time.monotonic() - started)
+        except Exception as e:
+            models[kind] = None
+            logger.error("추론 서버 '%s' 모델 로드에 실패했습니다: %s", kind, e)
+    return models
+
+
+class _Worker:
+    """fork된 워커 프로세스 하나. 연결마다 스레드 하나로 요청을 처리합니다."""
+
+    def __init__(self, listener, models, worker_count):
+        self.listener = listener
+        self.models = models
+        self.worker_count = worker_count
+        self.requests = 0
+        emotion = models['emotion']
+        self.scheduler = BatchScheduler(
+            lambda texts: _classify_batch(emotion, texts),
+            max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=INFERENCE_MAX_WAIT_MS,
+            max_queue_depth=INFERENCE_MAX_QUEUE_DEPTH,
+            name='inference-server-batch'
+        ) if emotion is not None else None
+        # 요약은 생성 단계가 길고 메모리를 많이 쓰므로 워커 안에서는 하나씩 실행합니다.
+        self._summary_lock = threading.Lock()
+
+    def serve_forever(self):
+        while True:
+            connection, _ = self.listener.accept()
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _handle(self, connection):
+        with connection, connection.makefile('rb') as reader:
+            for line in reader:
+                try:
+                    response = self._dispatch(json.loads(line))
+                except ValueError:
+                    response = {"ok": False, "error": "JSON 형식이 올바르지 않습니다."}
+                try:
+                    connection.sendall((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+                except OSError:
+                    return
+
+    def _dispatch(self, message):
+        self.requests += 1
+        op = message.get('op')
+        if op == 'ping':
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "workers": self.worker_count,
+                "requests": self.requests,
+                "models": {kind: ('ready' if model is not None else 'failed') for kind, model in self.models.items()},
+            }
+        try:
+            if op == 'classify':
+                if self.scheduler is None:
+                    return {"ok": False, "unavailable": True, "error": "감정 분류 모델이 로드되지 않았습니다."}
+                results = self.scheduler.submit_many(message['texts'], timeout=INFERENCE_TIMEOUT_SECONDS)
+                return {"ok": True, "results": [{"label": r['label'], "score": float(r['score'])} for r in results]}
+            if op == 'summarize':
+                summarizer = self.models['summarizer']
+                if summarizer is None:
+                    return {"ok": False, "unavailable": True, "error": "요약 모델이 로드되지 않았습니다."}
+                # 요약은 한 번에 하나씩 만들므로, 차례를 기다리는 시간도 분류와 같은 한도로 제한합니다.
+                if not self._summary_lock.acquire(timeout=INFERENCE_TIMEOUT_SECONDS):
+                    raise TimeoutError(f"요약 차례를 {INFERENCE_TIMEOUT_SECONDS}초 동안 기다렸지만 받지 못했습니다.")
+                try:
+                    return {"ok": True, "summary": summarizer(message['text'])[0]['summary_text']}
+                finally:
+                    self._summary_lock.release()
+        except (TimeoutError, FutureTimeoutError) as e:
+            # 서버가 바쁜 것이므로, 클라이언트가 프로세스 안의 모델로 바꾸지 않고 시간 초과로 처리하도록 알립니다.
+            logger.warning("추론 서버 요청이 시간 안에 끝나지 않았습니다 (%s): %s", op, e)
+            return {"ok": False, "timeout": True, "error": str(e) or "추론 시간이 초과되었습니다."}
+        except Exception as e:
+            logger.error("추론 서버 요청 처리 중 오류가 발생했습니다: %s", e)
+            return {"ok": False, "error": str(e)}
+        return {"ok": False, "error": f"알 수 없는 요청입니다: {op!r}"}
+
+
+def _fork_worker(listener, models, worker_count):
+    pid = os.fork()
+    if pid:
+        return pid
+    # 자식 프로세스: 부모의 종료 처리기를 쓰지 않고, 연산 스레드 풀을 이 프로세스에서 새로 설정합니다.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    try:
+        _set_num_threads()
+        _Worker(listener, models, worker_count).serve_forever()
+    finally:
+        os._exit(1)
+
+
+def serve(socket_path, worker_count):
+    """모델을 로드하고 소켓을 연 뒤 워커 프로세스들을 fork해 관리합니다. 종료 신호를 받을 때까지 반환하지 않습니다."""
+    models = load_models()
+    # fork 이후 GC가 모델 객체의 참조 정보를 건드려 공유 페이지가 복사되지 않도록, 지금까지 만든 객체를 GC 대상에서 뺍니다.
+    gc.freeze()
+
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    os.chmod(socket_path, 0o660)
+    listener.listen(128)
+
+    children = {_fork_worker(listener, models, worker_count) for _ in range(max(1, worker_count))}
+    logger.info("추론 서버 시작 - 소켓 %s, 워커 %s개 (pid %s)", socket_path, len(children), sorted(children))
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            children.discard(pid)
+            if not stopping:
+                logger.error("추론 서버 워커(pid %s)가 종료되어 다시 시작합니다 (status %s).", pid, status)
+                time.sleep(1.0)
+                # 기다리는 사이에 종료 신호를 받았으면 다시 fork하지 않습니다.
+                if not stopping:
+                    children.add(_fork_worker(listener, models, worker_count))
+    finally:
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        logger.info("추론 서버를 종료했습니다.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--socket', default=INFERENCE_SERVER_SOCKET or os.path.join('data', 'inference.sock'),
+                        help='Unix 소켓 경로 (기본값: INFERENCE_SERVER_SOCKET 설정 또는 data/inference.sock)')
+    parser.add_argument('--workers', type=int, default=INFERENCE_SERVER_WORKERS, help='워커 프로세스 수')
+    args = parser.parse_args()
+    configure_logging()
+    serve(args.socket, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import bisect
+import math
+import threading
+from collections import deque
+
+# 최근 요청들의 처리 시간을 보관하고 백분위수(p50/p99 등)를 계산하는 도구입니다.
+
+
+class LatencyWindow:
+    """
+    최근 maxlen개의 측정값(초)을 보관하는 고정 크기 창입니다.
+    오래된 측정값은 자동으로 버려지므로 메모리 사용량이 일정합니다.
+    """
+
+    def __init__(self, maxlen=1000):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def percentile(self, p):
+        """p(0~100) 백분위수를 밀리초 단위로 반환합니다. 측정값이 없으면 None을 반환합니다."""
+        with self._lock:
+            samples = sorted(self._samples)
+        return _percentile(samples, p)
+
+    def summary(self):
+        """전체 측정 횟수와 최근 창의 p50/p99(밀리초)를 반환합니다."""
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+        return {
+            "count": count,
+            "p50_ms": _percentile(samples, 50),
+            "p99_ms": _percentile(samples, 99),
+        }
+
+
+def _percentile(sorted_samples, p):
+    if not sorted_samples:
+        return None
+    # 최근접 순위(nearest-rank) 방식
+    rank = max(1, math.ceil(p / 100.0 * len(sorted_samples)))
+    return round(sorted_samples[min(rank, len(sorted_samples)) - 1] * 1000.0, 2)
+
+
+# 지연 시간 히스토그램의 기본 구간 경계 (밀리초)
+DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    """
+    누적 구간(bucket)별 측정 횟수와 합계를 보관하는 히스토그램입니다.
+    창(window)과 달리 오래된 측정값을 버리지 않으므로 전체 기간의 분포를 볼 때 사용합니다.
+    """
+
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum_seconds = 0.0
+
+    def add(self, seconds):
+        # 경계값과 같은 측정값은 그 구간에 넣습니다 (Prometheus의 le와 같은 기준).
+        index = bisect.bisect_left(self.buckets_ms, seconds * 1000.0)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum_seconds += seconds
+
+    def snapshot(self):
+        """구간 경계(ms, 마지막은 '+Inf')별 누적 횟수와 전체 횟수/합계를 반환합니다."""
+        with self._lock:
+            counts = list(self._counts)
+            total, total_seconds = self.count, self.sum_seconds
+        cumulative = []
+        running = 0
+        for bound, count in zip(list(self.buckets_ms) + ['+Inf'], counts):
+            running += count
+            cumulative.append((bound, running))
+        return {"buckets": cumulative, "count": total, "sum_seconds": round(total_seconds, 6)}
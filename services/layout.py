@@ -0,0 +1,205 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from services.settings import LAYOUT_CACHE_ENTRIES
+from services.spatial_index import neighbor_pairs
+
+# static/js/core/physics.js의 은하계 힘 모델(감정/카테고리 어트랙터의 중력과 궤도 힘, 구체 사이의 반발력)을
+# 서버에서 NumPy 배열 연산으로 계산하는 레이아웃 엔진입니다.
+# 구체마다 JavaScript 객체를 돌며 계산하던 것을 위치/속도 (n, 3) 배열 연산으로 바꾸고,
+# 사용자별 결과를 캐시해 기록이 바뀌었을 때만 다시 계산합니다.
+
+# physics.js의 physicsParams와 같은 이름과 기본값을 사용합니다. 한쪽을 바꾸면 다른 쪽도 같이 바꿔야 합니다.
+DEFAULT_PHYSICS_PARAMS = {
+    'G_FORCE_EMOTION': 0.002,
+    'G_FORCE_CATEGORY': 0.001,
+    'O_FORCE': 0.08,
+    'R_FORCE': 0.1,
+    'MAX_SPEED': 0.5,
+    'DAMPING': 0.98,
+}
+# physics.js의 MIN_DISTANCE (구체 반지름 0.5 * 2.5). 이보다 가까운 구체끼리만 밀어냅니다.
+MIN_DISTANCE = 0.5 * 2.5
+# physics.js의 addAttractor와 같이 어트랙터를 [-10, 10) 정육면체 안에 둡니다.
+ATTRACTOR_RANGE = 10.0
+
+
+def parse_physics_params(values):
+    """
+    physicsParams와 같은 이름의 값들로 파라미터 딕셔너리를 만듭니다. 주어지지 않은 값은 기본값을 사용합니다.
+    Raises:
+        ValueError: 숫자가 아닌 값이 있는 경우.
+    """
+    params = dict(DEFAULT_PHYSICS_PARAMS)
+    for name in DEFAULT_PHYSICS_PARAMS:
+        if values.get(name) is not None:
+            try:
+                params[name] = float(values[name])
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} 값이 숫자가 아닙니다: {values[name]!r}")
+    return params
+
+
+def attractor_position(user_id, attractor_type, name):
+    """
+    사용자, 어트랙터 종류, 이름으로 정해지는 어트랙터 위치를 반환합니다.
+    기기마다 임의로 정하던 위치를 고정해, 어느 기기에서 보든 같은 배치가 되도록 합니다.
+    """
+    digest = hashlib.sha256(f'{user_id}:{attractor_type}:{name}'.encode('utf-8')).digest()
+    rng = np.random.default_rng(int.from_bytes(digest[:8], 'little'))
+    return rng.uniform(-ATTRACTOR_RANGE, ATTRACTOR_RANGE, 3)
+
+
+def _unit(vectors, lengths):
+    # THREE.Vector3.normalize()와 같이 길이가 0인 벡터는 0 벡터로 둡니다.
+    return vectors / np.where(lengths > 0, lengths, 1.0)[:, None]
+
+
+def _attractor_forces(positions, index, attractor_positions, g_force, o_force):
+    """어트랙터 방향의 중력과, 그 방향을 (-z, y, x)로 돌린 궤도 힘을 계산합니다. index가 -1인 구체는 0입니다."""
+    forces = np.zeros_like(positions)
+    mask = index >= 0
+    if not mask.any():
+        return forces
+    direction = attractor_positions[index[mask]] - positions[mask]
+    distance = np.linalg.norm(direction, axis=1)
+    unit = _unit(direction, distance)
+    orbital = np.stack([-unit[:, 2], unit[:, 1], unit[:, 0]], axis=1)
+    forces[mask] = unit * g_force + orbital * (o_force / np.maximum(1.0, distance))[:, None]
+    return forces
+
+
+def _repulsion_forces(positions, r_force):
+    """
+    MIN_DISTANCE보다 가까운 모든 구체 쌍의 반발력 합.
+    공간 해시 격자로 가까운 쌍만 찾으므로 모든 쌍을 비교하지 않고 구체 수에 거의 비례하는 시간에 계산합니다.
+    """
+    n = len(positions)
+    rows, cols = neighbor_pairs(positions, MIN_DISTANCE)
+    if len(rows) == 0:
+        return np.zeros_like(positions)
+    # 자기 자신이나 같은 위치의 쌍은 방향 벡터가 0이라 (THREE.Vector3.normalize()와 같이) 힘이 0이므로 빠져 있습니다.
+    diff = positions[rows] - positions[cols]
+    pair_squared = np.einsum('ij,ij->i', diff, diff)
+    contributions = diff * (r_force / (pair_squared + 0.1) / np.sqrt(pair_squared))[:, None]
+    return np.stack([np.bincount(rows, weights=contributions[:, axis], minlength=n) for axis in range(3)], axis=1)
+
+
+def simulate(positions, velocities, emotion_index, emotion_positions, category_index, category_positions, steps, params):
+    """
+    physics.js의 updatePhysics()를 steps번 반복한 결과를 반환합니다.
+    Args:
+        positions, velocities (ndarray): (n, 3) 배열. 복사본을 만들어 계산합니다.
+        emotion_index, category_index (ndarray): 구체별 어트랙터 번호 (n,). 어트랙터가 없으면 -1.
+        emotion_positions, category_positions (ndarray): (어트랙터 수, 3) 배열.
+    Returns:
+        tuple: (positions, velocities)
+    """
+    positions = np.array(positions, dtype=np.float64)
+    velocities = np.array(velocities, dtype=np.float64)
+    for _ in range(steps):
+        # 1. 모든 힘을 현재 위치 기준으로 계산한 뒤
+        forces = _attractor_forces(positions, emotion_index, emotion_positions, params['G_FORCE_EMOTION'], params['O_FORCE'])
+        forces += _attractor_forces(positions, category_index, category_positions, params['G_FORCE_CATEGORY'], params['O_FORCE'])
+        forces += _repulsion_forces(positions, params['R_FORCE'])
+        # 2. 속도와 위치를 한꺼번에 갱신합니다.
+        velocities += forces
+        velocities *= params['DAMPING']
+        speed = np.linalg.norm(velocities, axis=1)
+        too_fast = speed > params['MAX_SPEED']
+        velocities[too_fast] *= (params['MAX_SPEED'] / speed[too_fast])[:, None]
+        positions += velocities
+    return positions, velocities
+
+
+def _index_attractors(user_id, attractor_type, names):
+    order = list(dict.fromkeys(names))
+    lookup = {name: i for i, name in enumerate(order)}
+    attractor_positions = np.array([attractor_position(user_id, attractor_type, name) for name in order]).reshape(-1, 3)
+    return order, np.array([lookup[name] for name in names], dtype=np.int64), attractor_positions
+
+
+def compute_layout(user_id, records, steps, params, use_category=False):
+    """
+    사용자의 기록으로 레이아웃을 계산합니다.
+    Args:
+        records (list): 저장소의 기록 딕셔너리 목록. position은 저장 당시의 시작 위치로 사용합니다.
+        use_category (bool): 카테고리 어트랙터도 사용할지 여부.
+            현재 화면(app.js)은 감정 어트랙터만 만들기 때문에 기본값은 False입니다.
+    Returns:
+        dict: {"attractors": [...], "positions": [{"id", "x", "y", "z", "vx", "vy", "vz"}, ...], "steps", "seconds"}
+    """
+    started = time.perf_counter()
+    n = len(records)
+    positions = np.array(
+        [[r['position']['x'], r['position']['y'], r['position']['z']] for r in records], dtype=np.float64
+    ).reshape(n, 3)
+    velocities = np.zeros((n, 3))
+
+    emotion_names, emotion_index, emotion_positions = _index_attractors(user_id, 'emotion', [r['emotion'] for r in records])
+    attractors = [
+        {"type": "emotion", "name": name, "position": dict(zip('xyz', emotion_positions[i].tolist()))}
+        for i, name in enumerate(emotion_names)
+    ]
+    if use_category:
+        category_names, category_index, category_positions = _index_attractors(user_id, 'category', [r['category'] for r in records])
+        attractors += [
+            {"type": "category", "name": name, "position": dict(zip('xyz', category_positions[i].tolist()))}
+            for i, name in enumerate(category_names)
+        ]
+    else:
+        category_index, category_positions = np.full(n, -1, dtype=np.int64), np.zeros((0, 3))
+
+    positions, velocities = simulate(
+        positions, velocities, emotion_index, emotion_positions, category_index, category_positions, steps, params
+    )
+    return {
+        "attractors": attractors,
+        "positions": [
+            {"id": r.get('id'), "x": p[0], "y": p[1], "z": p[2], "vx": v[0], "vy": v[1], "vz": v[2]}
+            for r, p, v in zip(records, positions.tolist(), velocities.tolist())
+        ],
+        "steps": steps,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+class LayoutCache:
+    """
+    사용자별로 마지막으로 계산한 레이아웃을 보관합니다.
+    키에 기록의 변경 버전과 수, 계산 조건이 들어가므로 기록이 바뀌면 자연스럽게 다시 계산됩니다.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, key):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, key, layout):
+        with self._lock:
+            self._entries[user_id] = (key, layout)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"users": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# 앱 전체가 공유하는 레이아웃 캐시
+layout_cache = LayoutCache(LAYOUT_CACHE_ENTRIES)
@@ -0,0 +1,34 @@
+import logging
+import sys
+from services.settings import LOG_LEVEL
+
+# 서버 전체의 로그 설정입니다.
+# 각 모듈은 logger = logging.getLogger(__name__)으로 로거를 만들어 쓰고, 진입점(app.py, 추론 서버)이 시작할 때
+# configure_logging()을 한 번 호출합니다. 메시지는 %s 인자로 넘기므로 기록하지 않는 수준의 메시지는 문자열을 만들지 않습니다.
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'
+
+# LOG_LEVEL을 적용할 이 프로젝트의 로거들. 라이브러리(urllib3, transformers 등)의 로그는 WARNING 이상만 기록합니다.
+# python app.py처럼 직접 실행한 모듈의 로거 이름은 '__main__'입니다.
+PROJECT_LOGGERS = ('app', 'asgi', 'services', 'tools', 'bench', '__main__')
+
+
+def configure_logging(level=LOG_LEVEL):
+    """
+    루트 로거에 표준 오류 출력 처리기를 붙이고(이미 있으면 그대로 둡니다) 프로젝트 로거의 수준을 설정합니다.
+    gunicorn이나 uvicorn이 먼저 설정한 처리기가 있으면 그 처리기로 기록됩니다.
+    """
+    resolved = logging.getLevelName(str(level).upper())
+    unknown = not isinstance(resolved, int)
+    if unknown:
+        resolved = logging.INFO
+    root = logging.getLogger()
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.WARNING)
+    for name in PROJECT_LOGGERS:
+        logging.getLogger(name).setLevel(resolved)
+    if unknown:
+        logging.getLogger(__name__).warning("알 수 없는 LOG_LEVEL 값 %r 대신 INFO를 사용합니다.", level)
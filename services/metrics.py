@@ -0,0 +1,189 @@
+import functools
+import random
+import threading
+import time
+from services.latency import LatencyHistogram, DEFAULT_BUCKETS_MS
+from services.settings import METRICS_ENABLED, METRICS_SAMPLE_RATE
+
+# 요청 처리 단계별 지연 시간을 히스토그램으로 모아 /metrics에서 Prometheus 텍스트 형식으로 제공합니다.
+# 느린 /analyze_diary가 사용자 조회, 감정 분류, 요약, 키워드 매칭, 저장소 읽기/쓰기 중 어디에서 시간을 썼는지 구분할 수 있습니다.
+#
+# 단계(stage) 이름
+#   user_lookup       이메일 → user_id 조회 (app.get_user_id_from_sheet)
+#   classifier        요청 하나가 감정 레이블을 받기까지 기다린 시간 (배치 대기 포함, 캐시 적중은 제외)
+#   classifier_batch  배치 하나의 감정 분류 모델 실행 시간
+#   summarizer        요약 모델 실행 시간 (백그라운드)
+#   keyword_match     해시태그/키워드로 카테고리를 정하는 시간
+#   storage_read      저장소 읽기 (get_version, list_records, iter_records 시작, record_columns, changes_since)
+#   storage_write     저장소 쓰기 (create_user, append_record(s), attach_summary)
+#
+# METRICS_ENABLED가 꺼져 있으면 함수를 감싸지 않고 span()은 아무 일도 하지 않는 객체를 돌려주므로 비용이 없습니다.
+# METRICS_SAMPLE_RATE가 1보다 작으면 호출마다 그 확률로만 시간을 잽니다 (_count/_sum도 표본 기준입니다).
+
+# 키워드 매칭이나 캐시된 사용자 조회처럼 1ms 안에 끝나는 단계도 구분되도록 기본 구간 앞에 더 작은 구간을 둡니다 (밀리초)
+STAGE_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5) + DEFAULT_BUCKETS_MS
+
+STORAGE_READ_METHODS = ('get_version', 'list_records', 'iter_records', 'record_columns', 'changes_since')
+STORAGE_WRITE_METHODS = ('create_user', 'append_record', 'append_records', 'attach_summary')
+
+
+class _NoSpan:
+    """측정하지 않는 호출에 쓰는 빈 컨텍스트 매니저 (하나를 공유합니다)."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.add(time.perf_counter() - self.started)
+        return False
+
+
+class StageMetrics:
+    """
+    이름과 레이블별 LatencyHistogram을 보관합니다.
+    Args:
+        enabled (bool): False이면 아무것도 측정하지 않습니다.
+        sample_rate (float): 측정할 호출의 비율 (0~1).
+    """
+
+    def __init__(self, enabled, sample_rate):
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.enabled = enabled and self.sample_rate > 0
+        self._histograms = {}
+        # span()이 호출마다 레이블 튜플을 만들지 않도록 단계 이름으로 히스토그램을 바로 찾습니다.
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, name, labels):
+        key = (name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = LatencyHistogram(STAGE_BUCKETS_MS)
+        return histogram
+
+    def _sampled(self):
+        return self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+
+    def span(self, stage):
+        """with metrics.span('classifier'): ... 처럼 블록의 실행 시간을 해당 단계에 기록합니다."""
+        if not self.enabled or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return _NO_SPAN
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            histogram = self._stages[stage] = self._histogram('stage', (('stage', stage),))
+        return _Span(histogram)
+
+    def timed(self, stage):
+        """함수 실행 시간을 해당 단계에 기록하는 데코레이터. 측정이 꺼져 있으면 함수를 그대로 반환합니다."""
+        def decorator(function):
+            if not self.enabled:
+                return function
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def instrument_storage(self, storage):
+        """저장소 객체의 읽기/쓰기 메서드를 storage_read/storage_write 단계로 감쌉니다."""
+        if not self.enabled:
+            return storage
+        for stage, methods in (('storage_read', STORAGE_READ_METHODS), ('storage_write', STORAGE_WRITE_METHODS)):
+            for method in methods:
+                setattr(storage, method, self.timed(stage)(getattr(storage, method)))
+        return storage
+
+    def start_request(self):
+        """요청 시작 시각을 반환합니다. 이번 요청을 측정하지 않으면 None을 반환합니다."""
+        return time.perf_counter() if self._sampled() else None
+
+    def finish_request(self, started, method, route, status):
+        """start_request()가 돌려준 시각부터 지금까지를 라우트별 요청 처리 시간으로 기록합니다."""
+        if started is None:
+            return
+        labels = (('method', method), ('route', route), ('status', str(status)))
+        self._histogram('request', labels).add(time.perf_counter() - started)
+
+    def snapshot(self):
+        with self._lock:
+            items = list(self._histograms.items())
+        return [(name, labels, histogram.snapshot()) for (name, labels), histogram in items]
+
+
+# 히스토그램 종류별 Prometheus 지표 이름과 설명
+_FAMILIES = {
+    'stage': ('diary_stage_duration_seconds', '요청 처리 단계별 소요 시간'),
+    'request': ('diary_http_request_duration_seconds', '라우트별 요청 처리 시간'),
+    'sheets': ('diary_sheets_call_duration_seconds', 'Google Sheets API 호출 한 번의 소요 시간 (재시도는 각각 기록)'),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+
+
+def _render_histogram(lines, metric, labels, snapshot):
+    prefix = _format_labels(labels)
+    separator = ',' if prefix else ''
+    for bound, count in snapshot['buckets']:
+        le = '+Inf' if bound == '+Inf' else f'{bound / 1000.0:g}'
+        lines.append(f'{metric}_bucket{{{prefix}{separator}le="{le}"}} {count}')
+    lines.append(f'{metric}_sum{{{prefix}}} {snapshot["sum_seconds"]}')
+    lines.append(f'{metric}_count{{{prefix}}} {snapshot["count"]}')
+
+
+def render_prometheus(extra_histograms=()):
+    """
+    수집한 히스토그램을 Prometheus 텍스트 형식(0.0.4)으로 만듭니다.
+    Args:
+        extra_histograms: 다른 모듈이 보관하는 히스토그램 (종류, 레이블 튜플, snapshot()) 목록. 예: Sheets 작업별 지연 시간.
+    """
+    grouped = {}
+    for name, labels, snapshot in list(metrics.snapshot()) + list(extra_histograms):
+        grouped.setdefault(name, []).append((labels, snapshot))
+
+    lines = [
+        '# HELP diary_metrics_sample_rate 지연 시간을 측정하는 호출의 비율 (0이면 측정하지 않음)',
+        '# TYPE diary_metrics_sample_rate gauge',
+        f'diary_metrics_sample_rate {metrics.sample_rate if metrics.enabled else 0}',
+    ]
+    for name, (metric, description) in _FAMILIES.items():
+        series = grouped.get(name)
+        if not series:
+            continue
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} histogram')
+        for labels, snapshot in sorted(series, key=lambda item: item[0]):
+            _render_histogram(lines, metric, labels, snapshot)
+    return '\n'.join(lines) + '\n'
+
+
+# 워커 프로세스 전체가 공유하는 측정기
+metrics = StageMetrics(METRICS_ENABLED, METRICS_SAMPLE_RATE)
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+from services.analyzer import load_emotion_model, load_summarizer_model, EMOTION_MODEL_NAME, SUMMARIZER_MODEL_NAME
+from services.inference_client import inference_client, remote_loader
+from services.settings import EMOTION_BACKEND
+
+logger = logging.getLogger(__name__)
+
+# AI 모델을 백그라운드 스레드에서 로드(warm-up)하는 모듈입니다.
+# 모델 로드가 끝날 때까지 서버 전체가 멈춰 있지 않도록, 모델이 필요 없는 라우트는 바로 응답하고
+# 모델이 필요한 라우트만 준비 상태를 확인합니다.
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class _ModelSlot:
+    __slots__ = ('name', 'model_name', 'loader', 'state', 'model', 'error', 'load_seconds', 'ready_event')
+
+    def __init__(self, name, model_name, loader):
+        self.name = name
+        self.model_name = model_name
+        self.loader = loader
+        self.state = PENDING
+        self.model = None
+        self.error = None
+        self.load_seconds = None
+        self.ready_event = threading.Event()
+
+
+class ModelLoader:
+    """
+    등록된 모델들을 순서대로 백그라운드에서 로드하고 모델별 상태와 로드 시간을 기록합니다.
+    로드가 끝나거나 실패하면 해당 모델을 기다리는 요청을 깨웁니다.
+    """
+
+    def __init__(self):
+        self._slots = {}
+        self._thread = None
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+
+    def register(self, name, model_name, loader):
+        self._slots[name] = _ModelSlot(name, model_name, loader)
+
+    def start(self):
+        """백그라운드 로드를 시작합니다. 이미 시작했다면 아무것도 하지 않습니다."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._load_all, name='model-warmup', daemon=True)
+            self._thread.start()
+
+    def _load_all(self):
+        for slot in self._slots.values():
+            slot.state = LOADING
+            started = time.monotonic()
+            try:
+                slot.model = slot.loader()
+                slot.state = READY
+                logger.info("모델 '%s' 로드 완료 (%.1f초)", slot.model_name, time.monotonic() - started)
+            except Exception as e:
+                slot.error = str(e)
+                slot.state = FAILED
+                logger.error("모델 '%s' 로드에 실패했습니다: %s", slot.model_name, e)
+            finally:
+                slot.load_seconds = round(time.monotonic() - started, 3)
+                slot.ready_event.set()
+
+    def get(self, name):
+        """모델이 준비되었으면 모델을, 아니면 None을 반환합니다."""
+        slot = self._slots[name]
+        return slot.model if slot.state == READY else None
+
+    def wait_for(self, name, timeout):
+        """모델이 준비될 때까지 최대 timeout초 기다린 뒤 get()과 같은 값을 반환합니다."""
+        slot = self._slots[name]
+        if slot.state not in (READY, FAILED) and timeout > 0:
+            slot.ready_event.wait(timeout)
+        return self.get(name)
+
+    def state(self, name):
+        return self._slots[name].state
+
+    def status(self):
+        """모델별 로드 상태, 로드 시간, 오류 메시지를 반환합니다."""
+        return {
+            slot.name: {
+                "model": slot.model_name,
+                "state": slot.state,
+                "load_seconds": slot.load_seconds,
+                "error": slot.error,
+            }
+            for slot in self._slots.values()
+        }
+
+    def uptime(self):
+        return round(time.monotonic() - self.started_at, 3)
+
+
+# 앱 전체가 공유하는 모델 로더. 감정 분류 모델이 먼저 준비되도록 먼저 등록합니다.
+# 추론 서버(INFERENCE_SERVER_SOCKET)를 쓰면 모델 대신 서버 클라이언트를 로드하고, 서버를 쓸 수 없을 때만 프로세스 안에서 모델을 로드합니다.
+if inference_client is not None:
+    load_emotion = remote_loader('emotion', load_emotion_model)
+    load_summarizer = remote_loader('summarizer', load_summarizer_model)
+else:
+    load_emotion, load_summarizer = load_emotion_model, load_summarizer_model
+model_loader = ModelLoader()
+model_loader.register('emotion', f'{EMOTION_MODEL_NAME} ({EMOTION_BACKEND})', load_emotion)
+model_loader.register('summarizer', SUMMARIZER_MODEL_NAME, load_summarizer)
@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import OrderedDict
+from services.settings import RECORD_CACHE_MAX_BYTES, RECORD_CACHE_REVALIDATE_SECONDS
+
+# 사용자별 일기 기록을 메모리에 보관하는 LRU 캐시입니다.
+# 은하계 화면을 열 때마다 시트 전체를 내려받아 파싱하던 것을, 변경이 없으면 메모리에서 바로 돌려주도록 합니다.
+# 기록은 딕셔너리 목록 대신 열 단위(services/record_columns.py)로 보관해 사용자 한 명이 차지하는 메모리를 줄입니다.
+
+
+class _Entry:
+    __slots__ = ('columns', 'row_count', 'size', 'checked_at')
+
+    def __init__(self, columns, row_count, size):
+        self.columns = columns
+        self.row_count = row_count
+        self.size = size
+        self.checked_at = time.monotonic()
+
+
+class RecordCache:
+    """
+    user_id를 키로 기록 열 목록(RecordColumns)과 시트의 행 수(row_count)를 보관합니다.
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 사용자부터 제거합니다.
+    """
+
+    def __init__(self, max_bytes, revalidate_seconds):
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def get(self, user_id):
+        """
+        캐시된 (기록 열 목록, row_count, 재확인 필요 여부)를 반환합니다. 없으면 None을 반환합니다.
+        열 목록은 캐시와 공유하므로 고치지 말고, 기록을 더하려면 copy()한 뒤 더합니다.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            self._entries.move_to_end(user_id)
+            needs_check = time.monotonic() - entry.checked_at > self.revalidate_seconds
+            return entry.columns, entry.row_count, needs_check
+
+    def record_hit(self, revalidated=False):
+        with self._lock:
+            self.hits += 1
+            if revalidated:
+                self.revalidations += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def mark_checked(self, user_id):
+        """시트에 변경이 없음을 확인했을 때 호출하여 재확인 시점을 늦춥니다."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.checked_at = time.monotonic()
+
+    def put(self, user_id, columns, row_count):
+        """시트에서 새로 읽은 기록 열 목록으로 캐시를 채웁니다."""
+        size = columns.estimate_bytes()
+        with self._lock:
+            self._remove(user_id)
+            if size > self.max_bytes:
+                return
+            self._entries[user_id] = _Entry(columns, row_count, size)
+            self.resident_bytes += size
+            self._evict()
+
+    def append(self, user_id, values, row_number=None):
+        """
+        save_to_sheet가 새 기록을 시트에 추가한 뒤 호출합니다 (write-through).
+        Args:
+            values (tuple): RecordColumns.append()의 인자 순서로 된 기록 값.
+            row_number (int): 시트에 실제로 기록된 행 번호. 캐시가 알고 있는 다음 행과 다르면
+                다른 워커가 그 사이에 기록을 추가한 것이므로 캐시를 비웁니다.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            if row_number is not None and row_number != entry.row_count + 1:
+                self._remove(user_id)
+                return
+            entry.columns.append(*values)
+            entry.row_count += 1
+            size = entry.columns.estimate_bytes()
+            self.resident_bytes += size - entry.size
+            entry.size = size
+            self._entries.move_to_end(user_id)
+            self._evict()
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._remove(user_id)
+
+    def _remove(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self.resident_bytes -= entry.size
+
+    def _evict(self):
+        while self.resident_bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self.resident_bytes -= entry.size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._entries),
+                "records": sum(len(entry.columns) for entry in self._entries.values()),
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions,
+            }
+
+
+# 앱 전체가 공유하는 기록 캐시
+record_cache = RecordCache(RECORD_CACHE_MAX_BYTES, RECORD_CACHE_REVALIDATE_SECONDS)
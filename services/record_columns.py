@@ -0,0 +1,234 @@
+import json
+import struct
+import sys
+from array import array
+
+# 일기 기록 목록을 열(column) 단위로 보관하는 표현과, 은하계 화면용 바이너리 전송 형식입니다.
+#
+# 기록마다 딕셔너리(+ position 딕셔너리, float 객체 3개)를 만드는 대신 같은 필드를 배열 하나에 모읍니다.
+#   - id, version: 64비트 정수 배열 (아직 저장되지 않은 기록의 id는 -1로 보관하고 None으로 돌려줍니다)
+#   - 위치: x, y, z를 이어 붙인 64비트 실수 배열 (JSON 응답이 이전과 같은 값을 내도록 메모리에서는 정밀도를 줄이지 않습니다)
+#   - 감정/카테고리: 종류가 몇 개뿐이므로 이름 목록 + 16비트 번호 배열 (사전 인코딩)
+#   - timestamp, text: 문자열 목록, summary: 요약이 있는 기록만 {순번: 요약}
+# 열 목록은 뒤에 덧붙이기만 합니다. 모든 열을 덧붙인 뒤 기록 수를 늘리므로, 다른 스레드가 덧붙이는 중에도
+# 읽기 시작할 때의 len()까지는 항상 완전한 기록입니다. 기록을 바꾸거나 지워야 하면 새 열 목록을 만듭니다.
+
+# 바이너리 형식 (모든 값은 little-endian)
+#   헤더 16바이트: 'DRC1', 기록 수 n (uint32), 메타데이터 길이 m (uint32), 예약 (uint32, 0)
+#   version  float64 × n   Sheets의 버전은 밀리초 시각이라 32비트에 들어가지 않으므로 float64 (2^53까지 정확)
+#   position float32 × 3n  x, y, z 순서. Float32Array로 바로 읽어 Three.js 위치에 씁니다.
+#   id       int32 × n     저장되지 않은 기록은 -1
+#   emotion  uint16 × n    메타데이터 emotions 목록의 번호
+#   category uint16 × n    메타데이터 categories 목록의 번호
+#   메타데이터 m바이트: UTF-8 JSON {"version", "emotions", "categories", 요청한 문자열 필드}
+#     timestamp, text: 길이 n인 문자열 목록, summary: {"순번": 요약}
+# 숫자 구간은 앞에서부터 8/4/4/2/2바이트 단위이므로 각 구간의 시작 위치가 그 타입 크기의 배수가 되어
+# 자바스크립트에서 복사 없이 typed array로 볼 수 있습니다.
+RECORDS_BINARY_MIMETYPE = 'application/x-diary-records'
+BINARY_MAGIC = b'DRC1'
+_BINARY_HEADER = struct.Struct('<4sIII')
+
+# 바이너리 형식에서 fields로 고를 수 있는 문자열 필드 (id, version, 위치, 감정, 카테고리는 항상 포함합니다)
+BINARY_STRING_FIELDS = ('timestamp', 'text', 'summary')
+
+# 문자열 객체 하나의 고정 오버헤드와 목록 칸 하나의 크기 (바이트, 메모리 추정용)
+_STRING_OVERHEAD_BYTES = 49
+_POINTER_BYTES = 8
+
+
+def _string_bytes(value):
+    # 한글이 섞인 문자열은 문자당 최대 4바이트로 저장됩니다.
+    return _STRING_OVERHEAD_BYTES + len(value) * (1 if value.isascii() else 4)
+
+
+class RecordColumns:
+    """사용자 한 명의 기록 목록을 열 단위로 보관합니다. 기록 순서는 저장 순서입니다."""
+
+    __slots__ = (
+        'ids', 'versions', 'positions', 'emotion_codes', 'category_codes', 'emotions', 'categories',
+        '_emotion_index', '_category_index', 'timestamps', 'texts', 'summaries', 'max_version', '_string_bytes', '_count'
+    )
+
+    def __init__(self):
+        self.ids = array('q')
+        self.versions = array('q')
+        self.positions = array('d')
+        self.emotion_codes = array('H')
+        self.category_codes = array('H')
+        self.emotions = []
+        self.categories = []
+        self._emotion_index = {}
+        self._category_index = {}
+        self.timestamps = []
+        self.texts = []
+        self.summaries = {}
+        self.max_version = 0
+        self._string_bytes = 0
+        self._count = 0
+
+    @classmethod
+    def from_records(cls, records):
+        """기록 딕셔너리 목록으로 열 목록을 만듭니다."""
+        columns = cls()
+        for record in records:
+            columns.append_record(record)
+        return columns
+
+    def __len__(self):
+        return self._count
+
+    @staticmethod
+    def _code(value, values, index):
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(values)
+            values.append(value)
+        return code
+
+    def append(self, record_id, version, timestamp, emotion, category, text, x, y, z, summary=None):
+        """기록 하나를 덧붙입니다. record_id가 None이면 아직 저장되지 않은 기록입니다."""
+        index = self._count
+        self.ids.append(-1 if record_id is None else record_id)
+        self.versions.append(version)
+        self.positions.extend((x, y, z))
+        self.emotion_codes.append(self._code(emotion, self.emotions, self._emotion_index))
+        self.category_codes.append(self._code(category, self.categories, self._category_index))
+        self.timestamps.append(timestamp)
+        self.texts.append(text)
+        added = _string_bytes(timestamp) + _string_bytes(text)
+        if summary:
+            self.summaries[index] = summary
+            added += _string_bytes(summary)
+        self._string_bytes += added
+        if version > self.max_version:
+            self.max_version = version
+        # 모든 열을 덧붙인 뒤에 기록 수를 늘립니다 (읽는 쪽은 len()까지만 봅니다).
+        self._count = index + 1
+
+    def append_record(self, record):
+        """기록 딕셔너리 하나를 덧붙입니다."""
+        position = record['position']
+        self.append(
+            record['id'], record['version'], record['timestamp'], record['emotion'], record['category'], record['text'],
+            position['x'], position['y'], position['z'], record.get('summary')
+        )
+
+    def copy(self):
+        """지금까지의 기록으로 새 열 목록을 만듭니다. 캐시에 있는 열 목록에 기록을 더해 돌려줄 때 사용합니다."""
+        count = self._count
+        columns = RecordColumns()
+        columns.ids = self.ids[:count]
+        columns.versions = self.versions[:count]
+        columns.positions = self.positions[:count * 3]
+        columns.emotion_codes = self.emotion_codes[:count]
+        columns.category_codes = self.category_codes[:count]
+        columns.emotions = list(self.emotions)
+        columns.categories = list(self.categories)
+        columns._emotion_index = dict(self._emotion_index)
+        columns._category_index = dict(self._category_index)
+        columns.timestamps = self.timestamps[:count]
+        columns.texts = self.texts[:count]
+        columns.summaries = {index: summary for index, summary in list(self.summaries.items()) if index < count}
+        columns.max_version = max(columns.versions, default=0)
+        columns._string_bytes = self._string_bytes
+        columns._count = count
+        return columns
+
+    def record(self, index):
+        """index번째 기록을 {"id", "version", "timestamp", "emotion", "category", "text", "position", ["summary"]} 딕셔너리로 만듭니다."""
+        record_id = self.ids[index]
+        offset = index * 3
+        record = {
+            "id": None if record_id < 0 else record_id,
+            "version": self.versions[index],
+            "timestamp": self.timestamps[index],
+            "emotion": self.emotions[self.emotion_codes[index]],
+            "category": self.categories[self.category_codes[index]],
+            "text": self.texts[index],
+            "position": {"x": self.positions[offset], "y": self.positions[offset + 1], "z": self.positions[offset + 2]},
+        }
+        summary = self.summaries.get(index)
+        if summary:
+            record["summary"] = summary
+        return record
+
+    def iter_records(self, start=0):
+        """start번째부터 (순번, 기록 딕셔너리)를 하나씩 내놓습니다. 필요한 만큼만 딕셔너리를 만듭니다."""
+        for index in range(start, self._count):
+            yield index, self.record(index)
+
+    def to_records(self):
+        """모든 기록을 딕셔너리 목록으로 만듭니다."""
+        return [self.record(index) for index in range(self._count)]
+
+    def estimate_bytes(self):
+        """열 목록이 차지하는 메모리를 대략적으로 추정합니다 (배열 + 문자열 + 목록 칸)."""
+        arrays = (self.ids, self.versions, self.positions, self.emotion_codes, self.category_codes)
+        return (
+            sum(len(values) * values.itemsize for values in arrays)
+            + self._string_bytes
+            + self._count * 2 * _POINTER_BYTES
+            + len(self.summaries) * 3 * _POINTER_BYTES
+        )
+
+
+def _little_endian(values):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_binary(columns, version, fields=None):
+    """
+    열 목록을 바이너리 형식(RECORDS_BINARY_MIMETYPE)으로 만듭니다.
+    Args:
+        version (int): 응답의 변경 버전 (/records/changes의 since로 사용).
+        fields (list): 메타데이터에 넣을 문자열 필드. None이면 BINARY_STRING_FIELDS 전부.
+    """
+    count = len(columns)
+    meta = {"version": version, "emotions": list(columns.emotions), "categories": list(columns.categories)}
+    selected = BINARY_STRING_FIELDS if fields is None else [name for name in BINARY_STRING_FIELDS if name in fields]
+    if 'timestamp' in selected:
+        meta["timestamp"] = columns.timestamps[:count]
+    if 'text' in selected:
+        meta["text"] = columns.texts[:count]
+    if 'summary' in selected:
+        meta["summary"] = {str(index): summary for index, summary in list(columns.summaries.items()) if index < count}
+    meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    return b''.join((
+        _BINARY_HEADER.pack(BINARY_MAGIC, count, len(meta_bytes), 0),
+        _little_endian(array('d', columns.versions[:count])),
+        _little_endian(array('f', columns.positions[:count * 3])),
+        _little_endian(array('i', columns.ids[:count])),
+        _little_endian(array('H', columns.emotion_codes[:count])),
+        _little_endian(array('H', columns.category_codes[:count])),
+        meta_bytes,
+    ))
+
+
+def decode_binary(data):
+    """
+    encode_binary()로 만든 바이트를 (메타데이터, 열 딕셔너리)로 되돌립니다. 도구와 벤치마크에서 응답을 확인할 때 사용합니다.
+    Raises:
+        ValueError: 형식이 올바르지 않은 경우.
+    """
+    if len(data) < _BINARY_HEADER.size:
+        raise ValueError("바이너리 기록 형식이 아닙니다.")
+    magic, count, meta_length, _ = _BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC:
+        raise ValueError("바이너리 기록 형식이 아닙니다.")
+    offset = _BINARY_HEADER.size
+    decoded = {}
+    for name, typecode, length in (('version', 'd', count), ('position', 'f', count * 3), ('id', 'i', count),
+                                   ('emotion', 'H', count), ('category', 'H', count)):
+        values = array(typecode)
+        end = offset + length * values.itemsize
+        values.frombytes(data[offset:end])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        decoded[name] = values
+        offset = end
+    if offset + meta_length != len(data):
+        raise ValueError("바이너리 기록의 길이가 맞지 않습니다.")
+    return json.loads(data[offset:].decode('utf-8')), decoded
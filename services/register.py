@@ -1,67 +1,125 @@
+import logging
+import random
+import threading
 import uuid
 from flask import request, jsonify
 from googleapiclient.errors import HttpError
 from services.sheets import get_sheets_service
+from services.sheets_guard import execute
+from services.user_directory import user_directory
+from services.storage import get_storage, DUPLICATE_EMAIL_MESSAGE
 from config import DIARY_SPREADSHEET_ID
+
+logger = logging.getLogger(__name__)
     
 
+# 'users' 시트의 sheetId. 회원가입 요청에서 사용자 행을 같은 batchUpdate에 넣으려면 필요하며, 바뀌지 않으므로 한 번만 조회합니다.
+_users_sheet_id = None
+# 이 프로세스에서 가입 처리 중인 이메일 (같은 이메일로 동시에 들어온 요청을 하나만 처리합니다)
+_pending_emails = set()
+_pending_lock = threading.Lock()
+
+
+def _sheet_ids(service):
+    """스프레드시트의 시트 이름 → sheetId 딕셔너리를 반환합니다."""
+    result = execute(service.spreadsheets().get(
+        spreadsheetId=DIARY_SPREADSHEET_ID,
+        fields='sheets.properties(sheetId,title)'
+    ), 'spreadsheets.get')
+    return {sheet['properties']['title']: sheet['properties']['sheetId'] for sheet in result.get('sheets', [])}
+
+
+def _get_users_sheet_id(service):
+    global _users_sheet_id
+    if _users_sheet_id is None:
+        _users_sheet_id = _sheet_ids(service).get('users')
+        if _users_sheet_id is None:
+            raise RuntimeError("'users' 시트를 찾을 수 없습니다.")
+    return _users_sheet_id
+
+
+def _string_row(values):
+    # 수식이나 숫자로 해석되지 않도록 문자열 그대로 씁니다 (비밀번호 '0123'의 앞자리 0 등).
+    return {'values': [{'userEnteredValue': {'stringValue': str(value)}} for value in values]}
+
+
+def _new_user_requests(email, password, user_id, sheet_id, users_sheet_id):
+    """
+    새 사용자의 일기 시트 생성, 헤더 행 쓰기, 'users' 시트에 사용자 행 추가를 하나의 batchUpdate 요청 목록으로 만듭니다.
+    batchUpdate는 요청 전체가 적용되거나 하나도 적용되지 않으므로, 시트 없는 사용자 행 같은 중간 상태가 남지 않습니다.
+    새 시트의 sheetId를 미리 정해 두어 같은 batchUpdate 안에서 헤더를 쓸 수 있게 합니다.
+    """
+    return [
+        {'addSheet': {'properties': {'sheetId': sheet_id, 'title': user_id}}},
+        {'appendCells': {
+            'sheetId': sheet_id,
+            'rows': [_string_row(['Timestamp', 'Emotion', 'Category', 'Text'])],
+            'fields': 'userEnteredValue'
+        }},
+        # A열: email, B열: password, C열: user_id 순서
+        {'appendCells': {
+            'sheetId': users_sheet_id,
+            'rows': [_string_row([email, password, user_id])],
+            'fields': 'userEnteredValue'
+        }},
+    ]
+
+
 def create_new_user(email, password):
     """
     새로운 사용자를 등록하고 고유한 user_id를 자동으로 생성하여 Google Sheets에 저장합니다.
+    이메일 중복은 사용자 디렉터리(이메일 인덱스)에서 확인하고, 시트 생성/헤더/사용자 행은 batchUpdate 한 번으로 씁니다.
     """
     service = get_sheets_service()
     if not service:
         return False, "서버 설정 오류: Google Sheets 서비스에 연결할 수 없습니다."
 
+    # 1. 이메일 중복 확인. 가입하는 이메일은 대부분 인덱스에 없으므로, 없다고 시트 전체를 다시 읽지는 않습니다.
+    #    (다른 워커에서 방금 가입한 이메일은 디렉터리가 새로 고쳐질 때까지 보이지 않을 수 있습니다.)
+    if user_directory.lookup(email, reload_on_miss=False) is not None:
+        logger.debug("'%s'은(는) 이미 등록된 이메일입니다.", email)
+        return False, DUPLICATE_EMAIL_MESSAGE
+    if not user_directory.loaded:
+        # 기존 사용자 목록을 읽지 못했으면 중복 여부를 알 수 없으므로 등록하지 않습니다.
+        return False, "서버 설정 오류: Google Sheets 서비스에 연결할 수 없습니다."
+    with _pending_lock:
+        if email in _pending_emails:
+            return False, DUPLICATE_EMAIL_MESSAGE
+        _pending_emails.add(email)
+
+    # 고유한 사용자 ID와 새 시트의 sheetId를 생성합니다.
+    user_id = str(uuid.uuid4())
+    sheet_id = random.randint(1, 2 ** 31 - 1)
+    logger.debug("새로운 사용자 ID 생성 - %s", user_id)
     try:
-        # 고유한 사용자 ID를 생성합니다.
-        user_id = str(uuid.uuid4())
-        print(f"디버그: 새로운 사용자 ID 생성 - {user_id}")
+        # 2. 시트 생성 + 헤더 + 'users' 행 추가를 한 번의 요청으로 처리합니다.
+        requests = _new_user_requests(email, password, user_id, sheet_id, _get_users_sheet_id(service))
+        try:
+            execute(service.spreadsheets().batchUpdate(
+                spreadsheetId=DIARY_SPREADSHEET_ID,
+                body={'requests': requests}
+            ), 'spreadsheets.batchUpdate')
+        except Exception as e:
+            # 응답을 받지 못했어도 요청은 적용되었을 수 있습니다 (시간 초과 뒤 재시도가 '이미 있는 시트'로 거절된 경우 등).
+            # 요청 전체가 함께 적용되므로, 새 시트가 있으면 등록이 끝난 것입니다.
+            if _sheet_ids(service).get(user_id) != sheet_id:
+                raise
+            logger.debug("batchUpdate 응답 오류(%s)가 있었지만 사용자 '%s'의 시트가 만들어져 있어 등록을 완료합니다.", e, user_id)
 
-        # 1. 'users' 시트에 사용자 정보 추가
-        # A열: email, B열: password, C열: user_id 순서
-        values_to_add = [[email, password, user_id]]
-
-        service.spreadsheets().values().append(
-            spreadsheetId=DIARY_SPREADSHEET_ID,
-            range='users!A1',
-            valueInputOption='USER_ENTERED',
-            body={'values': values_to_add}
-        ).execute()
-
-        # 2. 새로운 사용자 ID로 일기 시트 생성
-        # sheets.batchUpdate를 사용하여 새 시트를 생성합니다.
-        requests = [{
-            'addSheet': {
-                'properties': {
-                    'title': user_id  # 시트 이름을 사용자 ID로 설정
-                }
-            }
-        }]
-        body = { 'requests': requests }
-        service.spreadsheets().batchUpdate(
-            spreadsheetId=DIARY_SPREADSHEET_ID,
-            body=body
-        ).execute()
-
-        # 3. 새로 생성된 시트에 헤더(테이블 행) 추가
-        header_row = [['Timestamp', 'Emotion', 'Category', 'Text']]
-        service.spreadsheets().values().append(
-            spreadsheetId=DIARY_SPREADSHEET_ID,
-            range=f'{user_id}!A1', # 새로 생성된 시트의 A1 셀부터 시작
-            valueInputOption='USER_ENTERED',
-            body={'values': header_row}
-        ).execute()
-        
-        print(f"디버그: 새로운 사용자 '{email}'가 스프레드시트에 추가되었고, 일기 시트 '{user_id}'가 생성되었습니다.")
+        # 로그인/조회가 다음 새로 고침을 기다리지 않도록 사용자 디렉터리에 바로 반영합니다.
+        user_directory.add_user(email, password, user_id)
+        logger.info("새로운 사용자 '%s'가 스프레드시트에 추가되었고, 일기 시트 '%s'가 생성되었습니다.", email, user_id)
         return True, "사용자 등록 성공!"
 
     except HttpError as err:
-        print(f"ERROR: Google Sheets API 호출 중 오류 발생: {err}")
+        logger.error("Google Sheets API 호출 중 오류 발생: %s", err)
         return False, "Google Sheets API 오류가 발생했습니다."
     except Exception as e:
-        print(f"ERROR: 사용자 등록 중 예상치 못한 오류 발생: {e}")
+        logger.error("사용자 등록 중 예상치 못한 오류 발생: %s", e)
         return False, "서버 내부 오류가 발생했습니다."
+    finally:
+        with _pending_lock:
+            _pending_emails.discard(email)
 
 def add_register_route(app):
     """
@@ -79,9 +137,11 @@ def add_register_route(app):
         if not email or not password:
             return jsonify({"status": "error", "message": "이메일과 비밀번호를 모두 입력해주세요."}), 400
 
-        success, message = create_new_user(email, password)
+        success, message = get_storage().create_user(email, password)
         
         if success:
             return jsonify({"status": "success", "message": message}), 201
+        elif message == DUPLICATE_EMAIL_MESSAGE:
+            return jsonify({"status": "error", "message": message}), 409
         else:
             return jsonify({"status": "error", "message": message}), 500
\ No newline at end of file
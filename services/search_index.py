@@ -0,0 +1,358 @@
+import math
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+import numpy as np
+from services.settings import SEARCH_INDEX_USERS
+
+# 사용자별 일기 검색 인덱스(역색인)입니다.
+# 한국어는 띄어쓰기 단위 단어에 조사/어미가 붙어('회사에서', '회사를') 단어 그대로는 찾기 어려우므로,
+# 단어마다 이웃한 글자 2개씩(bigram)을 색인하고 검색어도 같은 방식으로 나눠 모든 bigram이 들어 있는 기록을 찾습니다.
+#   '회사에서' → 회사, 사에, 에서      검색어 '회사' → 회사 (→ '회사에서', '회사를' 모두 찾음)
+# 검색어가 여러 단어이면 단어 중 하나라도 들어 있는 기록을 찾고, 들어 있는 단어의 희소도(BM25의 idf) 합이 큰 기록,
+# 같으면 최근 기록을 먼저 돌려줍니다. 감정/카테고리/기간 필터는 NumPy 배열로 한꺼번에 적용하고, 필터별 건수(패싯)도 함께 셉니다.
+#
+# 인덱스는 저장소의 변경 목록(changes_since)으로 갱신합니다. 마지막으로 색인한 변경 버전 이후의 기록만 읽어 덧붙이므로,
+# 일기 저장, write-behind 저널, 일괄 가져오기, 다른 워커가 저장한 기록이 모두 같은 경로로 들어오고 시트 전체를 다시 읽지 않습니다.
+# 아직 저장소에 쓰이지 않은 기록(id 없음)은 쓰인 뒤에 색인됩니다.
+
+NGRAM = 2
+
+# 단어 문자(한글, 영문, 숫자)가 아닌 것은 구분자로 봅니다. '#여행'은 '여행'으로 색인됩니다.
+_WORD = re.compile(r'\w+')
+
+# 검색 기간 경계 형식: 2024, 2024-05, 2024-05-01, 2024-05-01-13, 2024-05-01-13:45
+_TIME_BOUND = re.compile(r'^\d{4}(-\d{2}(-\d{2}(-\d{2}(:\d{2})?)?)?)?$')
+_TIME_DIGITS = 12
+
+_EMPTY_DOCS = np.zeros(0, dtype=np.int64)
+
+
+def normalize(text):
+    """검색과 색인에 쓰는 정규화 (NFKC + 소문자)."""
+    return unicodedata.normalize('NFKC', text).lower()
+
+
+def split_words(text):
+    return _WORD.findall(normalize(text))
+
+
+def word_grams(word):
+    """단어를 NGRAM 글자씩 겹쳐 나눕니다. NGRAM보다 짧은 단어는 그대로 하나의 토큰입니다."""
+    if len(word) < NGRAM:
+        return {word}
+    return {word[i:i + NGRAM] for i in range(len(word) - NGRAM + 1)}
+
+
+def _grams(words):
+    """단어 목록에 들어 있는 토큰 집합 (기록 하나에 같은 토큰은 한 번만 색인합니다)."""
+    grams = set()
+    for word in words:
+        grams |= word_grams(word)
+    return grams
+
+
+def timestamp_key(timestamp):
+    """'2024-05-01-13:45' 형태의 기록 시각을 비교할 수 있는 정수(202405011345)로 바꿉니다. 숫자가 없으면 0."""
+    digits = re.sub(r'\D', '', timestamp or '')[:_TIME_DIGITS]
+    return int(digits.ljust(_TIME_DIGITS, '0')) if digits else 0
+
+
+def parse_time_bound(value, upper):
+    """
+    검색 기간 경계를 timestamp_key()와 같은 정수로 바꿉니다. 끝 경계(upper=True)는 그 기간의 마지막 시각까지 포함합니다.
+    Raises:
+        ValueError: 형식이 올바르지 않은 경우.
+    """
+    if not _TIME_BOUND.match(value):
+        raise ValueError(f"기간은 2024, 2024-05, 2024-05-01, 2024-05-01-13:45 형식이어야 합니다: {value!r}")
+    digits = re.sub(r'\D', '', value)
+    return int(digits.ljust(_TIME_DIGITS, '9' if upper else '0'))
+
+
+def _code(value, values, index):
+    code = index.get(value)
+    if code is None:
+        code = index[value] = len(values)
+        values.append(value)
+    return code
+
+
+def _to_numpy(values):
+    return np.frombuffer(values, dtype=values.typecode).astype(np.int64) if len(values) else _EMPTY_DOCS
+
+
+class UserSearchIndex:
+    """
+    한 사용자의 저장된 기록에 대한 역색인과 필터용 열(감정/카테고리 번호, 시각, 위치)입니다.
+    문서 번호(doc)는 색인한 순서이며, 토큰별 문서 번호 목록(postings)은 항상 오름차순입니다.
+    add()와 search()는 lock을 잡은 상태에서 호출합니다.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """색인한 기록을 모두 지웁니다."""
+        self.key = None
+        self.version = 0
+        self.ids = array('q')
+        self.times = array('q')
+        self.positions = array('d')
+        self.emotion_codes = array('H')
+        self.category_codes = array('H')
+        self.emotions = []
+        self.categories = []
+        self._emotion_index = {}
+        self._category_index = {}
+        self.timestamps = []
+        self.texts = []
+        self.postings = {}
+        self._doc_by_id = {}
+        # 필터에 쓰는 NumPy 사본. 기록을 색인하면 버리고 다음 검색에서 다시 만듭니다.
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, record):
+        """
+        저장된 기록 하나를 색인합니다. 아직 저장되지 않았거나(id 없음) 이미 색인한 기록이면 False를 반환합니다.
+        저장된 기록은 요약(summary)만 나중에 바뀌고 요약은 색인하지 않으므로, 변경 목록에 다시 나온 기록은 건너뜁니다.
+        """
+        record_id = record.get('id')
+        if record_id is None or record_id in self._doc_by_id:
+            return False
+        doc = len(self.ids)
+        position = record['position']
+        self.ids.append(record_id)
+        self.times.append(timestamp_key(record['timestamp']))
+        self.positions.extend((position['x'], position['y'], position['z']))
+        self.emotion_codes.append(_code(record['emotion'], self.emotions, self._emotion_index))
+        self.category_codes.append(_code(record['category'], self.categories, self._category_index))
+        self.timestamps.append(record['timestamp'])
+        # 검색어가 실제로 들어 있는지 확인할 때 쓰도록 정규화한 본문을 보관합니다.
+        text = normalize(record['text'])
+        self.texts.append(text)
+        self._doc_by_id[record_id] = doc
+        postings = self.postings
+        for gram in _grams(_WORD.findall(text)):
+            docs = postings.get(gram)
+            if docs is None:
+                docs = postings[gram] = array('I')
+            docs.append(doc)
+        self._arrays = None
+        return True
+
+    def _numpy(self):
+        if self._arrays is None:
+            self._arrays = {
+                "times": _to_numpy(self.times),
+                "emotion": _to_numpy(self.emotion_codes),
+                "category": _to_numpy(self.category_codes),
+            }
+        return self._arrays
+
+    def _word_docs(self, word):
+        """단어가 들어 있는 문서 번호 배열 (오름차순)."""
+        if len(word) < NGRAM:
+            # 한 글자 검색어는 그 글자가 들어 있는 모든 토큰의 문서를 합칩니다 (토큰 목록을 훑으므로 다른 검색보다 느립니다).
+            lists = [docs for gram, docs in self.postings.items() if word in gram]
+            if not lists:
+                return _EMPTY_DOCS
+            return np.unique(np.concatenate([np.frombuffer(docs, dtype=np.uint32) for docs in lists]).astype(np.int64))
+
+        lists = []
+        for gram in word_grams(word):
+            docs = self.postings.get(gram)
+            if docs is None:
+                return _EMPTY_DOCS
+            lists.append(docs)
+        # 가장 짧은 목록부터 교집합을 구합니다.
+        lists.sort(key=len)
+        result = np.frombuffer(lists[0], dtype=np.uint32).astype(np.int64)
+        for docs in lists[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, np.frombuffer(docs, dtype=np.uint32), assume_unique=True)
+        if len(lists) > 1 and len(result):
+            # bigram이 모두 있어도 서로 떨어져 있을 수 있으므로 실제로 단어가 들어 있는 기록만 남깁니다.
+            texts = self.texts
+            result = result[np.fromiter((word in texts[doc] for doc in result), dtype=bool, count=len(result))]
+        return result
+
+    def _match(self, words):
+        """검색어 단어 중 하나라도 들어 있는 문서와, 들어 있는 단어의 idf 합(점수)을 반환합니다."""
+        total = len(self.ids)
+        matches = []
+        for word in words:
+            docs = self._word_docs(word)
+            if len(docs):
+                df = len(docs)
+                matches.append((docs, math.log(1 + (total - df + 0.5) / (df + 0.5))))
+        if not matches:
+            return _EMPTY_DOCS, np.zeros(0)
+        if len(matches) == 1:
+            docs, idf = matches[0]
+            return docs, np.full(len(docs), idf)
+        # idf는 항상 0보다 크므로 점수가 0이 아닌 문서가 곧 검색어 단어가 하나라도 들어 있는 문서입니다.
+        scores = np.zeros(total)
+        for docs, idf in matches:
+            scores[docs] += idf
+        candidates = np.flatnonzero(scores)
+        return candidates, scores[candidates]
+
+    @staticmethod
+    def _label_mask(codes, labels, index):
+        if not labels:
+            return np.ones(len(codes), dtype=bool)
+        wanted = [index[label] for label in labels if label in index]
+        return np.isin(codes, wanted)
+
+    @staticmethod
+    def _facet_counts(codes, labels):
+        counts = np.bincount(codes, minlength=len(labels)) if len(codes) else ()
+        return {labels[code]: int(count) for code, count in enumerate(counts) if count}
+
+    def search(self, query, emotions=None, categories=None, start=None, end=None, limit=20):
+        """
+        Args:
+            query (str): 검색어. 비어 있으면 필터만 적용하고 최근 기록부터 돌려줍니다.
+            emotions, categories (list): 이 중 하나와 같은 기록만 남깁니다. None이면 거르지 않습니다.
+            start, end (int): parse_time_bound()로 만든 기간 경계.
+        Returns:
+            dict: {"total", "results": [{"id", "score", "timestamp", "emotion", "category", "position"}, ...],
+                "facets": {"emotion": {값: 건수}, "category": {값: 건수}}}
+                패싯 건수는 자기 필터를 뺀 나머지 조건을 모두 만족하는 기록 수입니다.
+        """
+        arrays = self._numpy()
+        words = list(dict.fromkeys(split_words(query)))
+        if words:
+            candidates, scores = self._match(words)
+        else:
+            candidates, scores = np.arange(len(self.ids), dtype=np.int64), np.zeros(len(self.ids))
+
+        times = arrays['times'][candidates]
+        emotion_codes = arrays['emotion'][candidates]
+        category_codes = arrays['category'][candidates]
+        time_mask = np.ones(len(candidates), dtype=bool)
+        if start is not None:
+            time_mask &= times >= start
+        if end is not None:
+            time_mask &= times <= end
+        emotion_mask = self._label_mask(emotion_codes, emotions, self._emotion_index)
+        category_mask = self._label_mask(category_codes, categories, self._category_index)
+        facets = {
+            "emotion": self._facet_counts(emotion_codes[time_mask & category_mask], self.emotions),
+            "category": self._facet_counts(category_codes[time_mask & emotion_mask], self.categories),
+        }
+
+        mask = time_mask & emotion_mask & category_mask
+        candidates, scores, times = candidates[mask], scores[mask], times[mask]
+        # 점수 → 시각 → 색인 순서가 큰 것부터 (np.lexsort는 마지막 키가 첫 번째 기준입니다)
+        order = np.lexsort((-candidates, -times, -scores))[:limit]
+        results = []
+        for i in order:
+            doc = int(candidates[i])
+            offset = doc * 3
+            results.append({
+                "id": self.ids[doc],
+                "score": round(float(scores[i]), 3),
+                "timestamp": self.timestamps[doc],
+                "emotion": self.emotions[self.emotion_codes[doc]],
+                "category": self.categories[self.category_codes[doc]],
+                "position": {"x": self.positions[offset], "y": self.positions[offset + 1], "z": self.positions[offset + 2]},
+            })
+        return {"total": int(len(candidates)), "results": results, "facets": facets}
+
+
+class SearchIndexCache:
+    """
+    사용자별 검색 인덱스를 보관하고 검색 전에 저장소의 변경분을 반영합니다.
+    최근에 검색한 max_users명의 인덱스만 메모리에 둡니다.
+    """
+
+    def __init__(self, max_users):
+        self.max_users = max(1, max_users)
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.updates = 0
+        self.searches = 0
+
+    def search(self, user_id, key, load_changes, query, emotions=None, categories=None, start=None, end=None, limit=20):
+        """
+        Args:
+            key (tuple): (변경 버전, 기록 수). 색인할 때와 같으면 저장소를 읽지 않습니다.
+            load_changes (callable): load_changes(since) -> (변경 버전이 since보다 큰 기록 목록, 새 버전).
+                읽지 못하면 None을 반환합니다.
+        Returns:
+            dict: UserSearchIndex.search()의 결과에 "took_ms"를 더한 값. 기록을 읽지 못한 경우 None.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                index = self._indexes[user_id] = UserSearchIndex()
+                while len(self._indexes) > self.max_users:
+                    self._indexes.popitem(last=False)
+            self._indexes.move_to_end(user_id)
+
+        with index.lock:
+            # 기록 수보다 색인한 기록이 적으면 아직 저장 중이던 기록이 그 사이 저장되었을 수 있으므로 다시 확인합니다.
+            if (index.key != key or len(index) < key[1]) and not self._refresh(index, key, load_changes):
+                return None
+            result = index.search(query, emotions, categories, start, end, limit)
+        with self._lock:
+            self.searches += 1
+        result["took_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    def _refresh(self, index, key, load_changes):
+        """마지막으로 색인한 버전 이후의 기록만 읽어 색인합니다. 처음이거나 기록이 지워졌으면 처음부터 다시 만듭니다."""
+        rebuild = index.key is None
+        changes = load_changes(0 if rebuild else index.version)
+        if changes is None:
+            return False
+        records, version = changes
+        for record in records:
+            index.add(record)
+        if len(index) > key[1]:
+            # 저장소의 기록 수보다 색인한 기록이 많으면 기록이 지워졌거나 다른 id로 다시 저장된 것이므로 처음부터 다시 만듭니다.
+            changes = load_changes(0)
+            if changes is None:
+                index.clear()
+                return False
+            records, version = changes
+            index.clear()
+            rebuild = True
+            for record in records:
+                index.add(record)
+        index.version = version
+        index.key = key
+        with self._lock:
+            if rebuild:
+                self.builds += 1
+            else:
+                self.updates += 1
+        return True
+
+    def stats(self):
+        with self._lock:
+            indexes = list(self._indexes.values())
+            return {
+                "users": len(indexes),
+                "records": sum(len(index) for index in indexes),
+                "tokens": sum(len(index.postings) for index in indexes),
+                "builds": self.builds,
+                "updates": self.updates,
+                "searches": self.searches,
+            }
+
+
+# 앱 전체가 공유하는 사용자별 검색 인덱스
+search_index = SearchIndexCache(SEARCH_INDEX_USERS)
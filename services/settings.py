@@ -0,0 +1,190 @@
+import logging
+import os
+import config
+
+# 서버 동작을 조정하는 설정값을 읽어오는 모듈입니다.
+# 환경 변수가 있으면 환경 변수를, 없으면 config.py의 같은 이름 값을, 둘 다 없으면 기본값을 사용합니다.
+
+def get_setting(name, default, cast=str):
+    """
+    설정값 하나를 읽어 지정한 타입으로 변환해 반환합니다.
+    Args:
+        name (str): 환경 변수 / config.py 속성 이름.
+        default: 값이 없을 때 사용할 기본값.
+        cast (callable): 값 변환 함수 (int, float, str 등).
+    """
+    value = os.environ.get(name)
+    if value is None:
+        value = getattr(config, name, None)
+    if value is None:
+        return default
+    if cast is bool and isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        logging.getLogger(__name__).warning("설정값 %s=%r을(를) 해석할 수 없어 기본값 %r을(를) 사용합니다.", name, value, default)
+        return default
+
+# Google Sheets 클라이언트 풀에 유지할 HTTP 연결 수
+SHEETS_POOL_SIZE = get_setting('SHEETS_POOL_SIZE', 8, int)
+
+# 사용자 디렉터리(email → user_id) 캐시를 백그라운드에서 새로 고치는 주기 (초)
+USER_CACHE_TTL = get_setting('USER_CACHE_TTL', 300, float)
+# 캐시에 없는 이메일로 조회할 때, 또는 아직 한 번도 읽지 못했을 때 전체 목록을 다시 읽는 최소 간격 (초)
+USER_CACHE_MISS_RELOAD_INTERVAL = get_setting('USER_CACHE_MISS_RELOAD_INTERVAL', 5, float)
+
+# 사용자별 일기 기록 캐시가 사용할 수 있는 최대 메모리 (바이트, 추정치)
+RECORD_CACHE_MAX_BYTES = get_setting('RECORD_CACHE_MAX_BYTES', 64 * 1024 * 1024, int)
+# 캐시된 기록이 시트와 같은지 다시 확인하기 전까지 그대로 사용하는 시간 (초)
+RECORD_CACHE_REVALIDATE_SECONDS = get_setting('RECORD_CACHE_REVALIDATE_SECONDS', 30, float)
+
+# 감정 분류 배치 스케줄러: 한 번에 묶을 최대 문장 수
+INFERENCE_MAX_BATCH_SIZE = get_setting('INFERENCE_MAX_BATCH_SIZE', 16, int)
+# 배치를 채우기 위해 첫 요청 이후 기다리는 최대 시간 (밀리초)
+INFERENCE_MAX_WAIT_MS = get_setting('INFERENCE_MAX_WAIT_MS', 10, float)
+# 대기열에 쌓아둘 수 있는 최대 요청 수. 넘으면 요청을 거절합니다.
+INFERENCE_MAX_QUEUE_DEPTH = get_setting('INFERENCE_MAX_QUEUE_DEPTH', 256, int)
+# 요청 하나가 결과를 기다리는 최대 시간 (초)
+INFERENCE_TIMEOUT_SECONDS = get_setting('INFERENCE_TIMEOUT_SECONDS', 30, float)
+
+# 모델이 아직 로드 중일 때 /analyze_diary가 준비를 기다리는 최대 시간 (초). 0이면 바로 '준비 중' 응답을 보냅니다.
+MODEL_WARMUP_WAIT_SECONDS = get_setting('MODEL_WARMUP_WAIT_SECONDS', 2, float)
+
+# 요약 작업 대기열에 쌓아둘 수 있는 최대 일기 수. 넘으면 요약을 건너뜁니다.
+SUMMARY_QUEUE_DEPTH = get_setting('SUMMARY_QUEUE_DEPTH', 100, int)
+
+# 카테고리 키워드 사전 파일 (JSON: {"카테고리": ["키워드", ...]}). 없으면 analyzer.py의 기본 사전을 사용합니다.
+CATEGORY_KEYWORDS_PATH = get_setting(
+    'CATEGORY_KEYWORDS_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'category_keywords.json')
+)
+# 키워드 파일이 바뀌었는지 확인하는 주기 (초)
+CATEGORY_KEYWORDS_CHECK_SECONDS = get_setting('CATEGORY_KEYWORDS_CHECK_SECONDS', 5, float)
+
+# 감정 분류 추론 백엔드: 'pipeline'(fp32 transformers), 'quantized'(torch 동적 int8), 'onnx'(ONNX Runtime)
+EMOTION_BACKEND = get_setting('EMOTION_BACKEND', 'pipeline')
+# 추론에 사용할 연산 스레드 수 (intra-op). 0이면 라이브러리 기본값을 사용합니다.
+# 한 서버에 워커를 여러 개 띄울 때는 (코어 수 / 워커 수)로 맞춰야 코어를 과도하게 나눠 쓰지 않습니다.
+INFERENCE_NUM_THREADS = get_setting('INFERENCE_NUM_THREADS', 0, int)
+# fp32 이외의 백엔드를 로드할 때 기준 문장들로 fp32 결과와 레이블을 비교할지 여부
+EMOTION_BACKEND_VALIDATE = get_setting('EMOTION_BACKEND_VALIDATE', True, bool)
+# 검증 시 fp32와 레이블이 일치해야 하는 최소 비율. 미달하면 fp32 파이프라인으로 되돌아갑니다.
+EMOTION_BACKEND_MIN_AGREEMENT = get_setting('EMOTION_BACKEND_MIN_AGREEMENT', 0.95, float)
+# 기준 문장 파일 (한 줄에 한 문장). 없으면 analyzer.py의 기본 문장들을 사용합니다.
+EMOTION_REFERENCE_PATH = get_setting('EMOTION_REFERENCE_PATH', '')
+# ONNX로 내보낸 모델을 저장해 두는 디렉터리
+ONNX_MODEL_DIR = get_setting(
+    'ONNX_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'onnx')
+)
+
+# 일기 저장을 로컬 저널에 먼저 기록하고 응답한 뒤, 백그라운드에서 묶어서 시트에 쓰는지 여부 (write-behind)
+WRITE_BEHIND_ENABLED = get_setting('WRITE_BEHIND_ENABLED', True, bool)
+# write-behind 저널 파일을 저장하는 디렉터리
+JOURNAL_DIR = get_setting(
+    'JOURNAL_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'journal')
+)
+# 대기 중인 기록을 시트에 쓰기 전에 모으는 시간 (밀리초)
+WRITE_BEHIND_FLUSH_INTERVAL_MS = get_setting('WRITE_BEHIND_FLUSH_INTERVAL_MS', 200, float)
+# 한 번의 flush에서 시트에 쓰는 최대 행 수
+WRITE_BEHIND_MAX_BATCH_ROWS = get_setting('WRITE_BEHIND_MAX_BATCH_ROWS', 500, int)
+# flush 실패 시 재시도 대기 시간의 시작값과 최댓값 (초). 실패할 때마다 두 배로 늘어납니다.
+WRITE_BEHIND_BACKOFF_BASE = get_setting('WRITE_BEHIND_BACKOFF_BASE', 1.0, float)
+WRITE_BEHIND_BACKOFF_MAX = get_setting('WRITE_BEHIND_BACKOFF_MAX', 60.0, float)
+# 한 기록의 최대 쓰기 시도 횟수. 넘으면 dead-letter 파일로 옮기고 포기합니다.
+WRITE_BEHIND_MAX_ATTEMPTS = get_setting('WRITE_BEHIND_MAX_ATTEMPTS', 20, int)
+
+# Google Sheets API 할당량 (분당 요청 수). 이 프로세스가 쓸 몫은 SHEETS_QUOTA_SHARE를 곱해 정합니다.
+# 워커를 N개 띄우면 SHEETS_QUOTA_SHARE를 1/N로 맞춥니다.
+SHEETS_READ_QUOTA_PER_MIN = get_setting('SHEETS_READ_QUOTA_PER_MIN', 300, float)
+SHEETS_WRITE_QUOTA_PER_MIN = get_setting('SHEETS_WRITE_QUOTA_PER_MIN', 300, float)
+SHEETS_QUOTA_SHARE = get_setting('SHEETS_QUOTA_SHARE', 1.0, float)
+# 한 번에 몰아서 보낼 수 있는 최대 요청 수 (토큰 버킷 크기)
+SHEETS_BURST = get_setting('SHEETS_BURST', 20, int)
+# 호출 한 번의 전체 제한 시간 (재시도와 대기 포함, 초)
+SHEETS_READ_DEADLINE = get_setting('SHEETS_READ_DEADLINE', 10.0, float)
+SHEETS_WRITE_DEADLINE = get_setting('SHEETS_WRITE_DEADLINE', 30.0, float)
+# 재시도 대기 시간의 시작값과 최댓값 (초)
+SHEETS_BACKOFF_BASE = get_setting('SHEETS_BACKOFF_BASE', 0.5, float)
+SHEETS_BACKOFF_MAX = get_setting('SHEETS_BACKOFF_MAX', 16.0, float)
+# 연속 실패가 이 횟수에 이르면 회로를 열고 SHEETS_CIRCUIT_COOLDOWN초 동안 호출을 바로 거절합니다.
+SHEETS_CIRCUIT_THRESHOLD = get_setting('SHEETS_CIRCUIT_THRESHOLD', 5, int)
+SHEETS_CIRCUIT_COOLDOWN = get_setting('SHEETS_CIRCUIT_COOLDOWN', 30.0, float)
+
+# 사용자/일기 기록 저장소: 'sheets' (Google Sheets, 기본값) 또는 'sqlite' (로컬 SQLite 파일)
+STORAGE_BACKEND = get_setting('STORAGE_BACKEND', 'sheets')
+# SQLite 저장소 파일 경로
+SQLITE_PATH = get_setting('SQLITE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'diary.db'))
+
+# /get_all_records 한 페이지에 담을 수 있는 최대 기록 수 (limit 상한)
+RECORDS_MAX_PAGE_SIZE = get_setting('RECORDS_MAX_PAGE_SIZE', 1000, int)
+
+# Google Sheets 저장소의 변경 조회(/records/changes)에서 since보다 이만큼 앞선 버전의 기록까지 다시 보냅니다 (밀리초).
+# 여러 워커가 거의 동시에 쓴 행이 버전 순서와 다르게 시트에 나타나도 놓치지 않기 위한 여유 구간입니다.
+# 행의 버전은 쓰기를 시도하기 직전에 붙이므로, 쓰기 한 번의 최대 시간(SHEETS_WRITE_DEADLINE)보다 길어야 합니다.
+SHEETS_SYNC_OVERLAP_MS = get_setting('SHEETS_SYNC_OVERLAP_MS', 60000, int)
+
+# 서버 레이아웃 엔진(/layout): 기본/최대 시뮬레이션 단계 수, 캐시할 사용자 수, 카테고리 어트랙터 사용 여부
+LAYOUT_DEFAULT_STEPS = get_setting('LAYOUT_DEFAULT_STEPS', 300, int)
+LAYOUT_MAX_STEPS = get_setting('LAYOUT_MAX_STEPS', 5000, int)
+LAYOUT_CACHE_ENTRIES = get_setting('LAYOUT_CACHE_ENTRIES', 256, int)
+LAYOUT_USE_CATEGORY = get_setting('LAYOUT_USE_CATEGORY', False, bool)
+
+# 새 기록 위치 추천(/next_position): 처음 고를 정육면체의 반 길이 (app.js의 기존 생성 범위 ±7.5와 같게),
+# 추천한 위치를 저장 전까지 비워 둘 시간(초), 공간 인덱스를 보관할 사용자 수
+SPATIAL_SPAWN_RANGE = get_setting('SPATIAL_SPAWN_RANGE', 7.5, float)
+SPATIAL_RESERVATION_SECONDS = get_setting('SPATIAL_RESERVATION_SECONDS', 60.0, float)
+SPATIAL_INDEX_USERS = get_setting('SPATIAL_INDEX_USERS', 256, int)
+
+# 일기 검색(/search): 검색 인덱스를 보관할 사용자 수, 한 번에 돌려주는 최대 결과 수, limit을 생략했을 때의 결과 수
+SEARCH_INDEX_USERS = get_setting('SEARCH_INDEX_USERS', 64, int)
+SEARCH_MAX_RESULTS = get_setting('SEARCH_MAX_RESULTS', 200, int)
+SEARCH_DEFAULT_RESULTS = get_setting('SEARCH_DEFAULT_RESULTS', 20, int)
+
+# 일기 일괄 가져오기(/imports): 작업 파일을 저장하는 디렉터리, 한 번에 저장소에 쓰는 기록 수,
+# 한 작업의 최대 기록 수, 작업이 감정 분류 모델 로드를 기다리는 최대 시간(초)
+IMPORT_DIR = get_setting(
+    'IMPORT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'imports')
+)
+IMPORT_WRITE_ROWS = get_setting('IMPORT_WRITE_ROWS', 500, int)
+IMPORT_MAX_ENTRIES = get_setting('IMPORT_MAX_ENTRIES', 50000, int)
+IMPORT_MODEL_WAIT_SECONDS = get_setting('IMPORT_MODEL_WAIT_SECONDS', 600, float)
+
+# 분석 결과 캐시: 같은 내용의 일기에 대해 감정 분류/요약 모델을 다시 실행하지 않습니다.
+# ANALYSIS_CACHE_PATH를 빈 값으로 두면 디스크 없이 메모리 캐시만 사용합니다.
+ANALYSIS_CACHE_ENABLED = get_setting('ANALYSIS_CACHE_ENABLED', True, bool)
+ANALYSIS_CACHE_PATH = get_setting(
+    'ANALYSIS_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'analysis_cache.db')
+)
+ANALYSIS_CACHE_MEMORY_ENTRIES = get_setting('ANALYSIS_CACHE_MEMORY_ENTRIES', 10000, int)
+ANALYSIS_CACHE_DISK_ENTRIES = get_setting('ANALYSIS_CACHE_DISK_ENTRIES', 200000, int)
+
+# 별도 프로세스 추론 서버(python -m services.inference_server)의 Unix 소켓 경로.
+# 설정하면 Flask 워커는 모델을 직접 로드하지 않고 이 서버에 분류/요약을 요청합니다. 비어 있으면 프로세스 안에서 로드합니다.
+INFERENCE_SERVER_SOCKET = get_setting('INFERENCE_SERVER_SOCKET', '')
+# 추론 서버가 모델을 로드한 뒤 fork하는 워커 프로세스 수 (모델 가중치는 워커끼리 공유됩니다)
+INFERENCE_SERVER_WORKERS = get_setting('INFERENCE_SERVER_WORKERS', 2, int)
+# Flask 워커가 시작할 때 추론 서버가 준비되기를 기다리는 최대 시간 (초). 넘으면 프로세스 안에서 모델을 로드합니다.
+INFERENCE_SERVER_CONNECT_WAIT = get_setting('INFERENCE_SERVER_CONNECT_WAIT', 120, float)
+# 추론 서버 호출이 실패한 뒤 프로세스 안의 모델을 사용하다가 다시 서버를 시도하기까지의 시간 (초)
+INFERENCE_SERVER_RETRY_SECONDS = get_setting('INFERENCE_SERVER_RETRY_SECONDS', 30, float)
+# Flask 워커가 추론 서버의 응답을 기다리는 최대 시간 (초). 서버는 대기열 자리/분류 결과/요약 차례를 각각
+# INFERENCE_TIMEOUT_SECONDS까지 기다린 뒤 요약을 만들므로, 서버가 먼저 시간 초과를 알려 줄 수 있도록 그보다 충분히 길어야 합니다.
+INFERENCE_CLIENT_TIMEOUT_SECONDS = get_setting('INFERENCE_CLIENT_TIMEOUT_SECONDS', INFERENCE_TIMEOUT_SECONDS * 3, float)
+
+# ASGI 경로(asgi.py)에서 블로킹 저장소 호출(Google Sheets/SQLite)과 Flask 라우트를 실행하는 스레드 수.
+# 동시에 진행되는 저장소 호출 수의 상한이며, 연결 수와는 관계없습니다. SHEETS_POOL_SIZE보다 크면 나머지는 연결 풀을 기다립니다.
+ASYNC_IO_WORKERS = get_setting('ASYNC_IO_WORKERS', 16, int)
+
+# 단계별(사용자 조회, 감정 분류, 요약, 키워드 매칭, 저장소 읽기/쓰기) 지연 시간 측정. /metrics에서 Prometheus 형식으로 제공합니다.
+# 끄면 측정 코드를 아예 감싸지 않으므로 요청 처리 비용이 들지 않습니다.
+METRICS_ENABLED = get_setting('METRICS_ENABLED', True, bool)
+# 측정할 호출의 비율 (0~1). 1보다 작으면 그 비율만큼만 시간을 재어 히스토그램에 넣습니다.
+METRICS_SAMPLE_RATE = get_setting('METRICS_SAMPLE_RATE', 1.0, float)
+
+# 로그 수준 (DEBUG, INFO, WARNING, ERROR). DEBUG이면 요청마다 처리 내용을 기록합니다.
+LOG_LEVEL = get_setting('LOG_LEVEL', 'INFO')
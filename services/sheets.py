@@ -1,33 +1,161 @@
+import logging
 import os
+import re
 import json
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+import threading
+import time
 from googleapiclient.errors import HttpError
+# Google Sheets API 서비스 객체는 sheets_client 모듈에서 워커당 한 번만 생성해 공유합니다.
+from services.sheets_client import get_sheets_service
+# 모든 API 호출은 할당량/재시도/회로 차단을 담당하는 sheets_guard를 거칩니다.
+from services.sheets_guard import execute, SheetsUnavailableError
+from services.record_cache import record_cache
+from services.record_columns import RecordColumns
+from services.write_behind import WriteBehindJournal
+from services.settings import (
+    WRITE_BEHIND_ENABLED, JOURNAL_DIR, WRITE_BEHIND_FLUSH_INTERVAL_MS, WRITE_BEHIND_MAX_BATCH_ROWS,
+    WRITE_BEHIND_BACKOFF_BASE, WRITE_BEHIND_BACKOFF_MAX, WRITE_BEHIND_MAX_ATTEMPTS
+)
+
+logger = logging.getLogger(__name__)
 
 # 현재 스크립트 파일의 절대 경로를 가져옵니다.
 base_dir = os.path.dirname(os.path.abspath(__file__))
 
-# Google Sheets API 서비스 객체를 초기화하는 함수
-def get_sheets_service():
-    """Google Sheets API 서비스 객체를 반환합니다."""
-    try:
-        # 'credentials.json' 파일의 경로를 설정합니다. (상위 폴더에 위치)
-        creds_path = os.path.join(base_dir, '../credentials.json')
-        if not os.path.exists(creds_path):
-            raise FileNotFoundError("credentials.json 파일이 존재하지 않습니다. 프로젝트 최상위 폴더에 넣어주세요.")
-
-        creds = service_account.Credentials.from_service_account_file(
-            creds_path,
-            scopes=['https://www.googleapis.com/auth/spreadsheets']
-        )
-        service = build('sheets', 'v4', credentials=creds)
-        return service
-    except Exception as e:
-        print(f"Google Sheets API 서비스 초기화 오류: {e}")
+# 행마다 I열에 기록하는 변경 버전. 밀리초 시각을 기본으로 하되, 같은 프로세스 안에서는 항상 증가하도록 보정합니다.
+# 시트에는 트랜잭션이 없어 사용자별 카운터를 안전하게 올릴 수 없으므로, 변경 조회는 이 값에 여유 구간을 두고 비교합니다.
+_version_lock = threading.Lock()
+_last_version = 0
+
+def next_version():
+    """이전에 발급한 값보다 큰 새 변경 버전을 반환합니다."""
+    global _last_version
+    with _version_lock:
+        _last_version = max(_last_version + 1, int(time.time() * 1000))
+        return _last_version
+
+def _stamp_version(row, version=None):
+    """
+    행의 I열(버전)을 채우고 그 버전을 반환합니다. version이 None이면 새 버전을 발급합니다.
+    H열(요약)이 비어 있으면 빈 칸으로 둡니다.
+    """
+    if version is None:
+        version = next_version()
+    if len(row) < 8:
+        row.append('')
+    del row[8:]
+    row.append(version)
+    return version
+
+def _append_rows(service, spreadsheet_id, user_id, rows, stamped=False):
+    """
+    사용자 시트의 마지막 행 뒤에 여러 행을 한 번의 호출로 추가합니다.
+    실제로 쓰는 시점에 각 행에 변경 버전을 붙입니다 (행 목록을 직접 수정합니다).
+    stamped가 True이면 호출한 쪽(write-behind 저널)이 이미 붙인 버전을 그대로 씁니다.
+    Returns:
+        int: 추가된 첫 행의 번호. 응답에서 알 수 없으면 None.
+    """
+    if not stamped:
+        for row in rows:
+            _stamp_version(row)
+    result = execute(service.spreadsheets().values().append(
+        spreadsheetId=spreadsheet_id,
+        range=f'{user_id}!A:I',
+        valueInputOption='USER_ENTERED',
+        insertDataOption='INSERT_ROWS',
+        body={'values': rows}
+    ), 'values.append', verify=lambda: _find_appended_rows(service, spreadsheet_id, user_id, rows))
+    updates = result.get('updates', {})
+    logger.debug("%s개의 셀이 추가되었습니다.", updates.get('updatedCells'))
+    return _parse_row_number(updates.get('updatedRange'))
+
+def _find_appended_rows(service, spreadsheet_id, user_id, rows):
+    """
+    응답을 받지 못한 append가 실제로 반영되었는지, 첫 행에 붙인 변경 버전(I열)을 시트 끝부분에서 찾아 확인합니다.
+    기록 캐시가 알고 있는 마지막 행 뒤만 읽습니다 (캐시가 없으면 I열 전체).
+    Returns:
+        dict: 반영되었으면 append 응답과 같은 모양의 {"updates": {"updatedRange": ...}}, 아니면 None.
+    """
+    version = int(rows[0][8])
+    first_row = _locate_versions(service, spreadsheet_id, user_id, [version]).get(version)
+    if first_row is None:
         return None
+    # 한 번의 append로 추가된 행은 이어져 있습니다.
+    return {"updates": {"updatedRange": f'{user_id}!A{first_row}:I{first_row + len(rows) - 1}'}}
+
+def _locate_versions(service, spreadsheet_id, user_id, versions):
+    """
+    주어진 변경 버전(I열)이 붙은 행을 찾습니다. 기록 캐시에 있는 행을 먼저 보고,
+    시트에서는 캐시가 알고 있는 마지막 행 뒤만 읽습니다 (캐시가 없으면 I열 전체).
+    Returns:
+        dict: 찾은 버전의 {version: 행 번호}
+    """
+    wanted = set(versions)
+    found = {}
+    cached = record_cache.get(user_id)
+    start_row = 1
+    if cached:
+        columns, row_count, _ = cached
+        for row_number, version in zip(columns.ids, columns.versions):
+            if row_number >= 0 and version in wanted:
+                found[version] = row_number
+        start_row = row_count + 1
+    if len(found) == len(wanted):
+        return found
+    result = execute(service.spreadsheets().values().get(
+        spreadsheetId=spreadsheet_id,
+        range=f'{user_id}!I{start_row}:I'
+    ), 'values.get')
+    for offset, value in enumerate(result.get('values', [])):
+        try:
+            version = int(value[0]) if value else None
+        except (TypeError, ValueError):
+            continue
+        if version in wanted:
+            found.setdefault(version, start_row + offset)
+    return found
+
+def _write_rows(spreadsheet_id, user_id, rows):
+    """write-behind 저널이 대기 중인 행들을 시트에 쓸 때 사용하는 함수입니다."""
+    service = get_sheets_service()
+    if not service:
+        raise RuntimeError("Google Sheets API 서비스 객체를 가져올 수 없습니다.")
+    return _append_rows(service, spreadsheet_id, user_id, rows, stamped=True)
+
+def _locate_rows(spreadsheet_id, user_id, versions):
+    """write-behind 저널이 이전 시도가 시트에 반영되었는지 확인할 때 사용하는 함수입니다."""
+    service = get_sheets_service()
+    if not service:
+        raise RuntimeError("Google Sheets API 서비스 객체를 가져올 수 없습니다.")
+    return _locate_versions(service, spreadsheet_id, user_id, versions)
+
+def _on_row_committed(spreadsheet_id, user_id, row, row_number):
+    """행이 시트에 쓰인 뒤, 캐시된 기록 목록에도 바로 추가합니다 (write-through)."""
+    try:
+        record_cache.append(user_id, _row_values(row, row_number), row_number)
+    except (TypeError, ValueError):
+        # 위치 값이 숫자가 아니면 시트에서 다시 읽을 때와 같은 결과가 되도록 캐시를 비웁니다.
+        record_cache.invalidate(user_id)
+
+# 일기 저장용 write-behind 저널. 꺼져 있으면 요청 안에서 바로 시트에 씁니다.
+write_journal = WriteBehindJournal(
+    JOURNAL_DIR, _write_rows,
+    flush_interval_ms=WRITE_BEHIND_FLUSH_INTERVAL_MS,
+    max_batch_rows=WRITE_BEHIND_MAX_BATCH_ROWS,
+    backoff_base=WRITE_BEHIND_BACKOFF_BASE,
+    backoff_max=WRITE_BEHIND_BACKOFF_MAX,
+    max_attempts=WRITE_BEHIND_MAX_ATTEMPTS,
+    on_committed=_on_row_committed,
+    stamp=_stamp_version,
+    locate=_locate_rows
+) if WRITE_BEHIND_ENABLED else None
+
+def get_write_behind_stats():
+    """write-behind 저널의 대기열 깊이와 flush 지연 시간을 반환합니다."""
+    return write_journal.stats() if write_journal else {"enabled": False}
 
 # Google Sheets에 데이터를 저장하는 함수
-def save_to_sheet(diary_text, emotion, category, timestamp, user_id, spreadsheet_id, position):
+def save_to_sheet(diary_text, emotion, category, timestamp, user_id, spreadsheet_id, position, on_saved=None):
     """일기 데이터를 Google Sheets에 저장합니다.
         Args:
         diary_text (str): 일기 내용.
@@ -37,91 +165,228 @@ def save_to_sheet(diary_text, emotion, category, timestamp, user_id, spreadsheet
         user_id (str): 사용자의 고유 ID. 이 값이 시트 이름이 됩니다.
         spreadsheet_id (str): Google Spreadsheet ID.
         position (dict): {'x': float, 'y': float, 'z': float} 형태의 위치 데이터.
+        on_saved (callable): on_saved(row_number) - 기록이 시트에 실제로 쓰인 뒤 호출됩니다.
+            write-behind 저널을 사용하면 나중에 백그라운드 스레드에서 호출됩니다.
     """
+    # 스프레드시트에 추가할 데이터 (위치 정보 포함)
+    row = [timestamp, emotion, category, diary_text, position['x'], position['y'], position['z']]
+
+    if write_journal is not None:
+        # 로컬 저널에 fsync한 뒤 바로 응답하고, 시트에는 백그라운드에서 묶어서 씁니다.
+        try:
+            write_journal.submit(spreadsheet_id, user_id, row, on_saved)
+            return {"status": "success", "message": "일기가 저장되었습니다. 곧 Google Sheets에 반영됩니다.", "row": None, "queued": True}
+        except (OSError, RuntimeError) as e:
+            logger.error("write-behind 저널 기록 중 오류가 발생했습니다: %s", e)
+            return {"status": "error", "message": f"데이터 저장 중 예상치 못한 오류: {e}"}
 
     service = get_sheets_service()
     if not service:
         return {"status": "error", "message": "Google Sheets API 서비스 객체를 가져올 수 없습니다. credentials.json 파일과 권한을 확인해주세요."}
 
-    # 시트 이름과 범위를 동적으로 설정합니다. (A:G로 확장)
-    RANGE_NAME = f'{user_id}!A:G'
-
-
     try:
-        # 스프레드시트에 추가할 데이터 (위치 정보 포함)
-        values = [[timestamp, emotion, category, diary_text, position['x'], position['y'], position['z']]]
-        body = {'values': values}
-
         # 스프레드시트의 마지막 행에 데이터를 추가합니다.
-        result = service.spreadsheets().values().append(
-            spreadsheetId=spreadsheet_id,
-            range=RANGE_NAME,
-            valueInputOption='USER_ENTERED',
-            insertDataOption='INSERT_ROWS',
-            body=body
-        ).execute()
-
-        print(f"디버그: {result.get('updates').get('updatedCells')}개의 셀이 추가되었습니다.")
-        return {"status": "success", "message": "일기가 Google Sheets에 성공적으로 저장되었습니다."}
+        row_number = _append_rows(service, spreadsheet_id, user_id, [row])
+        _on_row_committed(spreadsheet_id, user_id, row, row_number)
+        if on_saved and row_number:
+            on_saved(row_number)
+        return {"status": "success", "message": "일기가 Google Sheets에 성공적으로 저장되었습니다.", "row": row_number}
 
     except HttpError as err:
-        print(f"Google Sheets API 오류가 발생했습니다: {err}")
+        logger.error("Google Sheets API 오류가 발생했습니다: %s", err)
         return {"status": "error", "message": f"Google Sheets API 오류: {err}"}
     except Exception as e:
-        print(f"데이터 저장 중 예상치 못한 오류가 발생했습니다: {e}")
+        logger.error("데이터 저장 중 예상치 못한 오류가 발생했습니다: %s", e)
         return {"status": "error", "message": f"데이터 저장 중 예상치 못한 오류: {e}"}
     
+def save_rows_to_sheet(entries, user_id, spreadsheet_id):
+    """
+    여러 기록을 write-behind 저널을 거치지 않고 한 번의 append 호출로 시트에 씁니다 (일괄 가져오기용).
+    호출하는 쪽에서 WRITE_BEHIND_MAX_BATCH_ROWS 정도의 묶음으로 나눠 부릅니다.
+    Args:
+        entries (list): {"text", "emotion", "category", "timestamp", "position"} 딕셔너리 목록.
+    Returns:
+        dict: StorageBackend.append_records()와 같은 형태.
+    """
+    service = get_sheets_service()
+    if not service:
+        return {"status": "error", "message": "Google Sheets API 서비스 객체를 가져올 수 없습니다.", "written": 0}
+    rows = [
+        [e['timestamp'], e['emotion'], e['category'], e['text'], e['position']['x'], e['position']['y'], e['position']['z']]
+        for e in entries
+    ]
+    try:
+        first_row = _append_rows(service, spreadsheet_id, user_id, rows)
+    except (HttpError, SheetsUnavailableError) as err:
+        logger.error("Google Sheets API 오류가 발생했습니다: %s", err)
+        return {"status": "error", "message": f"Google Sheets API 오류: {err}", "written": 0}
+    row_numbers = [first_row + i if first_row else None for i in range(len(rows))]
+    for row, row_number in zip(rows, row_numbers):
+        _on_row_committed(spreadsheet_id, user_id, row, row_number)
+    return {"status": "success", "rows": row_numbers}
+
+# 시트의 헤더 행
+RECORD_HEADER = ["Timestamp", "Emotion", "Category", "Diary Text", "x", "y", "z"]
+
+def _row_values(row, row_number=None):
+    """
+    시트의 한 행(A:I)을 RecordColumns.append()의 인자 순서(id, version, timestamp, emotion, category, text, x, y, z, summary)로 변환합니다.
+    id는 시트의 행 번호이고 (아직 시트에 쓰이지 않은 기록은 None), version은 I열의 변경 버전입니다 (없으면 0).
+    H열(요약)이 비어 있으면 summary는 None입니다.
+    """
+    return (
+        row_number,
+        int(row[8]) if len(row) > 8 and row[8] else 0,
+        row[0],
+        row[1],
+        row[2],
+        row[3],
+        float(row[4]),
+        float(row[5]),
+        float(row[6]),
+        row[7] if len(row) > 7 and row[7] else None,
+    )
+
+def _parse_row_number(updated_range):
+    """'시트!A15:G15' 형태의 범위 문자열에서 행 번호(15)를 꺼냅니다."""
+    if not updated_range:
+        return None
+    match = re.search(r'![A-Z]+(\d+)', updated_range)
+    return int(match.group(1)) if match else None
+
+def _has_rows_after(service, user_id, spreadsheet_id, row_count):
+    """
+    캐시가 알고 있는 마지막 행 다음 칸만 읽어 시트에 새 행이 추가되었는지 확인합니다.
+    전체 범위를 내려받는 것보다 훨씬 가벼운 변경 확인입니다.
+    """
+    next_row = row_count + 1
+    result = execute(service.spreadsheets().values().get(
+        spreadsheetId=spreadsheet_id,
+        range=f'{user_id}!A{next_row}:A{next_row}'
+    ), 'values.get')
+    return bool(result.get('values'))
+
+def _with_pending(columns, spreadsheet_id, user_id):
+    """
+    write-behind 저널에서 아직 시트에 쓰이지 않은 기록을 열 목록 뒤에 덧붙입니다.
+    캐시와 공유하는 열 목록은 고치지 않고, 덧붙일 기록이 있을 때만 사본을 만듭니다.
+    대기 중인 기록은 쓰기를 시도하며 붙인 버전이 있더라도 버전 0으로 보고합니다.
+    시트에 쓰일 때 새 버전을 받으므로, 변경 조회에서 그때 다시 전달됩니다.
+    """
+    if write_journal is None:
+        return columns
+    pending = []
+    for row in write_journal.pending_rows(spreadsheet_id, user_id):
+        try:
+            pending.append(_row_values(row[:8]))
+        except (TypeError, ValueError, IndexError):
+            continue
+    if not pending:
+        return columns
+    columns = columns.copy()
+    for values in pending:
+        columns.append(*values)
+    return columns
+
 def get_records_from_sheet(user_id, spreadsheet_id):
     """
-    사용자의 ID에 해당하는 시트에서 모든 일기 기록을 불러옵니다.
+    사용자의 ID에 해당하는 시트에서 모든 일기 기록을 기록 딕셔너리 목록으로 불러옵니다.
     """
+    result, status_code = get_record_columns_from_sheet(user_id, spreadsheet_id)
+    if status_code != 200:
+        return result, status_code
+    return {"status": "success", "records": result['columns'].to_records()}, 200
+
+def get_record_columns_from_sheet(user_id, spreadsheet_id):
+    """
+    사용자의 ID에 해당하는 시트에서 모든 일기 기록을 열 목록(RecordColumns)으로 불러옵니다.
+    최근에 불러온 기록은 기록 캐시에서 돌려주고, 시트에 새 행이 생긴 경우에만 다시 읽습니다.
+    write-behind 저널에 남아 있는 기록도 함께 돌려줍니다.
+    Returns:
+        tuple: ({"status": "success", "columns": RecordColumns}, 200) 또는 (오류 딕셔너리, HTTP 상태 코드).
+            열 목록은 캐시와 공유할 수 있으므로 고치지 않습니다.
+    """
+    cached = record_cache.get(user_id)
+    if cached is not None:
+        columns, row_count, needs_check = cached
+        if not needs_check:
+            record_cache.record_hit()
+            return {"status": "success", "columns": _with_pending(columns, spreadsheet_id, user_id)}, 200
+
     service = get_sheets_service()
     if not service:
         return {"status": "error", "message": "Google Sheets API 서비스에 연결할 수 없습니다."}, 500
 
     try:
-        # 사용자 ID를 시트 이름으로 사용하여 범위를 설정합니다. (A:G로 확장)
-        RANGE_NAME = f'{user_id}!A:G'
-        result = service.spreadsheets().values().get(
+        if cached is not None:
+            try:
+                changed = _has_rows_after(service, user_id, spreadsheet_id, row_count)
+            except HttpError as err:
+                logger.warning("기록 캐시 변경 확인 실패, 전체를 다시 읽습니다: %s", err)
+                changed = True
+            if not changed:
+                record_cache.mark_checked(user_id)
+                record_cache.record_hit(revalidated=True)
+                return {"status": "success", "columns": _with_pending(columns, spreadsheet_id, user_id)}, 200
+
+        record_cache.record_miss()
+        # 사용자 ID를 시트 이름으로 사용하여 범위를 설정합니다. (H열: 비동기로 생성된 요약, I열: 변경 버전)
+        RANGE_NAME = f'{user_id}!A:I'
+        result = execute(service.spreadsheets().values().get(
             spreadsheetId=spreadsheet_id,
             range=RANGE_NAME
-        ).execute()
+        ), 'values.get')
         
         values = result.get('values', [])
         
-        records = []
+        columns = RecordColumns()
         if values:
             # 헤더 행이 있는지 확인하고 건너뜁니다.
-            start_index = 1 if values and values[0] == ["Timestamp", "Emotion", "Category", "Diary Text", "x", "y", "z"] else 0
-            for row in values[start_index:]:
+            start_index = 1 if values and values[0][:7] == RECORD_HEADER else 0
+            for index in range(start_index, len(values)):
+                row = values[index]
                 if len(row) >= 7:
-                    record = {
-                        "timestamp": row[0],
-                        "emotion": row[1],
-                        "category": row[2],
-                        "text": row[3],
-                        "position": {
-                            "x": float(row[4]),
-                            "y": float(row[5]),
-                            "z": float(row[6])
-                        }
-                    }
-                    records.append(record)
-        
-        print(f"디버그: 사용자 '{user_id}'의 기록 {len(records)}개를 성공적으로 불러왔습니다.")
-        return {"status": "success", "records": records}, 200
+                    # 범위가 1행부터 시작하므로 목록 위치 + 1이 시트의 행 번호입니다.
+                    columns.append(*_row_values(row, index + 1))
+
+        record_cache.put(user_id, columns, len(values))
+        logger.debug("사용자 '%s'의 기록 %s개를 성공적으로 불러왔습니다.", user_id, len(columns))
+        return {"status": "success", "columns": _with_pending(columns, spreadsheet_id, user_id)}, 200
 
     except HttpError as err:
         # 시트를 찾을 수 없는 경우 (오류 코드 400 Bad Request, 'Unable to parse range')
         if err.resp.status == 400 and 'Unable to parse range' in str(err.content):
-            print(f"디버그: 사용자 '{user_id}'에 대한 시트가 존재하지 않습니다. 새 사용자일 수 있습니다.")
-            return {"status": "success", "records": []}, 200
-        print(f"ERROR: Google Sheets API 호출 중 오류 발생: {err}")
+            logger.debug("사용자 '%s'에 대한 시트가 존재하지 않습니다. 새 사용자일 수 있습니다.", user_id)
+            return {"status": "success", "columns": _with_pending(RecordColumns(), spreadsheet_id, user_id)}, 200
+        logger.error("Google Sheets API 호출 중 오류 발생: %s", err)
         return {"status": "error", "message": "Google Sheets API 오류가 발생했습니다."}, 500
+    except SheetsUnavailableError as e:
+        logger.error("%s", e)
+        return {"status": "error", "message": "요청이 많아 잠시 후 다시 시도해 주세요."}, 503
     except Exception as e:
-        print(f"ERROR: 데이터 불러오기 중 예상치 못한 오류 발생: {e}")
+        logger.error("데이터 불러오기 중 예상치 못한 오류 발생: %s", e)
         return {"status": "error", "message": "서버 내부 오류가 발생했습니다."}, 500
 
+def attach_summary(user_id, spreadsheet_id, row_number, summary):
+    """
+    이미 저장된 기록 행의 H열에 요약을, I열에 새 변경 버전을 기록합니다. SummaryWorker가 요약을 끝낸 뒤 호출합니다.
+    Args:
+        row_number (int): save_to_sheet가 반환한 행 번호.
+        summary (str): 요약 모델이 생성한 요약문.
+    """
+    service = get_sheets_service()
+    if not service:
+        raise RuntimeError("Google Sheets API 서비스에 연결할 수 없습니다.")
+
+    execute(service.spreadsheets().values().update(
+        spreadsheetId=spreadsheet_id,
+        range=f'{user_id}!H{row_number}:I{row_number}',
+        valueInputOption='RAW',
+        body={'values': [[summary, next_version()]]}
+    ), 'values.update')
+    # 변경 확인은 A열만 보므로, 요약이 반영되도록 캐시를 비웁니다.
+    record_cache.invalidate(user_id)
+
 def get_user_sheet_id(user_id, spreadsheet_id):
     """
     주어진 user_id와 일치하는 시트의 ID를 찾아 반환합니다.
@@ -134,16 +399,16 @@ def get_user_sheet_id(user_id, spreadsheet_id):
     """
     service = get_sheets_service()
     if not service:
-        print("ERROR: Google Sheets 서비스에 연결할 수 없습니다.")
+        logger.error("Google Sheets 서비스에 연결할 수 없습니다.")
         return None
 
     try:
         # 스프레드시트의 모든 시트 메타데이터를 가져옵니다.
         # fields='sheets.properties'를 사용하여 필요한 정보만 요청합니다.
-        result = service.spreadsheets().get(
+        result = execute(service.spreadsheets().get(
             spreadsheetId=spreadsheet_id,
             fields='sheets.properties'
-        ).execute()
+        ), 'spreadsheets.get')
 
         sheets = result.get('sheets', [])
         for sheet in sheets:
@@ -153,16 +418,16 @@ def get_user_sheet_id(user_id, spreadsheet_id):
             
             # 시트 이름이 user_id와 일치하는지 확인합니다.
             if sheet_title == user_id:
-                print(f"디버그: '{user_id}'에 해당하는 시트를 찾았습니다. 시트 ID: {sheet_id}")
+                logger.debug("'%s'에 해당하는 시트를 찾았습니다. 시트 ID: %s", user_id, sheet_id)
                 return sheet_id
         
         # 일치하는 시트를 찾지 못한 경우
-        print(f"디버그: '{user_id}'에 해당하는 시트를 찾을 수 없습니다.")
+        logger.debug("'%s'에 해당하는 시트를 찾을 수 없습니다.", user_id)
         return None
 
     except HttpError as err:
-        print(f"ERROR: Google Sheets API 호출 중 오류 발생: {err}")
+        logger.error("Google Sheets API 호출 중 오류 발생: %s", err)
         return None
     except Exception as e:
-        print(f"ERROR: 시트 ID 조회 중 예상치 못한 오류 발생: {e}")
+        logger.error("시트 ID 조회 중 예상치 못한 오류 발생: %s", e)
         return None
\ No newline at end of file
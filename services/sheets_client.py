@@ -0,0 +1,153 @@
+import logging
+import os
+import queue
+import threading
+import httplib2
+import google_auth_httplib2
+from contextlib import contextmanager
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+from services.settings import SHEETS_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+# 앱 전체가 공유하는 Google Sheets 클라이언트 계층입니다.
+# credentials.json 읽기, 자격 증명 생성, discovery 문서 로드는 워커 프로세스당 한 번만 수행하고,
+# 이후 요청은 미리 인증된 HTTP 연결(keep-alive)을 풀에서 빌려 사용합니다.
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+CREDENTIALS_PATH = os.path.join(base_dir, '..', 'credentials.json')
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+
+
+class SheetsClientPool:
+    """
+    인증된 HTTP 연결(AuthorizedHttp)을 스레드 안전하게 빌려주고 돌려받는 풀입니다.
+    httplib2.Http 객체는 스레드 안전하지 않으므로 한 번에 한 스레드만 사용하도록 보장합니다.
+    """
+
+    def __init__(self, credentials, size):
+        self.credentials = credentials
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.clients_built = 0
+        self.clients_reused = 0
+        self.checkouts = 0
+
+    def _new_client(self):
+        # AuthorizedHttp는 토큰이 만료되었거나 401 응답을 받으면 자동으로 토큰을 갱신합니다.
+        # httplib2.Http는 같은 호스트에 대한 연결을 유지(keep-alive)합니다.
+        with self._lock:
+            self.clients_built += 1
+        return google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=30))
+
+    def acquire(self):
+        """풀에서 연결을 하나 꺼냅니다. 남은 연결이 없으면 새로 만듭니다."""
+        with self._lock:
+            self.checkouts += 1
+        try:
+            client = self._idle.get_nowait()
+        except queue.Empty:
+            return self._new_client()
+        with self._lock:
+            self.clients_reused += 1
+        return client
+
+    def release(self, client):
+        """사용이 끝난 연결을 풀에 돌려놓습니다. 풀이 가득 차 있으면 연결을 버립니다."""
+        if self._idle.qsize() < self.size:
+            self._idle.put(client)
+
+    @contextmanager
+    def connection(self):
+        client = self.acquire()
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def stats(self):
+        return {
+            "pool_size": self.size,
+            "idle": self._idle.qsize(),
+            "clients_built": self.clients_built,
+            "clients_reused": self.clients_reused,
+            "checkouts": self.checkouts,
+        }
+
+
+class PooledHttpRequest(HttpRequest):
+    """
+    execute() 호출 시 풀에서 연결을 빌려 요청을 보내는 HttpRequest입니다.
+    build()의 requestBuilder로 전달되어, 기존 코드의 `.execute()` 호출을 그대로 사용할 수 있게 합니다.
+    """
+
+    def execute(self, http=None, num_retries=0):
+        if http is not None or _pool is None:
+            return super().execute(http=http, num_retries=num_retries)
+        with _pool.connection() as client:
+            return super().execute(http=client, num_retries=num_retries)
+
+
+# 워커 프로세스 단위로 공유되는 상태
+_lock = threading.Lock()
+_service = None
+_pool = None
+_owner_pid = None
+_services_built = 0
+_services_reused = 0
+
+
+def get_sheets_service():
+    """
+    공유 Google Sheets API 서비스 객체를 반환합니다.
+    처음 호출될 때 한 번만 생성하며, 실패하면 None을 반환합니다.
+    """
+    global _service, _pool, _owner_pid, _services_built, _services_reused
+    pid = os.getpid()
+    with _lock:
+        # fork된 워커는 부모의 연결을 공유하면 안 되므로 프로세스마다 새로 만듭니다.
+        if _service is not None and _owner_pid == pid:
+            _services_reused += 1
+            return _service
+        try:
+            if not os.path.exists(CREDENTIALS_PATH):
+                raise FileNotFoundError("credentials.json 파일이 존재하지 않습니다. 프로젝트 최상위 폴더에 넣어주세요.")
+
+            creds = service_account.Credentials.from_service_account_file(CREDENTIALS_PATH, scopes=SCOPES)
+            _pool = SheetsClientPool(creds, SHEETS_POOL_SIZE)
+            _service = build('sheets', 'v4', credentials=creds, requestBuilder=PooledHttpRequest, cache_discovery=False)
+            _owner_pid = pid
+            _services_built += 1
+            logger.info("Google Sheets 서비스 객체를 생성했습니다. (pid: %s)", pid)
+            return _service
+        except Exception as e:
+            logger.error("Google Sheets API 서비스 초기화 오류: %s", e)
+            return None
+
+
+def use_sheets_service(service):
+    """
+    이 프로세스의 공유 서비스 객체를 미리 만든 객체로 바꿉니다. 이후 get_sheets_service()는 이 객체를 반환합니다.
+    오프라인 벤치마크(bench/fakes.py)가 실제 API 대신 가짜 Sheets 서비스를 쓰게 할 때 사용하며, 연결 풀은 만들지 않습니다.
+    """
+    global _service, _owner_pid
+    with _lock:
+        _service = service
+        _owner_pid = os.getpid()
+
+
+def get_client_stats():
+    """
+    서비스 객체 생성/재사용 횟수와 연결 풀 상태를 반환합니다.
+    services_built가 1에 머물러 있으면 요청마다 초기화 비용이 들지 않는다는 뜻입니다.
+    """
+    with _lock:
+        stats = {
+            "services_built": _services_built,
+            "services_reused": _services_reused,
+        }
+    stats.update(_pool.stats() if _pool else {})
+    return stats
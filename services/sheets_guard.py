@@ -0,0 +1,336 @@
+import logging
+import random
+import socket
+import threading
+import time
+from googleapiclient.errors import HttpError
+from services.latency import LatencyWindow, LatencyHistogram
+from services.settings import (
+    SHEETS_READ_QUOTA_PER_MIN, SHEETS_WRITE_QUOTA_PER_MIN, SHEETS_QUOTA_SHARE, SHEETS_BURST,
+    SHEETS_READ_DEADLINE, SHEETS_WRITE_DEADLINE, SHEETS_BACKOFF_BASE, SHEETS_BACKOFF_MAX,
+    SHEETS_CIRCUIT_THRESHOLD, SHEETS_CIRCUIT_COOLDOWN,
+)
+
+logger = logging.getLogger(__name__)
+
+# 모든 Google Sheets API 호출이 거쳐 가는 보호 계층입니다.
+# - 읽기/쓰기 할당량을 토큰 버킷으로 미리 나눠 써서 429 응답을 받기 전에 스스로 속도를 조절합니다.
+# - 429와 5xx, 네트워크 오류는 지터를 섞은 지수 백오프로 제한 시간(deadline) 안에서 다시 시도합니다.
+#   values.append처럼 다시 보내면 결과가 달라지는 작업은 요청이 반영되지 않은 것이 확실할 때(429)나
+#   verify()로 반영되지 않았음을 확인했을 때만 다시 보냅니다.
+# - 연속으로 실패하면 회로 차단기(circuit breaker)를 열어 한동안 호출을 바로 거절합니다.
+# - 작업(endpoint)별 지연 시간 히스토그램과 재시도/조절 횟수를 기록합니다.
+#
+# 사용법: request.execute() 대신 execute(request, 'values.get')을 호출합니다.
+
+# 다시 시도할 HTTP 상태 코드
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# 읽기 할당량을 사용하는 작업. 나머지는 쓰기 할당량을 사용합니다.
+READ_OPS = {'values.get', 'values.batchGet', 'spreadsheets.get'}
+# 같은 요청을 다시 보내도 결과가 같은 작업. 응답을 받지 못한 5xx/시간 초과/연결 오류 뒤에도 그대로 다시 보냅니다.
+# spreadsheets.batchUpdate(회원가입)는 이미 적용된 뒤 다시 보내면 '이미 있는 시트'로 거절되고, register.py가 시트가 있는지 확인해 처리합니다.
+# values.append는 이미 적용된 요청을 다시 보내면 행이 두 번 추가되므로 포함하지 않습니다.
+IDEMPOTENT_OPS = READ_OPS | {'values.update', 'spreadsheets.batchUpdate'}
+# 서버가 요청을 처리하지 않고 거절한 상태 코드 (할당량 초과). 다시 보내도 중복되지 않습니다.
+NOT_APPLIED_STATUSES = {429}
+
+
+class SheetsUnavailableError(RuntimeError):
+    """할당량 대기나 회로 차단 때문에 제한 시간 안에 호출하지 못했을 때 발생합니다."""
+
+
+class CircuitOpenError(SheetsUnavailableError):
+    """회로 차단기가 열려 있어 호출을 보내지 않았을 때 발생합니다."""
+
+
+class TokenBucket:
+    """
+    분당 rate_per_min개의 토큰이 채워지고 최대 capacity개까지 쌓이는 토큰 버킷입니다.
+    """
+
+    def __init__(self, rate_per_min, capacity):
+        self.rate = max(rate_per_min, 0.001) / 60.0
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, deadline):
+        """
+        토큰 하나를 꺼냅니다. 토큰이 없으면 deadline(monotonic 시각)까지 기다립니다.
+        Returns:
+            bool: 토큰을 얻었으면 True, 제한 시간 안에 얻지 못했으면 False.
+        """
+        waited = False
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    if waited:
+                        self.wait_seconds += now - started
+                    return True
+                delay = (1 - self._tokens) / self.rate
+                if not waited:
+                    waited = True
+                    self.throttled += 1
+            if now + delay > deadline:
+                return False
+            time.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate_per_min": round(self.rate * 60, 3),
+                "capacity": self.capacity,
+                "tokens": round(self._tokens, 3),
+                "throttled": self.throttled,
+                "wait_seconds": round(self.wait_seconds, 3),
+            }
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 threshold번에 이르면 열리고(open), cooldown초가 지나면 시험 호출 하나만 통과시킵니다(half-open).
+    시험 호출이 성공하면 닫히고(closed), 실패하면 다시 cooldown초 동안 열립니다.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                    logger.error("Google Sheets 호출이 연속으로 실패해 %.0f초 동안 호출을 중단합니다.", self.cooldown)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class _OpStats:
+    __slots__ = ('calls', 'errors', 'retries', 'verified', 'window', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.verified = 0
+        self.window = LatencyWindow()
+        self.histogram = LatencyHistogram()
+
+
+class SheetsGuard:
+    """
+    토큰 버킷, 재시도, 제한 시간, 회로 차단기를 묶어 Sheets API 요청을 실행합니다.
+    """
+
+    def __init__(self, read_bucket, write_bucket, breaker, read_deadline, write_deadline,
+                 backoff_base, backoff_max):
+        self.buckets = {'read': read_bucket, 'write': write_bucket}
+        self.breaker = breaker
+        self.deadlines = {'read': read_deadline, 'write': write_deadline}
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._ops = {}
+        self._lock = threading.Lock()
+
+    def _op_stats(self, op):
+        with self._lock:
+            stats = self._ops.get(op)
+            if stats is None:
+                stats = self._ops[op] = _OpStats()
+            return stats
+
+    @staticmethod
+    def _is_retryable(error):
+        if isinstance(error, HttpError):
+            return error.resp.status in RETRYABLE_STATUSES
+        return isinstance(error, (socket.timeout, ConnectionError, TimeoutError))
+
+    @staticmethod
+    def _not_applied(error):
+        return isinstance(error, HttpError) and error.resp.status in NOT_APPLIED_STATUSES
+
+    @staticmethod
+    def _retry_after(error):
+        # 429/503 응답에 Retry-After 헤더가 있으면 그 값을 우선합니다.
+        if isinstance(error, HttpError):
+            try:
+                return float(error.resp.get('retry-after'))
+            except (TypeError, ValueError):
+                return None
+        return None
+
+    def execute(self, request, op, deadline=None, verify=None):
+        """
+        request.execute()를 보호 계층 안에서 실행합니다.
+        Args:
+            request: googleapiclient의 HttpRequest (아직 실행하지 않은 요청).
+            op (str): 작업 이름 ('values.get', 'values.append' 등). 할당량 종류와 통계 구분에 사용합니다.
+            deadline (float): 이 호출의 전체 제한 시간(초). 생략하면 읽기/쓰기 기본값을 사용합니다.
+            verify (callable): IDEMPOTENT_OPS에 없는 작업이 응답 없이 실패했을 때, 다시 보내기 전에 호출합니다.
+                요청이 이미 반영되었으면 응답 대신 쓸 값을, 반영되지 않았으면 None을 반환합니다.
+                생략하면 요청을 보낸 뒤의 실패는 다시 시도하지 않습니다.
+        Returns:
+            dict: API 응답 (또는 verify()가 반환한 값).
+        Raises:
+            HttpError: 다시 시도할 수 없는 오류이거나 제한 시간 안에 재시도가 모두 실패한 경우 마지막 오류.
+            SheetsUnavailableError: 할당량 대기 시간이 제한 시간을 넘었거나 회로가 열려 있는 경우.
+        """
+        kind = 'read' if op in READ_OPS else 'write'
+        stats = self._op_stats(op)
+        stats.calls += 1
+        expires = time.monotonic() + (deadline if deadline is not None else self.deadlines[kind])
+        attempt = 0
+        while True:
+            # 토큰을 먼저 받아야 half-open 상태의 시험 호출 기회를 대기 중에 낭비하지 않습니다.
+            if not self.buckets[kind].acquire(expires):
+                stats.errors += 1
+                raise SheetsUnavailableError(f"Google Sheets {kind} 할당량 대기 시간이 제한 시간을 넘었습니다 ({op}).")
+            if not self.breaker.allow():
+                stats.errors += 1
+                raise CircuitOpenError(f"Google Sheets 호출이 일시 중단되었습니다 ({op}).")
+
+            started = time.perf_counter()
+            try:
+                result = request.execute()
+            except Exception as e:
+                elapsed = time.perf_counter() - started
+                stats.window.add(elapsed)
+                stats.histogram.add(elapsed)
+                if not self._is_retryable(e):
+                    # 400/403/404 같은 오류는 요청 자체의 문제이므로 회로 상태와 무관하게 그대로 올립니다.
+                    self.breaker.record_success()
+                    stats.errors += 1
+                    raise
+                self.breaker.record_failure()
+                attempt += 1
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+                # 여러 워커가 같은 시점에 재시도하지 않도록 full jitter를 사용합니다.
+                delay = random.uniform(0, delay)
+                retry_after = self._retry_after(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if time.monotonic() + delay >= expires:
+                    stats.errors += 1
+                    raise
+                ambiguous = op not in IDEMPOTENT_OPS and not self._not_applied(e)
+                if ambiguous and verify is None:
+                    # 요청이 반영된 뒤 응답만 잃었을 수 있으므로 확인할 방법이 없으면 다시 보내지 않습니다.
+                    stats.errors += 1
+                    raise
+                logger.warning("Sheets %s 호출 실패, %.2f초 후 다시 시도합니다 (%s번째): %s", op, delay, attempt, e)
+                time.sleep(delay)
+                if ambiguous:
+                    # 늦게 처리된 요청도 확인할 수 있도록 백오프 대기가 끝난 뒤에 반영 여부를 봅니다.
+                    try:
+                        applied = verify()
+                    except Exception as verify_error:
+                        stats.errors += 1
+                        logger.error("Sheets %s 호출이 반영되었는지 확인하지 못해 다시 보내지 않습니다: %s", op, verify_error)
+                        raise e
+                    if applied is not None:
+                        stats.verified += 1
+                        logger.warning("Sheets %s 응답 오류가 있었지만 요청이 이미 반영되어 있어 다시 보내지 않습니다: %s", op, e)
+                        return applied
+                stats.retries += 1
+                continue
+
+            elapsed = time.perf_counter() - started
+            stats.window.add(elapsed)
+            stats.histogram.add(elapsed)
+            self.breaker.record_success()
+            return result
+
+    def stats(self):
+        with self._lock:
+            ops = dict(self._ops)
+        return {
+            "read_bucket": self.buckets['read'].stats(),
+            "write_bucket": self.buckets['write'].stats(),
+            "circuit": self.breaker.stats(),
+            "ops": {
+                op: {
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "retries": s.retries,
+                    "verified": s.verified,
+                    "latency": s.window.summary(),
+                    "histogram": s.histogram.snapshot(),
+                }
+                for op, s in ops.items()
+            },
+        }
+
+
+# 워커 프로세스 전체가 공유하는 보호 계층
+sheets_guard = SheetsGuard(
+    read_bucket=TokenBucket(SHEETS_READ_QUOTA_PER_MIN * SHEETS_QUOTA_SHARE, SHEETS_BURST),
+    write_bucket=TokenBucket(SHEETS_WRITE_QUOTA_PER_MIN * SHEETS_QUOTA_SHARE, SHEETS_BURST),
+    breaker=CircuitBreaker(SHEETS_CIRCUIT_THRESHOLD, SHEETS_CIRCUIT_COOLDOWN),
+    read_deadline=SHEETS_READ_DEADLINE,
+    write_deadline=SHEETS_WRITE_DEADLINE,
+    backoff_base=SHEETS_BACKOFF_BASE,
+    backoff_max=SHEETS_BACKOFF_MAX,
+)
+
+
+def execute(request, op, deadline=None, verify=None):
+    """sheets_guard.execute()의 축약형입니다."""
+    return sheets_guard.execute(request, op, deadline, verify)
+
+
+def get_guard_stats():
+    return sheets_guard.stats()
@@ -0,0 +1,96 @@
+from services.storage import StorageBackend
+from services.sheets import (
+    save_to_sheet, save_rows_to_sheet, get_records_from_sheet, get_record_columns_from_sheet, attach_summary, write_journal
+)
+from services.register import create_new_user
+from services.user_directory import user_directory
+from services.record_cache import record_cache
+from services.settings import SHEETS_SYNC_OVERLAP_MS
+
+# 기존 Google Sheets 코드를 저장소 인터페이스로 감싼 구현입니다.
+# 사용자 조회는 사용자 디렉터리 캐시, 기록 저장은 write-behind 저널, 기록 조회는 기록 캐시를 그대로 사용합니다.
+# 기록 캐시는 열 목록으로 보관하므로, 버전 확인/페이지 조회/변경 조회는 기록 딕셔너리를 필요한 만큼만 만듭니다.
+
+
+class SheetsStorage(StorageBackend):
+    name = 'sheets'
+
+    def __init__(self, spreadsheet_id):
+        self.spreadsheet_id = spreadsheet_id
+
+    def start(self, on_saved_factory=None):
+        # 지난 실행에서 시트에 쓰지 못하고 남은 일기 기록이 있으면 저널에서 다시 읽어 이어서 씁니다.
+        if write_journal is not None:
+            if on_saved_factory is not None:
+                # 저널의 행은 시트의 한 행(A:I)이므로 D열이 일기 본문입니다.
+                write_journal.on_saved_factory = lambda user_id, row: on_saved_factory(user_id, row[3])
+            write_journal.start()
+
+    def users_available(self):
+        return user_directory.loaded
+
+    def lookup_user(self, email):
+        return user_directory.lookup(email)
+
+    def create_user(self, email, password):
+        return create_new_user(email, password)
+
+    def append_record(self, user_id, diary_text, emotion, category, timestamp, position, on_saved=None):
+        return save_to_sheet(diary_text, emotion, category, timestamp, user_id, self.spreadsheet_id, position, on_saved)
+
+    def append_records(self, user_id, entries):
+        return save_rows_to_sheet(entries, user_id, self.spreadsheet_id)
+
+    def list_records(self, user_id):
+        return get_records_from_sheet(user_id, self.spreadsheet_id)
+
+    def record_columns(self, user_id):
+        return get_record_columns_from_sheet(user_id, self.spreadsheet_id)
+
+    def iter_records(self, user_id, after=None):
+        # 기본 구현과 같은 위치 키(timestamp, 순번)를 쓰되, 열 목록에서 내보낼 기록만 딕셔너리로 만듭니다.
+        result, status_code = self.record_columns(user_id)
+        if status_code != 200:
+            return result, status_code
+        columns = result['columns']
+
+        def generate():
+            for seq, record in columns.iter_records(after[1] + 1 if after else 0):
+                yield (record['timestamp'], seq), record
+
+        return {"status": "success", "records": generate()}, 200
+
+    def attach_summary(self, user_id, row_number, summary):
+        attach_summary(user_id, self.spreadsheet_id, row_number, summary)
+
+    def get_version(self, user_id):
+        # 기록 캐시에서 읽으므로 보통은 시트를 다시 읽지 않습니다.
+        result, status_code = self.record_columns(user_id)
+        if status_code != 200:
+            return result, status_code
+        columns = result['columns']
+        return {"status": "success", "version": columns.max_version, "count": len(columns)}, 200
+
+    def changes_since(self, user_id, since):
+        result, status_code = self.record_columns(user_id)
+        if status_code != 200:
+            return result, status_code
+        columns = result['columns']
+        if since > columns.max_version:
+            # 다른 워커가 쓴 행이나 붙인 요약이 이 워커의 캐시에 아직 없을 수 있으므로, 시트를 다시 읽어 확인합니다.
+            record_cache.invalidate(user_id)
+            result, status_code = self.record_columns(user_id)
+            if status_code != 200:
+                return result, status_code
+            columns = result['columns']
+        reset = since > columns.max_version
+        if reset:
+            # 시트에 없는 버전: 다른 저장소에서 받았거나 시트의 행이 지워졌으므로 모든 기록을 다시 보냅니다.
+            since = 0
+        version = max(since, columns.max_version)
+        # 시트의 버전은 쓰는 시점의 시각이므로, 늦게 반영된 행을 놓치지 않도록 여유 구간만큼 앞에서부터 다시 보냅니다.
+        threshold = since - SHEETS_SYNC_OVERLAP_MS if since > 0 else -1
+        ids, versions = columns.ids, columns.versions
+        changed = [columns.record(seq) for seq in range(len(columns)) if ids[seq] >= 0 and versions[seq] > threshold]
+        changed.sort(key=lambda record: (record['version'], record['id']))
+        return {"status": "success", "records": changed, "version": version, "reset": reset}, 200
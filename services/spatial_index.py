@@ -0,0 +1,209 @@
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from services.settings import SPATIAL_SPAWN_RANGE, SPATIAL_RESERVATION_SECONDS, SPATIAL_INDEX_USERS
+
+# 구체 위치에 대한 균일 해시 격자(uniform hash grid) 공간 인덱스입니다.
+# 격자 한 칸의 크기를 반발 거리(MIN_DISTANCE)와 같게 두면, 어떤 점에서 그 거리 안에 있는 점은
+# 자기 칸과 바로 옆 26칸에만 있으므로 모든 쌍을 비교하지 않고 이웃만 찾을 수 있습니다.
+#  - neighbor_pairs(): 레이아웃 엔진의 반발력 계산용. NumPy 정렬/탐색으로 가까운 쌍을 한꺼번에 찾습니다.
+#  - SpatialHashGrid: 새 기록의 겹치지 않는 위치를 고르는 데 쓰는 점 단위 인덱스.
+
+# 이웃 칸 오프셋 27개 (자기 칸 포함)
+_OFFSETS = np.array([(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)], dtype=np.int64)
+
+
+def neighbor_pairs(positions, radius):
+    """
+    거리가 radius보다 작은 모든 (i, j) 쌍을 반환합니다. (i, j)와 (j, i)가 모두 들어 있고, 같은 위치의 쌍은 빠집니다.
+    Args:
+        positions (ndarray): (n, 3) 배열.
+    Returns:
+        tuple: (rows, cols) 정수 배열.
+    """
+    n = len(positions)
+    if n < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    cells = np.floor(positions / radius).astype(np.int64)
+    # 칸 좌표를 0 이상으로 옮기고 (이웃 오프셋 -1을 위해 1칸 여유), 한 정수 키로 펼칩니다.
+    cells -= cells.min(axis=0) - 1
+    dims = cells.max(axis=0) + 2
+    if float(dims[0]) * float(dims[1]) * float(dims[2]) >= 2 ** 62:
+        raise ValueError("위치 범위가 너무 넓어 격자 키를 만들 수 없습니다.")
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    limit = radius * radius
+    all_rows, all_cols = [], []
+    for dx, dy, dz in _OFFSETS:
+        neighbor_keys = keys + (dx * dims[1] + dy) * dims[2] + dz
+        start = np.searchsorted(sorted_keys, neighbor_keys, side='left')
+        counts = np.searchsorted(sorted_keys, neighbor_keys, side='right') - start
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        # 점마다 [start, start + count) 범위를 한 배열로 펼칩니다.
+        rows = np.repeat(np.arange(n), counts)
+        slots = np.repeat(start - np.cumsum(counts) + counts, counts) + np.arange(total)
+        cols = order[slots]
+        diff = positions[rows] - positions[cols]
+        squared = np.einsum('ij,ij->i', diff, diff)
+        close = (squared < limit) & (squared > 0)
+        all_rows.append(rows[close])
+        all_cols.append(cols[close])
+    if not all_rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    return np.concatenate(all_rows), np.concatenate(all_cols)
+
+
+class SpatialHashGrid:
+    """
+    점을 격자 칸별 목록에 넣어 두고, 반지름 안의 이웃을 주변 27칸만 살펴 찾습니다 (점 하나당 평균 O(1)).
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self._cells = {}
+        self.size = 0
+        # 경계 상자. 빈 자리를 끝내 찾지 못했을 때 바깥쪽 위치를 정하는 데 사용합니다.
+        self.max_x = None
+
+    def _cell(self, point):
+        size = self.cell_size
+        return (math.floor(point[0] / size), math.floor(point[1] / size), math.floor(point[2] / size))
+
+    def insert(self, point, key=None):
+        point = (float(point[0]), float(point[1]), float(point[2]))
+        self._cells.setdefault(self._cell(point), []).append((point, key))
+        self.size += 1
+        self.max_x = point[0] if self.max_x is None else max(self.max_x, point[0])
+
+    def neighbors(self, point, radius):
+        """point에서 radius보다 가까운 점들의 (위치, 키) 목록을 반환합니다. radius는 cell_size 이하여야 합니다."""
+        cx, cy, cz = self._cell(point)
+        limit = radius * radius
+        found = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for other, key in self._cells.get((cx + dx, cy + dy, cz + dz), ()):
+                        squared = (other[0] - point[0]) ** 2 + (other[1] - point[1]) ** 2 + (other[2] - point[2]) ** 2
+                        if squared < limit:
+                            found.append((other, key))
+        return found
+
+    def is_free(self, point, min_distance):
+        return not self.neighbors(point, min_distance)
+
+    def find_free_position(self, min_distance, spawn_range, attempts=30, rng=random):
+        """
+        다른 점과 min_distance 이상 떨어진 위치를 반환합니다.
+        먼저 [-spawn_range, spawn_range) 정육면체 안에서 임의로 고르고, 빈 자리가 없으면 범위를 두 배씩 넓힙니다.
+        그래도 찾지 못하면 모든 점보다 x가 큰 곳을 돌려주므로 항상 겹치지 않는 위치를 반환합니다.
+        """
+        extent = spawn_range
+        for _ in range(4):
+            for _ in range(attempts):
+                candidate = (rng.uniform(-extent, extent), rng.uniform(-extent, extent), rng.uniform(-extent, extent))
+                if self.is_free(candidate, min_distance):
+                    return candidate
+            extent *= 2
+        # 부동소수점 오차로 거리가 min_distance보다 아주 조금 작아지지 않도록 약간의 여유를 둡니다.
+        return ((self.max_x or 0.0) + min_distance * 1.001, 0.0, 0.0)
+
+
+class UserSpatialIndex:
+    """
+    한 사용자의 저장된 구체 위치로 만든 격자와, 아직 저장되지 않은 예약 위치를 함께 보관합니다.
+    """
+
+    def __init__(self, key, records, cell_size):
+        self.key = key
+        self.grid = SpatialHashGrid(cell_size)
+        for record in records:
+            position = record['position']
+            self.grid.insert((position['x'], position['y'], position['z']), record.get('id'))
+        # (위치, 예약 시각). 기록이 바뀌어 격자를 다시 만들 때 최근 예약은 옮겨 담습니다.
+        self.reservations = []
+
+    def reserve(self, point):
+        self.grid.insert(point)
+        self.reservations.append((point, time.monotonic()))
+
+
+class SpatialIndexCache:
+    """
+    사용자별 공간 인덱스를 보관하고, 새 기록에 쓸 겹치지 않는 위치를 골라 예약합니다.
+    기록의 변경 버전과 수가 달라지면 저장된 위치로 격자를 다시 만듭니다.
+    """
+
+    def __init__(self, cell_size, min_distance, spawn_range, reservation_seconds, max_users):
+        self.cell_size = cell_size
+        self.min_distance = min_distance
+        self.spawn_range = spawn_range
+        self.reservation_seconds = reservation_seconds
+        self.max_users = max(1, max_users)
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.suggestions = 0
+
+    def suggest(self, user_id, key, load_records):
+        """
+        겹치지 않는 새 위치를 골라 예약하고 반환합니다.
+        Args:
+            key: 기록 상태를 나타내는 값 (변경 버전, 기록 수). 캐시된 인덱스의 키와 다르면 다시 만듭니다.
+            load_records (callable): 인덱스를 다시 만들 때 사용자 기록 목록을 반환하는 함수. 읽지 못하면 None을 반환합니다.
+        Returns:
+            dict: {"x", "y", "z"}. 기록을 읽지 못한 경우 None.
+        """
+        with self._lock:
+            index = self._indexes.get(user_id)
+        if index is None or index.key != key:
+            records = load_records()
+            if records is None:
+                return None
+            index = self._rebuild(user_id, key, records, index)
+        with self._lock:
+            point = index.grid.find_free_position(self.min_distance, self.spawn_range)
+            index.reserve(point)
+            self._indexes.move_to_end(user_id)
+            self.suggestions += 1
+        return {"x": point[0], "y": point[1], "z": point[2]}
+
+    def _rebuild(self, user_id, key, records, previous):
+        index = UserSpatialIndex(key, records, self.cell_size)
+        with self._lock:
+            if previous is not None:
+                # 예약한 위치의 기록이 아직 저장되지 않았을 수 있으므로 최근 예약은 유지합니다.
+                now = time.monotonic()
+                for point, reserved_at in previous.reservations:
+                    if now - reserved_at < self.reservation_seconds:
+                        index.grid.insert(point)
+                        index.reservations.append((point, reserved_at))
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+            self.builds += 1
+        return index
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._indexes),
+                "builds": self.builds,
+                "suggestions": self.suggestions,
+                "points": sum(index.grid.size for index in self._indexes.values()),
+            }
+
+
+# 앱 전체가 공유하는 사용자별 공간 인덱스. 격자 한 칸과 최소 거리를 physics.js의 MIN_DISTANCE(0.5 * 2.5)와 같게 둡니다.
+# 예약은 이 프로세스 안에서만 유지되므로, 워커가 여러 개면 서로 다른 워커가 가까운 위치를 줄 수 있습니다.
+spatial_index = SpatialIndexCache(0.5 * 2.5, 0.5 * 2.5, SPATIAL_SPAWN_RANGE, SPATIAL_RESERVATION_SECONDS, SPATIAL_INDEX_USERS)
@@ -0,0 +1,330 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from services.storage import StorageBackend, DUPLICATE_EMAIL_MESSAGE
+from services.record_columns import RecordColumns
+from services.latency import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+# 로컬 SQLite 파일에 사용자와 일기 기록을 저장하는 저장소 구현입니다.
+# 요청마다 네트워크를 거치지 않으므로 오프라인 실행/테스트/부하 측정에 사용하고,
+# 기록이 많은 사용자도 (user_id, timestamp) 인덱스로 수 밀리초 안에 읽습니다.
+# WAL 모드를 사용해 여러 스레드/워커 프로세스가 읽는 동안에도 쓰기가 막히지 않습니다.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id    TEXT PRIMARY KEY,
+    email      TEXT NOT NULL UNIQUE,  -- UNIQUE 제약이 이메일 인덱스 역할을 합니다.
+    password   TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id   TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    emotion   TEXT NOT NULL,
+    category  TEXT NOT NULL,
+    text      TEXT NOT NULL,
+    x         REAL NOT NULL,
+    y         REAL NOT NULL,
+    z         REAL NOT NULL,
+    summary   TEXT,
+    version   INTEGER NOT NULL DEFAULT 0
+);
+-- 사용자별 변경 버전 카운터. 기록을 추가하거나 바꿀 때마다 같은 트랜잭션 안에서 1씩 올립니다.
+CREATE TABLE IF NOT EXISTS user_versions (
+    user_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_records_user_time ON records (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_records_user_version ON records (user_id, version);
+"""
+
+# 기록을 읽을 때 사용하는 열 순서 (_row_to_record와 맞춰야 합니다)
+RECORD_COLUMNS = 'timestamp, emotion, category, text, x, y, z, summary, id, version'
+
+
+def _row_to_record(row):
+    """RECORD_COLUMNS 순서로 읽은 records 테이블의 한 행을 기록 딕셔너리로 변환합니다."""
+    record = {
+        "id": row[8],
+        "version": row[9],
+        "timestamp": row[0],
+        "emotion": row[1],
+        "category": row[2],
+        "text": row[3],
+        "position": {"x": row[4], "y": row[5], "z": row[6]},
+    }
+    if row[7]:
+        record["summary"] = row[7]
+    return record
+
+
+class SqliteStorage(StorageBackend):
+    """
+    Args:
+        path (str): SQLite 데이터베이스 파일 경로. 없으면 새로 만듭니다.
+    """
+
+    name = 'sqlite'
+    # 스트리밍으로 읽을 때 한 번에 가져오는 행 수
+    FETCH_SIZE = 256
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # sqlite3 연결은 만든 스레드에서만 사용할 수 있으므로 스레드마다 연결을 하나씩 둡니다.
+        self._local = threading.local()
+        self.read_latency = LatencyWindow()
+        self.write_latency = LatencyWindow()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            # 버전 열이 없던 이전 파일은 열을 추가합니다 (기존 기록의 버전은 0).
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(records)')}
+            if 'version' not in columns:
+                conn.execute('ALTER TABLE records ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+            conn.executescript(INDEXES)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # WAL 모드에서는 NORMAL이어도 커밋된 트랜잭션이 손상되지 않습니다 (전원 장애 시 마지막 커밋만 잃을 수 있음).
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # --- 사용자 ---
+
+    def lookup_user(self, email):
+        row = self._connection().execute(
+            'SELECT password, user_id FROM users WHERE email = ?', (email,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def create_user(self, email, password):
+        user_id = str(uuid.uuid4())
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    'INSERT INTO users (user_id, email, password, created_at) VALUES (?, ?, ?, ?)',
+                    (user_id, email, password, time.time())
+                )
+        except sqlite3.IntegrityError:
+            logger.debug("'%s'은(는) 이미 등록된 이메일입니다.", email)
+            return False, DUPLICATE_EMAIL_MESSAGE
+        except sqlite3.Error as e:
+            logger.error("사용자 등록 중 데이터베이스 오류 발생: %s", e)
+            return False, "서버 내부 오류가 발생했습니다."
+        logger.info("새로운 사용자 '%s'를 등록했습니다. user_id: %s", email, user_id)
+        return True, "사용자 등록 성공!"
+
+    def import_user(self, email, password, user_id):
+        """
+        다른 저장소에서 옮겨 온 사용자를 user_id를 유지한 채 추가합니다. 이미 있는 이메일/ID는 건너뜁니다.
+        Returns:
+            bool: 새로 추가했으면 True.
+        """
+        with self._connection() as conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO users (user_id, email, password, created_at) VALUES (?, ?, ?, ?)',
+                (user_id, email, password, time.time())
+            )
+        return cursor.rowcount > 0
+
+    # --- 기록 ---
+
+    @staticmethod
+    def _bump_version(conn, user_id):
+        """진행 중인 트랜잭션 안에서 사용자의 변경 버전을 1 올리고 새 값을 반환합니다."""
+        conn.execute('INSERT OR IGNORE INTO user_versions (user_id, version) VALUES (?, 0)', (user_id,))
+        conn.execute('UPDATE user_versions SET version = version + 1 WHERE user_id = ?', (user_id,))
+        return conn.execute('SELECT version FROM user_versions WHERE user_id = ?', (user_id,)).fetchone()[0]
+
+    def append_record(self, user_id, diary_text, emotion, category, timestamp, position, on_saved=None):
+        started = time.perf_counter()
+        try:
+            x, y, z = float(position['x']), float(position['y']), float(position['z'])
+            with self._connection() as conn:
+                version = self._bump_version(conn, user_id)
+                cursor = conn.execute(
+                    'INSERT INTO records (user_id, timestamp, emotion, category, text, x, y, z, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (user_id, timestamp, emotion, category, diary_text, x, y, z, version)
+                )
+            row_number = cursor.lastrowid
+        except (sqlite3.Error, TypeError, ValueError, KeyError) as e:
+            logger.error("데이터 저장 중 예상치 못한 오류가 발생했습니다: %s", e)
+            return {"status": "error", "message": f"데이터 저장 중 예상치 못한 오류: {e}"}
+        self.write_latency.add(time.perf_counter() - started)
+        if on_saved:
+            on_saved(row_number)
+        return {"status": "success", "message": "일기가 저장되었습니다.", "row": row_number}
+
+    def append_records(self, user_id, entries):
+        # 한 트랜잭션으로 저장하므로 중간에 실패하면 아무것도 저장되지 않습니다.
+        started = time.perf_counter()
+        try:
+            with self._connection() as conn:
+                version = self._bump_version(conn, user_id)
+                rows = [
+                    conn.execute(
+                        'INSERT INTO records (user_id, timestamp, emotion, category, text, x, y, z, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (user_id, e['timestamp'], e['emotion'], e['category'], e['text'],
+                         float(e['position']['x']), float(e['position']['y']), float(e['position']['z']), version)
+                    ).lastrowid
+                    for e in entries
+                ]
+        except (sqlite3.Error, TypeError, ValueError, KeyError) as e:
+            logger.error("데이터 저장 중 예상치 못한 오류가 발생했습니다: %s", e)
+            return {"status": "error", "message": f"데이터 저장 중 예상치 못한 오류: {e}", "written": 0}
+        self.write_latency.add(time.perf_counter() - started)
+        return {"status": "success", "rows": rows}
+
+    def replace_records(self, user_id, records):
+        """
+        사용자의 기록을 모두 지우고 주어진 기록으로 바꿉니다 (마이그레이션용, 한 트랜잭션).
+        Args:
+            records (list): 기록 딕셔너리 목록.
+        """
+        with self._connection() as conn:
+            version = self._bump_version(conn, user_id)
+            conn.execute('DELETE FROM records WHERE user_id = ?', (user_id,))
+            conn.executemany(
+                'INSERT INTO records (user_id, timestamp, emotion, category, text, x, y, z, summary, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (user_id, r['timestamp'], r['emotion'], r['category'], r['text'],
+                     r['position']['x'], r['position']['y'], r['position']['z'], r.get('summary'), version)
+                    for r in records
+                ]
+            )
+
+    def list_records(self, user_id):
+        started = time.perf_counter()
+        try:
+            rows = self._connection().execute(
+                f'SELECT {RECORD_COLUMNS} FROM records WHERE user_id = ? ORDER BY timestamp, id',
+                (user_id,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error("데이터 불러오기 중 데이터베이스 오류 발생: %s", e)
+            return {"status": "error", "message": "서버 내부 오류가 발생했습니다."}, 500
+        records = [_row_to_record(row) for row in rows]
+        self.read_latency.add(time.perf_counter() - started)
+        logger.debug("사용자 '%s'의 기록 %s개를 성공적으로 불러왔습니다.", user_id, len(records))
+        return {"status": "success", "records": records}, 200
+
+    def record_columns(self, user_id):
+        # 기록 딕셔너리를 거치지 않고 행을 바로 열 목록에 넣습니다.
+        started = time.perf_counter()
+        columns = RecordColumns()
+        try:
+            cursor = self._connection().execute(
+                f'SELECT {RECORD_COLUMNS} FROM records WHERE user_id = ? ORDER BY timestamp, id',
+                (user_id,)
+            )
+            try:
+                while True:
+                    rows = cursor.fetchmany(self.FETCH_SIZE)
+                    if not rows:
+                        break
+                    for timestamp, emotion, category, text, x, y, z, summary, record_id, version in rows:
+                        columns.append(record_id, version, timestamp, emotion, category, text, x, y, z, summary)
+            finally:
+                cursor.close()
+        except sqlite3.Error as e:
+            logger.error("데이터 불러오기 중 데이터베이스 오류 발생: %s", e)
+            return {"status": "error", "message": "서버 내부 오류가 발생했습니다."}, 500
+        self.read_latency.add(time.perf_counter() - started)
+        return {"status": "success", "columns": columns}, 200
+
+    def iter_records(self, user_id, after=None):
+        # (user_id, timestamp) 인덱스를 따라 커서 위치 다음부터 읽으므로, 뒤쪽 페이지도 앞쪽과 같은 비용으로 읽습니다.
+        query = f'SELECT {RECORD_COLUMNS} FROM records WHERE user_id = ?'
+        params = [user_id]
+        if after:
+            query += ' AND (timestamp > ? OR (timestamp = ? AND id > ?))'
+            params += [after[0], after[0], after[1]]
+        query += ' ORDER BY timestamp, id'
+        try:
+            cursor = self._connection().execute(query, params)
+        except sqlite3.Error as e:
+            logger.error("데이터 불러오기 중 데이터베이스 오류 발생: %s", e)
+            return {"status": "error", "message": "서버 내부 오류가 발생했습니다."}, 500
+
+        def generate():
+            try:
+                while True:
+                    rows = cursor.fetchmany(self.FETCH_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield (row[0], row[8]), _row_to_record(row)
+            finally:
+                cursor.close()
+
+        return {"status": "success", "records": generate()}, 200
+
+    def attach_summary(self, user_id, row_number, summary):
+        with self._connection() as conn:
+            version = self._bump_version(conn, user_id)
+            conn.execute(
+                'UPDATE records SET summary = ?, version = ? WHERE id = ? AND user_id = ?',
+                (summary, version, row_number, user_id)
+            )
+
+    def get_version(self, user_id):
+        try:
+            conn = self._connection()
+            row = conn.execute('SELECT version FROM user_versions WHERE user_id = ?', (user_id,)).fetchone()
+            count = conn.execute('SELECT COUNT(*) FROM records WHERE user_id = ?', (user_id,)).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error("기록 버전 조회 중 데이터베이스 오류 발생: %s", e)
+            return {"status": "error", "message": "서버 내부 오류가 발생했습니다."}, 500
+        return {"status": "success", "version": row[0] if row else 0, "count": count}, 200
+
+    def changes_since(self, user_id, since):
+        try:
+            conn = self._connection()
+            # 버전 조회와 기록 조회가 같은 스냅숏을 보도록 한 읽기 트랜잭션으로 묶습니다.
+            with conn:
+                conn.execute('BEGIN')
+                row = conn.execute('SELECT version FROM user_versions WHERE user_id = ?', (user_id,)).fetchone()
+                current = row[0] if row else 0
+                # 현재 버전보다 큰 since는 다른 저장소나 초기화되기 전의 데이터베이스에서 받은 값이므로 모든 기록을 보냅니다.
+                reset = since > current
+                if reset:
+                    since = 0
+                rows = conn.execute(
+                    f'SELECT {RECORD_COLUMNS} FROM records WHERE user_id = ? AND version > ? ORDER BY version, id',
+                    # since가 0이면 버전 열이 생기기 전의 기록(버전 0)까지 모두 보냅니다.
+                    (user_id, since if since > 0 else -1)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error("변경된 기록 조회 중 데이터베이스 오류 발생: %s", e)
+            return {"status": "error", "message": "서버 내부 오류가 발생했습니다."}, 500
+        version = max(since, current)
+        return {
+            "status": "success", "records": [_row_to_record(r) for r in rows], "version": version, "reset": reset
+        }, 200
+
+    def stats(self):
+        conn = self._connection()
+        users = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+        records = conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "users": users,
+            "records": records,
+            "read_latency": self.read_latency.summary(),
+            "write_latency": self.write_latency.summary(),
+        }
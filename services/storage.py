@@ -0,0 +1,217 @@
+import logging
+import base64
+import json
+import threading
+from services.metrics import metrics
+from services.record_columns import RecordColumns
+from services.settings import STORAGE_BACKEND
+
+logger = logging.getLogger(__name__)
+
+# 사용자와 일기 기록을 저장하는 저장소(storage backend) 인터페이스입니다.
+# 라우트는 이 인터페이스만 사용하고, 실제 저장 위치는 STORAGE_BACKEND 설정으로 고릅니다.
+#   'sheets' - Google Sheets (사용자별 시트 탭 + 'users' 탭). services/sheets_storage.py
+#   'sqlite' - 로컬 SQLite 파일. 네트워크 없이 실행/테스트/부하 측정할 때 사용합니다. services/sqlite_storage.py
+
+# 기록에 들어 있을 수 있는 필드 (fields= 투영에 사용할 수 있는 이름)
+RECORD_FIELDS = ('id', 'version', 'timestamp', 'emotion', 'category', 'text', 'position', 'summary')
+
+# create_user()가 이미 등록된 이메일일 때 돌려주는 메시지. 라우트는 이 메시지면 409로 응답합니다.
+DUPLICATE_EMAIL_MESSAGE = "이미 등록된 이메일입니다."
+
+
+def encode_cursor(key):
+    """기록 위치 키 (timestamp, 순번)를 클라이언트에 넘길 불투명한 커서 문자열로 바꿉니다."""
+    raw = json.dumps(list(key), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    encode_cursor()로 만든 커서를 (timestamp, 순번)으로 되돌립니다.
+    Raises:
+        ValueError: 커서 형식이 올바르지 않은 경우.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, seq = json.loads(raw.decode('utf-8'))
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"잘못된 커서입니다: {cursor!r}") from e
+    if not isinstance(timestamp, str) or not isinstance(seq, int):
+        raise ValueError(f"잘못된 커서입니다: {cursor!r}")
+    return timestamp, seq
+
+
+def project_record(record, fields):
+    """기록에서 요청한 필드만 남깁니다. fields가 None이면 기록을 그대로 반환합니다."""
+    if fields is None:
+        return record
+    return {name: record[name] for name in fields if name in record}
+
+
+class StorageBackend:
+    """
+    저장소 구현이 제공해야 하는 메서드 목록입니다.
+    기록(record)은 {"id", "version", "timestamp", "emotion", "category", "text", "position": {"x", "y", "z"}, ["summary"]}
+    형태의 딕셔너리입니다. id는 사용자 안에서 기록을 가리키는 번호(아직 저장되지 않은 기록은 None),
+    version은 기록이 마지막으로 추가/변경될 때의 사용자별 변경 버전입니다.
+    """
+
+    name = None
+
+    def start(self, on_saved_factory=None):
+        """
+        서버 시작 시 한 번 호출됩니다. 백그라운드 작업이 필요한 구현은 여기서 시작합니다.
+        Args:
+            on_saved_factory (callable): on_saved_factory(user_id, diary_text) -> on_saved.
+                지난 실행에서 on_saved를 넘겨 저장을 요청했지만 저장을 마치지 못한 기록은, 이어서 저장할 때
+                이 함수로 on_saved를 다시 만들어 호출합니다.
+        """
+
+    def users_available(self):
+        """사용자 목록을 조회할 수 있는 상태인지 여부. 로그인 실패 원인을 구분하는 데 사용합니다."""
+        return True
+
+    def lookup_user(self, email):
+        """이메일에 해당하는 (비밀번호, user_id)를 반환합니다. 없으면 None을 반환합니다."""
+        raise NotImplementedError
+
+    def get_user_id(self, email):
+        """이메일에 해당하는 user_id를 반환합니다. 없으면 None을 반환합니다."""
+        entry = self.lookup_user(email)
+        return entry[1] if entry else None
+
+    def create_user(self, email, password):
+        """
+        새 사용자를 등록합니다. 이미 등록된 이메일이면 (False, DUPLICATE_EMAIL_MESSAGE)를 반환합니다.
+        Returns:
+            tuple: (성공 여부, 메시지)
+        """
+        raise NotImplementedError
+
+    def append_record(self, user_id, diary_text, emotion, category, timestamp, position, on_saved=None):
+        """
+        일기 기록 하나를 저장합니다.
+        Args:
+            on_saved (callable): on_saved(row_number) - 기록이 실제로 저장된 뒤 호출됩니다.
+                row_number는 attach_summary()에 넘길 기록 번호입니다.
+        Returns:
+            dict: {"status": "success" | "error", "message": ..., ...}
+        """
+        raise NotImplementedError
+
+    def append_records(self, user_id, entries):
+        """
+        여러 기록을 한꺼번에 저장합니다 (일괄 가져오기용). 구현마다 가능한 한 적은 수의 쓰기로 처리합니다.
+        Args:
+            entries (list): {"text", "emotion", "category", "timestamp", "position"} 딕셔너리 목록.
+        Returns:
+            dict: 성공하면 {"status": "success", "rows": [기록 번호 또는 None, ...]},
+                실패하면 {"status": "error", "message": ..., "written": 실패 전까지 저장된 앞쪽 기록 수}.
+        """
+        # 기본 구현은 한 건씩 저장합니다.
+        rows = []
+        for entry in entries:
+            saved = []
+            result = self.append_record(
+                user_id, entry['text'], entry['emotion'], entry['category'], entry['timestamp'], entry['position'], saved.append
+            )
+            if result["status"] == "error":
+                return {**result, "written": len(rows)}
+            rows.append(saved[0] if saved else None)
+        return {"status": "success", "rows": rows}
+
+    def list_records(self, user_id):
+        """
+        사용자의 모든 기록을 저장 순서대로 반환합니다.
+        Returns:
+            tuple: ({"status": ..., "records": [...]}, HTTP 상태 코드)
+        """
+        raise NotImplementedError
+
+    def iter_records(self, user_id, after=None):
+        """
+        사용자의 기록을 저장 순서대로 하나씩 내놓습니다. 페이지 나누기와 스트리밍 응답에 사용합니다.
+        Args:
+            after (tuple): decode_cursor()로 얻은 (timestamp, 순번). 이 위치 다음 기록부터 내놓습니다.
+        Returns:
+            tuple: ({"status": "success", "records": (위치 키, 기록) 이터레이터}, 200) 또는 (오류 딕셔너리, HTTP 상태 코드)
+        """
+        # 기본 구현은 전체 목록을 읽은 뒤 목록 안의 순번을 위치 키로 사용합니다.
+        result, status_code = self.list_records(user_id)
+        if status_code != 200:
+            return result, status_code
+        records = result['records']
+        start = after[1] + 1 if after else 0
+
+        def generate():
+            for seq in range(start, len(records)):
+                yield (records[seq]['timestamp'], seq), records[seq]
+
+        return {"status": "success", "records": generate()}, 200
+
+    def record_columns(self, user_id):
+        """
+        사용자의 모든 기록을 열 목록(RecordColumns)으로 반환합니다. 바이너리 응답처럼 기록 딕셔너리가 필요 없는 곳에 사용합니다.
+        Returns:
+            tuple: ({"status": "success", "columns": RecordColumns}, 200) 또는 (오류 딕셔너리, HTTP 상태 코드)
+        """
+        # 기본 구현은 전체 목록을 읽어 변환합니다.
+        result, status_code = self.list_records(user_id)
+        if status_code != 200:
+            return result, status_code
+        return {"status": "success", "columns": RecordColumns.from_records(result['records'])}, 200
+
+    def attach_summary(self, user_id, row_number, summary):
+        """이미 저장된 기록에 요약을 붙입니다. 기록의 변경 버전도 올립니다."""
+        raise NotImplementedError
+
+    def get_version(self, user_id):
+        """
+        사용자 기록의 현재 변경 버전과 기록 수를 반환합니다. 전체 목록의 ETag를 만드는 데 사용합니다.
+        Returns:
+            tuple: ({"status": "success", "version": int, "count": int}, 200) 또는 (오류 딕셔너리, HTTP 상태 코드)
+        """
+        raise NotImplementedError
+
+    def changes_since(self, user_id, since):
+        """
+        변경 버전이 since보다 큰 (저장이 끝난) 기록을 버전 순서대로 반환합니다.
+        같은 기록이 다시 포함될 수 있으므로 클라이언트는 id를 기준으로 덮어써야 합니다.
+        since가 저장소의 현재 버전보다 크면 (다른 저장소나 초기화되기 전의 저장소에서 받은 버전) 모든 기록을 보내고
+        "reset": True를 붙입니다. 클라이언트는 보관하던 기록을 버리고 받은 기록으로 바꿔야 합니다.
+        Returns:
+            tuple: ({"status": "success", "records": [...], "version": 새 버전, "reset": bool}, 200) 또는 (오류 딕셔너리, HTTP 상태 코드)
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        return {"backend": self.name}
+
+
+def create_storage(backend):
+    """이름에 해당하는 저장소 구현을 만듭니다."""
+    if backend == 'sheets':
+        from services.sheets_storage import SheetsStorage
+        from config import DIARY_SPREADSHEET_ID
+        return SheetsStorage(DIARY_SPREADSHEET_ID)
+    if backend == 'sqlite':
+        from services.sqlite_storage import SqliteStorage
+        from services.settings import SQLITE_PATH
+        return SqliteStorage(SQLITE_PATH)
+    raise ValueError(f"알 수 없는 STORAGE_BACKEND 값입니다: {backend!r} ('sheets' 또는 'sqlite')")
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """설정된 저장소를 반환합니다. 처음 호출될 때 한 번만 만듭니다."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            # 읽기/쓰기 메서드를 감싸 /metrics의 storage_read/storage_write 단계로 시간을 기록합니다.
+            _storage = metrics.instrument_storage(create_storage(STORAGE_BACKEND))
+            logger.info("저장소 '%s'을(를) 사용합니다.", _storage.name)
+        return _storage
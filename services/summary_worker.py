@@ -0,0 +1,91 @@
+import logging
+import queue
+import threading
+import time
+from services.latency import LatencyWindow
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 요약 모델(KoBART)을 요청 처리 경로 밖에서 실행하는 백그라운드 작업자입니다.
+# 요약 생성은 수 초가 걸리므로 /analyze_diary는 결과를 기다리지 않고 바로 응답하고,
+# 요약이 끝나면 콜백으로 해당 기록에 요약을 붙입니다.
+
+
+class SummaryWorker:
+    """
+    대기열에 쌓인 일기를 하나씩 요약하고 on_done(summary) 콜백을 호출합니다.
+    Args:
+        get_summarizer (callable): 요약 모델을 반환하는 함수. 모델이 준비될 때까지 (제한 시간 안에서) 기다리며,
+            사용할 수 없으면 None을 반환합니다.
+        max_queue_depth (int): 대기열에 쌓아둘 수 있는 최대 작업 수.
+        cache (AnalysisCache): 같은 내용의 요약을 다시 생성하지 않도록 결과를 보관할 캐시 (선택).
+    """
+
+    def __init__(self, get_summarizer, max_queue_depth, cache=None):
+        self.get_summarizer = get_summarizer
+        self.cache = cache
+        self._queue = queue.Queue(maxsize=max(1, max_queue_depth))
+        self._thread = None
+        self._lock = threading.Lock()
+        self.latency = LatencyWindow()
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def submit(self, diary_text, on_done):
+        """
+        요약 작업을 대기열에 넣습니다. 대기열이 가득 차 있으면 작업을 버리고 False를 반환합니다.
+        요약은 부가 정보이므로 요청 자체를 실패시키지 않습니다.
+        """
+        self._start()
+        try:
+            self._queue.put_nowait((diary_text, on_done))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("요약 대기열이 가득 차 요약을 건너뜁니다.")
+            return False
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='summary-worker', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            diary_text, on_done = self._queue.get()
+            # 같은 내용을 요약한 적이 있으면 모델을 기다리거나 실행하지 않고 그 결과를 사용합니다.
+            summary = self.cache.get('summary', diary_text) if self.cache is not None else None
+            try:
+                if summary is None:
+                    summarizer = self.get_summarizer()
+                    if summarizer is None:
+                        self.failed += 1
+                        logger.warning("요약 모델을 사용할 수 없어 요약을 건너뜁니다.")
+                        continue
+                    started = time.perf_counter()
+                    with metrics.span('summarizer'):
+                        summary = summarizer(diary_text)[0]['summary_text']
+                    elapsed = time.perf_counter() - started
+                    self.latency.add(elapsed)
+                    if self.cache is not None:
+                        self.cache.put('summary', diary_text, summary, elapsed)
+                on_done(summary)
+                self.completed += 1
+                logger.debug("요약 생성 완료: '%s'", summary)
+            except Exception as e:
+                self.failed += 1
+                logger.error("요약 생성 또는 저장 중 오류가 발생했습니다: %s", e)
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "latency": self.latency.summary(),
+        }
@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from googleapiclient.errors import HttpError
+from services.sheets import get_sheets_service
+from services.sheets_guard import execute
+from services.settings import USER_CACHE_TTL, USER_CACHE_MISS_RELOAD_INTERVAL
+from config import DIARY_SPREADSHEET_ID
+
+logger = logging.getLogger(__name__)
+
+# 'users' 시트(A열: 이메일, B열: 비밀번호, C열: user_id)를 메모리에 올려두는 사용자 디렉터리 캐시입니다.
+# 로그인/기록 조회/일기 분석마다 시트 전체를 내려받아 순회하던 것을 이메일 키 딕셔너리 조회(O(1))로 바꿉니다.
+
+
+class UserDirectory:
+    """
+    이메일을 키로 (비밀번호, user_id)를 보관하는 인덱스입니다.
+    처음 조회할 때 한 번 전체를 읽고, 이후에는 백그라운드 스레드가 TTL 주기로 새로 고칩니다.
+    """
+
+    def __init__(self, spreadsheet_id, ttl, miss_reload_interval):
+        self.spreadsheet_id = spreadsheet_id
+        self.ttl = ttl
+        self.miss_reload_interval = miss_reload_interval
+        self._index = {}
+        # 쓰기 직후 반영한 항목 (새로 고침 중인 시트 스냅숏에 아직 없을 수 있음)
+        self._recent = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded_at = None
+        # 요청 경로에서 마지막으로 전체 목록 읽기를 시도한 시각 (처음 로드와 없는 이메일로 인한 로드가 같은 간격을 공유)
+        self._last_reload_attempt = None
+        self._refresher = None
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.reloads = 0
+        self.reload_failures = 0
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    def _fetch_rows(self):
+        service = get_sheets_service()
+        if not service:
+            raise RuntimeError("Google Sheets 서비스에 연결할 수 없습니다.")
+        result = execute(service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range='users!A:C'
+        ), 'values.get')
+        return result.get('values', [])
+
+    def reload(self):
+        """
+        'users' 시트 전체를 다시 읽어 인덱스를 교체합니다.
+        Returns:
+            bool: 성공 여부. 실패하면 기존 인덱스를 그대로 유지합니다.
+        """
+        with self._load_lock:
+            fetch_started = time.monotonic()
+            try:
+                rows = self._fetch_rows()
+            except (HttpError, RuntimeError) as e:
+                self.reload_failures += 1
+                logger.error("사용자 디렉터리를 불러오지 못했습니다: %s", e)
+                return False
+            except Exception as e:
+                self.reload_failures += 1
+                logger.error("사용자 디렉터리 로드 중 예상치 못한 오류 발생: %s", e)
+                return False
+
+            index = {}
+            for row in rows:
+                if len(row) >= 3:
+                    # 같은 이메일이 여러 번 있으면 기존 순회 방식과 같이 첫 번째 행을 사용합니다.
+                    index.setdefault(row[0], (row[1], row[2]))
+
+            with self._lock:
+                # 시트를 읽기 시작한 뒤에 추가된 사용자는 스냅숏에 없을 수 있으므로 다시 합칩니다.
+                self._recent = {email: (entry, added_at) for email, (entry, added_at) in self._recent.items() if added_at >= fetch_started}
+                for email, (entry, _) in self._recent.items():
+                    index.setdefault(email, entry)
+                self._index = index
+                self._loaded_at = time.monotonic()
+                self.reloads += 1
+            logger.info("사용자 디렉터리를 불러왔습니다. 사용자 수: %s", len(index))
+            return True
+
+    def _claim_reload(self):
+        """
+        요청 경로에서 전체 목록을 다시 읽어도 되는지 확인합니다. 마지막 시도 후 miss_reload_interval이 지났으면
+        이번 호출이 읽을 차례로 기록하고 True를 반환합니다 (동시에 들어온 요청 중 하나만 True).
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._last_reload_attempt is not None and now - self._last_reload_attempt < self.miss_reload_interval:
+                return False
+            self._last_reload_attempt = now
+            return True
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            # 시트 장애 등으로 한 번도 읽지 못한 상태에서도 요청마다 전체를 읽지 않도록 같은 최소 간격을 둡니다.
+            if self._claim_reload():
+                self.reload()
+            else:
+                # 다른 요청이 읽는 중이면 새로 읽지 않고 그 결과를 기다립니다.
+                with self._load_lock:
+                    pass
+        self._start_refresher()
+
+    def _start_refresher(self):
+        if self._refresher is not None or self.ttl <= 0:
+            return
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, name='user-directory-refresh', daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.ttl)
+            self.reload()
+
+    def is_stale(self):
+        """마지막으로 성공한 로드가 TTL보다 오래되었는지 여부를 반환합니다."""
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def lookup(self, email, reload_on_miss=True):
+        """
+        이메일에 해당하는 (비밀번호, user_id)를 반환합니다. 없으면 None을 반환합니다.
+        다른 워커에서 방금 가입한 사용자일 수 있으므로, 찾지 못하면 일정 간격 이상일 때만 다시 읽어 봅니다.
+        reload_on_miss가 False면 다시 읽지 않고 인덱스만 봅니다 (대부분 없는 이메일을 찾는 회원가입 중복 확인용).
+        """
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._index.get(email)
+            if entry is not None:
+                self.hits += 1
+                if self.is_stale():
+                    self.stale_hits += 1
+            else:
+                self.misses += 1
+        if entry is not None:
+            return entry
+
+        if reload_on_miss and self._claim_reload() and self.reload():
+            with self._lock:
+                return self._index.get(email)
+        return None
+
+    def get_user_id(self, email):
+        """이메일에 해당하는 user_id를 반환합니다. 없으면 None을 반환합니다."""
+        entry = self.lookup(email)
+        return entry[1] if entry else None
+
+    def add_user(self, email, password, user_id):
+        """'users' 시트에 새 행을 추가한 직후 호출하여 인덱스에 즉시 반영합니다."""
+        with self._lock:
+            self._index.setdefault(email, (password, user_id))
+            self._recent[email] = ((password, user_id), time.monotonic())
+
+    def stats(self):
+        with self._lock:
+            size = len(self._index)
+        return {
+            "users": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "stale": self.is_stale(),
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+            "age_seconds": None if self._loaded_at is None else round(time.monotonic() - self._loaded_at, 1),
+        }
+
+
+# 앱 전체가 공유하는 사용자 디렉터리
+user_directory = UserDirectory(DIARY_SPREADSHEET_ID, USER_CACHE_TTL, USER_CACHE_MISS_RELOAD_INTERVAL)
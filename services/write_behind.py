@@ -0,0 +1,355 @@
+import logging
+import fcntl
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from services.latency import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+# 일기 저장을 위한 write-behind 저널입니다.
+# 기록을 로컬 추가 전용(append-only) 파일에 fsync한 뒤 바로 응답하고, 백그라운드 스레드가
+# 대기 중인 기록을 사용자 시트별로 묶어 한 번의 append 호출로 씁니다.
+# 서버가 재시작되면 저널에서 아직 시트에 쓰이지 않은 기록을 다시 읽어 이어서 씁니다.
+#
+# 시트에 쓰기를 시도할 때마다 행에 새 변경 버전을 붙이고, 그 버전을 먼저 저널에 남긴 뒤 보냅니다.
+# 시트에 반영된 뒤 응답을 받지 못했거나 commit 줄을 남기기 전에 종료된 기록은, 다시 쓰기 전에 그때 붙인 버전이
+# 시트에 있는지 찾아보고 있으면 쓰지 않고 완료 처리합니다 (버전이 기록마다 다른 멱등성 키 역할을 합니다).
+#
+# 저널 파일 형식 (한 줄에 JSON 하나):
+#   {"op": "append", "id": 1, "spreadsheet_id": "...", "user_id": "...", "row": [...], "ts": 1700000000.0, "on_saved": true}
+#   {"op": "attempt", "ids": [1, 2], "versions": [..., ...]}   시트에 쓰기 시작 (기록마다 붙인 변경 버전)
+#   {"op": "commit", "ids": [1, 2, 3]}   시트에 쓰기 완료
+#   {"op": "dead", "ids": [4]}           재시도 한도를 넘겨 포기함 (dead-letter 파일로 옮김)
+# on_saved가 true인 기록은 저장 후처리(요약 생성)를 요청한 기록입니다. 콜백은 저널에 남길 수 없으므로
+# 재시작 후에는 on_saved_factory로 다시 만듭니다.
+
+
+class _Pending:
+    __slots__ = ('id', 'spreadsheet_id', 'user_id', 'row', 'on_saved', 'wants_on_saved', 'created_at', 'attempts', 'versions')
+
+    def __init__(self, entry_id, spreadsheet_id, user_id, row, on_saved, created_at, wants_on_saved=False):
+        self.id = entry_id
+        self.spreadsheet_id = spreadsheet_id
+        self.user_id = user_id
+        self.row = row
+        self.on_saved = on_saved
+        self.wants_on_saved = wants_on_saved or on_saved is not None
+        self.created_at = created_at
+        self.attempts = 0
+        # 이전 쓰기 시도에서 붙인 변경 버전 (시트에 반영되었는지 알 수 없는 시도)
+        self.versions = []
+
+
+class WriteBehindJournal:
+    """
+    Args:
+        journal_dir (str): 저널 파일을 둘 디렉터리.
+        writer (callable): writer(spreadsheet_id, user_id, rows) -> 첫 행 번호(int 또는 None).
+            한 사용자 시트에 여러 행을 한 번에 추가합니다.
+        flush_interval_ms (float): 대기 중인 기록을 모으는 시간.
+        max_batch_rows (int): 한 번의 flush에서 쓰는 최대 행 수.
+        backoff_base, backoff_max (float): 실패 시 재시도 대기 시간 범위 (초).
+        max_attempts (int): 한 기록의 최대 쓰기 시도 횟수.
+        on_committed (callable): on_committed(spreadsheet_id, user_id, row, row_number) - 행이 시트에 쓰인 뒤 호출됩니다.
+        stamp (callable): stamp(row, version=None) -> version. 행에 변경 버전을 붙입니다 (None이면 새 버전).
+        locate (callable): locate(spreadsheet_id, user_id, versions) -> {version: row_number}.
+            주어진 변경 버전이 붙은 행이 시트에 있으면 그 행 번호를 반환합니다.
+        stamp와 locate가 없으면 이전 시도가 반영되었는지 확인하지 않고 다시 씁니다.
+    """
+
+    # 워커 프로세스마다 잠금(flock)으로 저널 슬롯 하나를 독점합니다.
+    MAX_SLOTS = 64
+
+    def __init__(self, journal_dir, writer, flush_interval_ms, max_batch_rows,
+                 backoff_base, backoff_max, max_attempts, on_committed=None, stamp=None, locate=None):
+        self.journal_dir = journal_dir
+        self.writer = writer
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000.0
+        self.max_batch_rows = max(1, max_batch_rows)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_attempts = max_attempts
+        self.on_committed = on_committed
+        self.stamp = stamp
+        self.locate = locate
+        # on_saved_factory(user_id, row) -> on_saved. 재시작 전에 on_saved를 요청한 기록의 콜백을 다시 만듭니다.
+        self.on_saved_factory = None
+        self._pending = OrderedDict()
+        # start()에서 재생 후 저널을 정리할 때 같은 잠금을 다시 잡으므로 재진입 가능한 잠금을 사용합니다.
+        self._lock = threading.RLock()
+        self._file_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._file = None
+        self._path = None
+        self._next_id = 1
+        self._thread = None
+        self._owner_pid = None
+        self.flush_latency = LatencyWindow()
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failures = 0
+        self.dead = 0
+        self.replayed = 0
+        self.deduplicated = 0
+
+    # --- 시작 / 재생 ---
+
+    def start(self):
+        """저널 슬롯을 잡고, 남아 있는 기록을 재생한 뒤 flush 스레드를 시작합니다."""
+        with self._lock:
+            if self._thread is not None and self._owner_pid == os.getpid():
+                return
+            os.makedirs(self.journal_dir, exist_ok=True)
+            self._file, self._path = self._acquire_slot()
+            self._replay()
+            self._owner_pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='write-behind-flush', daemon=True)
+            self._thread.start()
+            if self._pending:
+                self._wake.set()
+
+    def _acquire_slot(self):
+        for slot in range(self.MAX_SLOTS):
+            path = os.path.join(self.journal_dir, f'journal-{slot}.log')
+            f = open(path, 'a+', encoding='utf-8')
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return f, path
+            except OSError:
+                f.close()
+        raise RuntimeError(f"사용 가능한 저널 슬롯이 없습니다 (최대 {self.MAX_SLOTS}개).")
+
+    def _replay(self):
+        self._file.seek(0)
+        entries = OrderedDict()
+        versions = {}
+        for line in self._file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 기록 도중 종료되어 잘린 마지막 줄은 건너뜁니다. (fsync 전이므로 응답도 나가지 않았습니다.)
+                continue
+            if record.get('op') == 'append':
+                entries[record['id']] = record
+                self._next_id = max(self._next_id, record['id'] + 1)
+            elif record.get('op') == 'attempt':
+                for entry_id, version in zip(record.get('ids', []), record.get('versions', [])):
+                    versions.setdefault(entry_id, []).append(version)
+            elif record.get('op') in ('commit', 'dead'):
+                for entry_id in record.get('ids', []):
+                    entries.pop(entry_id, None)
+        for record in entries.values():
+            entry = _Pending(
+                record['id'], record['spreadsheet_id'], record['user_id'], record['row'], None, record.get('ts', time.time()),
+                wants_on_saved=record.get('on_saved', False)
+            )
+            entry.versions = versions.get(record['id'], [])
+            self._pending[record['id']] = entry
+        self.replayed = len(entries)
+        if entries:
+            logger.info("저널 %s에서 시트에 쓰이지 않은 기록 %s개를 다시 대기열에 넣었습니다.", self._path, len(entries))
+        self._compact_if_idle()
+
+    # --- 기록 ---
+
+    def _write_line(self, record):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._file_lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def submit(self, spreadsheet_id, user_id, row, on_saved=None):
+        """
+        기록 한 행을 저널에 fsync하고 대기열에 넣습니다. 이 함수가 반환되면 재시작해도 기록이 사라지지 않습니다.
+        Args:
+            on_saved (callable): on_saved(row_number) - 행이 시트에 쓰인 뒤 flush 스레드에서 호출됩니다.
+        Returns:
+            int: 저널 항목 ID.
+        """
+        self.start()
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            now = time.time()
+            self._write_line({
+                "op": "append", "id": entry_id, "spreadsheet_id": spreadsheet_id, "user_id": user_id, "row": row, "ts": now,
+                "on_saved": on_saved is not None
+            })
+            self._pending[entry_id] = _Pending(entry_id, spreadsheet_id, user_id, row, on_saved, now)
+        self._wake.set()
+        return entry_id
+
+    def pending_rows(self, spreadsheet_id, user_id):
+        """
+        아직 시트에 쓰이지 않은 해당 사용자의 행들을 반환합니다 (자신이 쓴 기록을 바로 읽을 수 있도록).
+        쓰기를 시도한 적이 있는 행에는 그때 붙인 변경 버전이 남아 있을 수 있습니다.
+        """
+        with self._lock:
+            return [
+                list(entry.row) for entry in self._pending.values()
+                if entry.user_id == user_id and entry.spreadsheet_id == spreadsheet_id
+            ]
+
+    # --- flush ---
+
+    def _run(self):
+        attempt = 0
+        while True:
+            self._wake.wait()
+            # 짧게 기다려 그 사이 들어온 기록까지 한 번에 씁니다.
+            time.sleep(self.flush_interval)
+            self._wake.clear()
+            if self.flush():
+                attempt = 0
+            else:
+                attempt += 1
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+                # 여러 워커가 같은 시점에 재시도하지 않도록 지터를 섞습니다.
+                time.sleep(delay * random.uniform(0.5, 1.0))
+            with self._lock:
+                if self._pending:
+                    self._wake.set()
+
+    def flush(self):
+        """
+        대기 중인 기록을 사용자 시트별로 묶어 씁니다.
+        Returns:
+            bool: 모든 묶음을 쓰는 데 성공했으면 True.
+        """
+        with self._lock:
+            batch = list(self._pending.values())[:self.max_batch_rows]
+        if not batch:
+            return True
+
+        groups = OrderedDict()
+        for entry in batch:
+            groups.setdefault((entry.spreadsheet_id, entry.user_id), []).append(entry)
+
+        all_ok = True
+        for (spreadsheet_id, user_id), entries in groups.items():
+            started = time.perf_counter()
+            try:
+                row_numbers = self._find_written(spreadsheet_id, user_id, entries)
+                remaining = [entry for entry in entries if entry.id not in row_numbers]
+                if remaining:
+                    self._begin_attempt(remaining)
+                    first_row = self.writer(spreadsheet_id, user_id, [entry.row for entry in remaining])
+                    for offset, entry in enumerate(remaining):
+                        row_numbers[entry.id] = first_row + offset if first_row else None
+            except Exception as e:
+                all_ok = False
+                self.failures += 1
+                logger.error("사용자 '%s'의 기록 %s개를 시트에 쓰지 못했습니다: %s", user_id, len(entries), e)
+                self._record_failure(entries)
+                continue
+
+            self.flush_latency.add(time.perf_counter() - started)
+            self.flushes += 1
+            self.flushed_rows += len(entries)
+            self._write_line({"op": "commit", "ids": [entry.id for entry in entries]})
+            with self._lock:
+                for entry in entries:
+                    self._pending.pop(entry.id, None)
+            for entry in entries:
+                self._notify(entry, row_numbers[entry.id])
+
+        self._compact_if_idle()
+        return all_ok
+
+    def _begin_attempt(self, entries):
+        # 새 변경 버전을 붙이고, 시트에 보내기 전에 저널에 남깁니다. 응답을 받지 못해도 이 버전으로 반영 여부를 찾습니다.
+        if self.stamp is None:
+            return
+        versions = [self.stamp(entry.row) for entry in entries]
+        self._write_line({"op": "attempt", "ids": [entry.id for entry in entries], "versions": versions})
+        for entry, version in zip(entries, versions):
+            entry.versions.append(version)
+
+    def _find_written(self, spreadsheet_id, user_id, entries):
+        """
+        이전 시도가 시트에 반영되었는지 알 수 없는 기록을, 그때 붙인 변경 버전으로 시트에서 찾습니다.
+        Returns:
+            dict: 이미 시트에 있는 기록의 {저널 항목 ID: 행 번호}
+        """
+        uncertain = [entry for entry in entries if entry.versions]
+        if not uncertain or self.locate is None:
+            return {}
+        found = self.locate(spreadsheet_id, user_id, [version for entry in uncertain for version in entry.versions])
+        written = {}
+        for entry in uncertain:
+            for version in entry.versions:
+                if version in found:
+                    # 캐시에 넣을 행도 시트에 있는 행과 같은 버전을 갖도록 합니다.
+                    self.stamp(entry.row, version)
+                    written[entry.id] = found[version]
+                    break
+        if written:
+            self.deduplicated += len(written)
+            logger.warning("사용자 '%s'의 기록 %s개는 이전 시도에서 이미 시트에 쓰여 있어 다시 쓰지 않습니다.", user_id, len(written))
+        return written
+
+    def _record_failure(self, entries):
+        dead = [entry for entry in entries if entry.attempts + 1 >= self.max_attempts]
+        for entry in entries:
+            entry.attempts += 1
+        if not dead:
+            return
+        with open(self._path + '.dead', 'a', encoding='utf-8') as f:
+            for entry in dead:
+                f.write(json.dumps({
+                    "id": entry.id, "spreadsheet_id": entry.spreadsheet_id, "user_id": entry.user_id,
+                    "row": entry.row, "ts": entry.created_at
+                }, ensure_ascii=False) + '\n')
+        self._write_line({"op": "dead", "ids": [entry.id for entry in dead]})
+        with self._lock:
+            for entry in dead:
+                self._pending.pop(entry.id, None)
+        self.dead += len(dead)
+        logger.error("기록 %s개가 재시도 한도를 넘어 %s.dead 파일로 옮겨졌습니다.", len(dead), self._path)
+
+    def _notify(self, entry, row_number):
+        try:
+            if self.on_committed:
+                self.on_committed(entry.spreadsheet_id, entry.user_id, entry.row, row_number)
+            on_saved = entry.on_saved
+            if on_saved is None and entry.wants_on_saved and self.on_saved_factory is not None:
+                # 재시작 전에 저널에 남은 기록: 저장 후처리 콜백을 다시 만듭니다.
+                on_saved = self.on_saved_factory(entry.user_id, entry.row)
+            if on_saved and row_number:
+                on_saved(row_number)
+        except Exception as e:
+            logger.error("저장 완료 후처리 중 오류가 발생했습니다: %s", e)
+
+    def _compact_if_idle(self):
+        # 대기 중인 기록이 없으면 저널을 비워 파일이 계속 커지지 않도록 합니다.
+        with self._lock:
+            if self._pending:
+                return
+            with self._file_lock:
+                self._file.seek(0)
+                self._file.truncate()
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def stats(self):
+        with self._lock:
+            depth = len(self._pending)
+            oldest = min((entry.created_at for entry in self._pending.values()), default=None)
+        return {
+            "enabled": True,
+            "journal": self._path,
+            "queue_depth": depth,
+            "oldest_pending_seconds": round(time.time() - oldest, 3) if oldest else None,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failures": self.failures,
+            "dead": self.dead,
+            "replayed": self.replayed,
+            "deduplicated": self.deduplicated,
+            "flush_latency": self.flush_latency.summary(),
+        }
@@ -1,5 +1,6 @@
 // core/three-scene.js 파일에서 필요한 함수들을 가져옵니다.
-import { createOrb, setOnOrbClicked, generateNonOverlappingPosition, createEmotionAttractor, clearScene } from './core/three-scene.js';
+import { createOrb, setOnOrbClicked, generateNonOverlappingPosition, createEmotionAttractor, clearScene, applyLayout } from './core/three-scene.js';
+import { physicsParams } from './core/physics.js';
 import * as THREE from 'three';
 
 // DOM 요소들을 가져옵니다.
@@ -70,6 +71,74 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 });
 
+// 화면에 그려진 구체를 기록 id로 찾기 위한 맵 (변경된 기록을 덮어쓸 때 사용)
+const orbsById = new Map();
+
+// 기록 하나를 구체로 그리거나, 이미 그려진 기록이면 데이터만 갱신합니다.
+function renderRecord(record) {
+    const existing = record.id != null ? orbsById.get(record.id) : null;
+    if (existing) {
+        Object.assign(existing.userData.diaryData, record);
+        return;
+    }
+    // 감정별 Attractor는 처음 나온 감정일 때만 만들어집니다.
+    createEmotionAttractor(record.emotion);
+    const material = emotionMaterials[record.emotion] || emotionMaterials['분류불가'];
+    // 저장된 위치는 저장 당시 겹치지 않게 고른 위치이므로 그대로 사용합니다.
+    const position = record.position || generateNonOverlappingPosition();
+    // createOrb에 record 전체를 넘겨서 emotion 정보를 활용하도록 합니다.
+    const orb = createOrb(position.x, position.y, position.z, material, record);
+    if (record.id != null) {
+        orbsById.set(record.id, orb);
+    }
+}
+
+// 마지막으로 동기화한 기록과 버전을 브라우저에 보관해, 다음 방문 때는 바뀐 기록만 받아옵니다.
+// 버전과 기록 id는 저장소마다 다르므로, 기록을 받은 저장소 이름(응답 헤더)을 함께 보관합니다.
+const STORAGE_HEADER = 'X-Storage-Backend';
+
+function syncCacheKey(userEmail) {
+    return `diary-records:${userEmail}`;
+}
+
+function loadSyncCache(userEmail) {
+    try {
+        const cached = JSON.parse(localStorage.getItem(syncCacheKey(userEmail)));
+        return cached && typeof cached.version === 'number' ? cached : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+function saveSyncCache(userEmail, storage, version, recordsById) {
+    try {
+        localStorage.setItem(syncCacheKey(userEmail), JSON.stringify({ storage, version, records: [...recordsById.values()] }));
+    } catch (error) {
+        // 저장 공간이 부족하면 보관을 포기하고 다음 방문 때 전체를 다시 받습니다.
+        localStorage.removeItem(syncCacheKey(userEmail));
+    }
+}
+
+// 서버의 공간 인덱스에서 다른 구체와 겹치지 않는 위치를 받아옵니다.
+// 서버에 연결할 수 없으면 화면의 구체들을 기준으로 직접 고릅니다.
+async function requestNextPosition(userEmail) {
+    try {
+        const response = await fetch('/next_position', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ user_email: userEmail })
+        });
+        if (response.ok) {
+            const data = await response.json();
+            return data.position;
+        }
+        console.warn('위치 추천 요청 실패:', response.status);
+    } catch (error) {
+        console.warn('위치 추천 요청 중 오류 발생:', error);
+    }
+    return generateNonOverlappingPosition();
+}
+
 // 모든 기록을 불러와 3D 공간에 표시하는 함수
 async function loadAllRecords(userEmail) {
     if (!userEmail) {
@@ -80,40 +149,192 @@ async function loadAllRecords(userEmail) {
     console.log(`'${userEmail}'님의 모든 기록을 불러옵니다...`);
     showMessage('은하계에서 당신의 기록을 찾는 중...');
 
+    // 새로 불러오기 전, 이전의 구체와 Attractor를 모두 제거합니다.
+    clearScene();
+    orbsById.clear();
+
+    const cached = loadSyncCache(userEmail);
     try {
-        const response = await fetch(`/get_all_records?user_email=${encodeURIComponent(userEmail)}`);
-        if (!response.ok) {
-            const errorData = await response.json();
-            throw new Error(errorData.message || '기록을 불러오는 데 실패했습니다.');
+        if (cached) {
+            await syncChanges(userEmail, cached);
+        } else {
+            await loadFullRecords(userEmail);
         }
-
-        const data = await response.json();
-        if (data.status === 'success') {
-            // 새로 불러오기 전, 이전의 구체와 Attractor를 모두 제거합니다.
-            clearScene();
-
-            // 1. 고유한 감정 목록을 기반으로 Attractor를 먼저 생성합니다.
-            const emotions = [...new Set(data.records.map(record => record.emotion))];
-            emotions.forEach(emotion => {
-                createEmotionAttractor(emotion);
-            });
-
-            // 2. 각 기록에 대한 구체를 생성합니다.
-            console.log(`총 ${data.records.length}개의 기록을 불러왔습니다.`);
-            data.records.forEach(record => {
-                const material = emotionMaterials[record.emotion] || emotionMaterials['분류불가'];
-                const position = generateNonOverlappingPosition();
-                // createOrb에 record 전체를 넘겨서 emotion 정보를 활용하도록 합니다.
-                createOrb(position.x, position.y, position.z, material, record);
-            });
-            showMessage('모든 기록을 성공적으로 불러왔습니다!');
-        } 
+        showMessage('모든 기록을 성공적으로 불러왔습니다!');
+        await loadServerLayout(userEmail);
     } catch (error) {
         console.error('기록 로딩 중 오류 발생:', error);
         showMessage(`기록 로딩 실패: ${error.message}`, true);
     }
 }
 
+// 서버가 계산해 둔 안정된 배치를 받아 적용합니다. 실패해도 화면의 물리 계산은 그대로 동작합니다.
+async function loadServerLayout(userEmail) {
+    try {
+        const params = new URLSearchParams({ user_email: userEmail });
+        Object.entries(physicsParams).forEach(([name, value]) => params.set(name, value));
+        const response = await fetch(`/layout?${params.toString()}`);
+        const layout = await response.json();
+        if (!response.ok || layout.status !== 'success') {
+            throw new Error(layout.message || '레이아웃을 불러오지 못했습니다.');
+        }
+        applyLayout(layout, orbsById);
+        console.log(`서버 레이아웃 적용: 구체 ${layout.positions.length}개 (캐시 사용: ${layout.cached})`);
+    } catch (error) {
+        console.warn('서버 레이아웃을 적용하지 못했습니다:', error);
+    }
+}
+
+// 보관해 둔 기록을 먼저 그린 뒤, 그 버전 이후에 추가/변경된 기록만 받아 덮어씁니다.
+async function syncChanges(userEmail, cached) {
+    let recordsById = new Map(cached.records.map(record => [record.id, record]));
+    recordsById.forEach(record => renderRecord(record));
+
+    const response = await fetch(`/records/changes?user_email=${encodeURIComponent(userEmail)}&since=${cached.version}`);
+    const data = await response.json();
+    if (!response.ok || data.status !== 'success') {
+        throw new Error(data.message || '기록을 불러오는 데 실패했습니다.');
+    }
+    const storage = response.headers.get(STORAGE_HEADER);
+    if (storage !== cached.storage) {
+        // 다른 저장소에서 받은 기록은 id와 버전이 맞지 않으므로 버리고 전체를 다시 받습니다.
+        console.log(`저장소가 바뀌어(${cached.storage} → ${storage}) 기록 전체를 다시 불러옵니다.`);
+        clearScene();
+        orbsById.clear();
+        await loadFullRecords(userEmail);
+        return;
+    }
+    if (data.reset) {
+        // 서버에 없는 버전이었으므로 받은 기록(전체)으로 바꿉니다.
+        clearScene();
+        orbsById.clear();
+        recordsById = new Map();
+    }
+    data.records.forEach(record => {
+        recordsById.set(record.id, Object.assign(recordsById.get(record.id) || {}, record));
+        renderRecord(record);
+    });
+    saveSyncCache(userEmail, storage, data.version, recordsById);
+    console.log(`보관된 기록 ${data.reset ? 0 : cached.records.length}개, 새로 받은 기록 ${data.records.length}개를 표시했습니다.`);
+}
+
+// 바이너리 기록 형식(services/record_columns.py)의 식별자. 숫자 값은 little-endian이므로
+// typed array로 바로 읽을 수 있는 환경(거의 모든 브라우저)에서만 사용하고, 아니면 NDJSON으로 받습니다.
+const RECORDS_BINARY_MAGIC = 'DRC1';
+const RECORDS_BINARY_HEADER_BYTES = 16;
+const IS_LITTLE_ENDIAN = new Uint8Array(new Uint16Array([1]).buffer)[0] === 1;
+
+// 전체 기록을 바이너리 형식으로 한 번에 받아 구체를 만듭니다. 위치/감정/카테고리는 typed array에서 바로 읽습니다.
+async function loadFullRecords(userEmail) {
+    if (!IS_LITTLE_ENDIAN) {
+        return loadFullRecordsNdjson(userEmail);
+    }
+    const response = await fetch(`/get_all_records?user_email=${encodeURIComponent(userEmail)}&format=binary`);
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.message || '기록을 불러오는 데 실패했습니다.');
+    }
+
+    const columns = decodeBinaryRecords(await response.arrayBuffer());
+    const { meta, positions } = columns;
+    const recordsById = new Map();
+    for (let i = 0; i < columns.count; i++) {
+        const record = {
+            id: columns.ids[i] >= 0 ? columns.ids[i] : null,
+            version: columns.versions[i],
+            timestamp: meta.timestamp[i],
+            emotion: meta.emotions[columns.emotionCodes[i]],
+            category: meta.categories[columns.categoryCodes[i]],
+            text: meta.text[i],
+            position: { x: positions[i * 3], y: positions[i * 3 + 1], z: positions[i * 3 + 2] }
+        };
+        if (meta.summary[i]) {
+            record.summary = meta.summary[i];
+        }
+        renderRecord(record);
+        // 아직 저장이 끝나지 않은 기록(id 없음)은 보관하지 않고, 다음 동기화 때 변경 목록으로 받습니다.
+        if (record.id != null) {
+            recordsById.set(record.id, record);
+        }
+    }
+    saveSyncCache(userEmail, response.headers.get(STORAGE_HEADER), meta.version, recordsById);
+    console.log(`총 ${columns.count}개의 기록을 불러왔습니다. (${response.headers.get('Content-Length') || '?'}바이트)`);
+}
+
+// 바이너리 기록 응답을 typed array(복사 없이 응답 버퍼를 그대로 봅니다)와 메타데이터 JSON으로 나눕니다.
+function decodeBinaryRecords(buffer) {
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== RECORDS_BINARY_MAGIC) {
+        throw new Error('알 수 없는 기록 형식입니다.');
+    }
+    const header = new DataView(buffer, 0, RECORDS_BINARY_HEADER_BYTES);
+    const count = header.getUint32(4, true);
+    const metaLength = header.getUint32(8, true);
+    let offset = RECORDS_BINARY_HEADER_BYTES;
+    const take = (ArrayType, length) => {
+        const values = new ArrayType(buffer, offset, length);
+        offset += length * ArrayType.BYTES_PER_ELEMENT;
+        return values;
+    };
+    const versions = take(Float64Array, count);
+    const positions = take(Float32Array, count * 3);
+    const ids = take(Int32Array, count);
+    const emotionCodes = take(Uint16Array, count);
+    const categoryCodes = take(Uint16Array, count);
+    const meta = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, offset, metaLength)));
+    return { count, versions, positions, ids, emotionCodes, categoryCodes, meta };
+}
+
+// 기록을 한 줄에 하나씩(NDJSON) 받아, 전체 목록을 기다리지 않고 도착하는 대로 구체를 만듭니다.
+async function loadFullRecordsNdjson(userEmail) {
+    const response = await fetch(`/get_all_records?user_email=${encodeURIComponent(userEmail)}&format=ndjson`);
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.message || '기록을 불러오는 데 실패했습니다.');
+    }
+
+    const recordsById = new Map();
+    let trailer = null;
+    await readNdjson(response, (item) => {
+        // 마지막 줄은 기록이 아니라 {status, count, next_cursor, version} 요약입니다.
+        if (item.status) {
+            trailer = item;
+            return;
+        }
+        renderRecord(item);
+        // 아직 저장이 끝나지 않은 기록(id 없음)은 보관하지 않고, 다음 동기화 때 변경 목록으로 받습니다.
+        if (item.id != null) {
+            recordsById.set(item.id, item);
+        }
+    });
+
+    if (!trailer || trailer.status !== 'success') {
+        throw new Error('기록을 끝까지 불러오지 못했습니다.');
+    }
+    saveSyncCache(userEmail, response.headers.get(STORAGE_HEADER), trailer.version, recordsById);
+    console.log(`총 ${trailer.count}개의 기록을 불러왔습니다.`);
+}
+
+// NDJSON 응답을 줄 단위로 읽어 각 줄의 JSON 객체를 onItem에 넘깁니다.
+async function readNdjson(response, onItem) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        // 마지막 조각은 아직 줄이 끝나지 않았을 수 있으므로 다음 읽기까지 남겨 둡니다.
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => onItem(JSON.parse(line)));
+    }
+    buffer += decoder.decode();
+    if (buffer.trim()) {
+        onItem(JSON.parse(buffer));
+    }
+}
+
 // 기록하기 버튼 클릭 이벤트
 recordButton.addEventListener('click', async () => {
     const diaryText = diaryEntry.value;
@@ -140,8 +361,8 @@ recordButton.addEventListener('click', async () => {
     // 로딩 메시지 표시
     showMessage('기록을 분석하고 은하계에 보내는 중...');
     
-    // 겹치지 않는 새로운 구체 위치 생성
-    const position = generateNonOverlappingPosition();
+    // 겹치지 않는 새로운 구체 위치를 서버에서 받아옵니다.
+    const position = await requestNextPosition(userEmail);
 
     try {
         const response = await fetch('/analyze_diary', {
@@ -173,7 +394,7 @@ recordButton.addEventListener('click', async () => {
         showMessage('기록이 성공적으로 은하계에 도착했습니다!');
     } catch (error) {
         console.error('API 호출 중 오류 발생:', error);
-        showMessage('전송 실패: 서버 연결을 확인하세요.', true);
+        showMessage(`전송 실패: ${error.message || '서버 연결을 확인하세요.'}`, true);
     }
 });
 
@@ -183,11 +404,14 @@ setOnOrbClicked((data) => {
     const detailCategory = document.getElementById('detail-category');
     const detailText = document.getElementById('detail-text');
     const detailTimestamp = document.getElementById('detail-timestamp');
+    const detailSummary = document.getElementById('detail-summary');
 
     detailEmotion.textContent = data.emotion;
     detailCategory.textContent = data.category;
     detailText.textContent = data.text;
     detailTimestamp.textContent = data.timestamp;
+    // 요약은 키워드가 없는 기록에 대해 저장 후 비동기로 생성되므로 없을 수 있습니다.
+    detailSummary.textContent = data.summary || '';
 
     sidebar.classList.add('visible');
     toggleButton.classList.add('is-open');
@@ -36,6 +36,18 @@ export function addAttractor(name, type) {
     return attractors[key].position;
 }
 
+export function hasAttractor(name, type) {
+    return Boolean(attractors[`${type}_${name}`]);
+}
+
+// 서버에서 계산한 레이아웃의 위치로 이미 있는 어트랙터를 옮깁니다. 없는 어트랙터는 만들지 않습니다.
+export function moveAttractor(name, type, position) {
+    const attractor = attractors[`${type}_${name}`];
+    if (!attractor) return null;
+    attractor.position.set(position.x, position.y, position.z);
+    return attractor.position;
+}
+
 export function addMovableOrb(group) {
     // userData에 velocity가 없으면 초기화
     if (!group.userData.velocity) {
@@ -2,7 +2,7 @@ import * as THREE from 'three';
 import { OrbitControls } from 'three/addons/controls/OrbitControls.js';
 import { Raycaster, Vector2 } from 'three';
 // physics.js에서 함수들을 가져옵니다.
-import { addAttractor, addMovableOrb, clearPhysics, updatePhysics } from './physics.js';
+import { addAttractor, addMovableOrb, clearPhysics, updatePhysics, hasAttractor, moveAttractor } from './physics.js';
 
 // 3D 시각화를 위한 기본 설정
 const scene = new THREE.Scene();
@@ -52,6 +52,8 @@ export function clearScene() {
 
 // --- 감정 Attractor 생성 함수 ---
 export function createEmotionAttractor(emotion) {
+    // 이미 있는 감정이면 어트랙터 메쉬를 다시 만들지 않습니다.
+    if (hasAttractor(emotion, 'emotion')) return;
     const position = addAttractor(emotion, 'emotion');
     if (position) {
         const geometry = new THREE.SphereGeometry(0.6, 8, 8);
@@ -59,6 +61,7 @@ export function createEmotionAttractor(emotion) {
         const attractorMesh = new THREE.Mesh(geometry, material);
         attractorMesh.position.copy(position);
         attractorMesh.userData.isAttractor = true;
+        attractorMesh.userData.attractorKey = `emotion_${emotion}`;
         scene.add(attractorMesh);
     }
 }
@@ -72,6 +75,7 @@ export function createCategoryAttractor(category) {
         const attractorMesh = new THREE.Mesh(geometry, material);
         attractorMesh.position.copy(position);
         attractorMesh.userData.isAttractor = true;
+        attractorMesh.userData.attractorKey = `category_${category}`;
         scene.add(attractorMesh);
     }
 }
@@ -139,6 +143,24 @@ export function createOrb(x, y, z, material, diaryData) {
     return group;
 }
 
+// 서버에서 계산한 레이아웃(/layout 응답)을 씬에 적용합니다.
+// 어트랙터는 화면에 이미 있는 것만 옮기고, 구체는 기록 id로 찾아 위치와 속도를 바꿉니다.
+export function applyLayout(layout, orbsById) {
+    layout.attractors.forEach(({ type, name, position }) => {
+        const moved = moveAttractor(name, type, position);
+        if (!moved) return;
+        scene.children
+            .filter(child => child.userData.attractorKey === `${type}_${name}`)
+            .forEach(mesh => mesh.position.copy(moved));
+    });
+    layout.positions.forEach(({ id, x, y, z, vx, vy, vz }) => {
+        const orb = id != null ? orbsById.get(id) : null;
+        if (!orb) return;
+        orb.position.set(x, y, z);
+        orb.userData.velocity.set(vx, vy, vz);
+    });
+}
+
 // 겹치지 않는 위치를 생성하는 함수
 export function generateNonOverlappingPosition() {
     let position;
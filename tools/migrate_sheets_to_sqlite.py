@@ -0,0 +1,109 @@
+"""
+Google Sheets에 저장된 사용자와 일기 기록을 SQLite 저장소로 한 번에 옮깁니다.
+
+사용법 (프로젝트 최상위 폴더에서):
+    python -m tools.migrate_sheets_to_sqlite --sqlite data/diary.db
+
+'users' 시트의 사용자는 user_id를 그대로 유지하며, 이미 있는 이메일은 건너뜁니다.
+사용자별 기록은 한 트랜잭션으로 통째로 바꾸므로 여러 번 실행해도 결과가 같습니다.
+옮긴 뒤 STORAGE_BACKEND=sqlite로 설정하면 앱이 SQLite 저장소를 사용합니다.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from googleapiclient.errors import HttpError
+from services.sheets import get_sheets_service, RECORD_HEADER, _row_values
+from services.record_columns import RecordColumns
+from services.sheets_guard import execute
+from services.sqlite_storage import SqliteStorage
+from services.settings import SQLITE_PATH
+from services.log import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def _read_range(service, spreadsheet_id, range_name):
+    try:
+        result = execute(service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range=range_name), 'values.get')
+    except HttpError as err:
+        # 사용자 시트가 없는 경우 (가입 도중 실패 등)
+        if err.resp.status == 400 and 'Unable to parse range' in str(err.content):
+            return None
+        raise
+    return result.get('values', [])
+
+
+def migrate(spreadsheet_id, storage, only_user=None):
+    """
+    Returns:
+        dict: 옮긴 사용자 수, 기록 수, 건너뛴 행 수 등.
+    """
+    service = get_sheets_service()
+    if not service:
+        raise RuntimeError("Google Sheets 서비스에 연결할 수 없습니다. credentials.json을 확인해주세요.")
+
+    report = {"users": 0, "users_added": 0, "records": 0, "skipped_rows": 0, "missing_sheets": 0}
+    seen = set()
+    for row in _read_range(service, spreadsheet_id, 'users!A:C') or []:
+        if len(row) < 3 or row[0] in seen:
+            continue
+        email, password, user_id = row[0], row[1], row[2]
+        # 같은 이메일이 여러 번 있으면 로그인과 같이 첫 번째 행을 사용합니다.
+        seen.add(email)
+        if only_user and only_user not in (email, user_id):
+            continue
+        if storage.import_user(email, password, user_id):
+            report["users_added"] += 1
+        report["users"] += 1
+
+        values = _read_range(service, spreadsheet_id, f'{user_id}!A:H')
+        if values is None:
+            report["missing_sheets"] += 1
+            continue
+        start_index = 1 if values and values[0][:7] == RECORD_HEADER else 0
+        columns = RecordColumns()
+        for value in values[start_index:]:
+            if len(value) < 7:
+                # 가입 시 만든 4열짜리 헤더 등 기록이 아닌 행
+                report["skipped_rows"] += 1
+                continue
+            try:
+                columns.append(*_row_values(value))
+            except (TypeError, ValueError):
+                report["skipped_rows"] += 1
+        records = columns.to_records()
+        storage.replace_records(user_id, records)
+        report["records"] += len(records)
+        logger.debug("'%s' (%s) 기록 %s개를 옮겼습니다.", email, user_id, len(records))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sqlite', default=SQLITE_PATH, help='대상 SQLite 파일 (기본값: SQLITE_PATH 설정)')
+    parser.add_argument('--spreadsheet-id', default=None, help='원본 스프레드시트 ID (기본값: config.DIARY_SPREADSHEET_ID)')
+    parser.add_argument('--user', default=None, help='이 이메일 또는 user_id의 사용자만 옮깁니다.')
+    args = parser.parse_args()
+    configure_logging()
+
+    spreadsheet_id = args.spreadsheet_id
+    if spreadsheet_id is None:
+        from config import DIARY_SPREADSHEET_ID
+        spreadsheet_id = DIARY_SPREADSHEET_ID
+
+    started = time.monotonic()
+    storage = SqliteStorage(args.sqlite)
+    report = migrate(spreadsheet_id, storage, args.user)
+    report["seconds"] = round(time.monotonic() - started, 2)
+    print(f"완료: 사용자 {report['users']}명 (새로 추가 {report['users_added']}명), 기록 {report['records']}개, "
+          f"건너뛴 행 {report['skipped_rows']}개, 시트 없음 {report['missing_sheets']}명, {report['seconds']}초")
+    print(f"대상 파일: {storage.path}")
+
+
+if __name__ == '__main__':
+    main()